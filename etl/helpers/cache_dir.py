@@ -0,0 +1,51 @@
+"""Directories of the caches that are kept across runs.
+
+Caches are read back by later tasks, so they are kept in a directory of the
+user's cache directory ($XDG_CACHE_HOME, or ~/.cache), and are only used if
+nobody else can have written them: the directory and the files read from it
+must be owned by the user running the pipeline, and must not be writable by
+anyone else.
+"""
+import logging
+import os
+import stat
+
+
+def get_default_cache_dir(name: str) -> str:
+    """Returns the default directory of the cache with the given name."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "goodwill_etl", name)
+
+
+def is_private(path: str) -> bool:
+    """Returns True if path is owned by the current user, and can't be written by
+    anyone else. Symlinks aren't followed, so a symlink is never private."""
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        not stat.S_ISLNK(path_stat.st_mode)
+        and path_stat.st_uid == os.getuid()
+        and not path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    )
+
+
+def make_private_dir(cache_dir: str) -> bool:
+    """Creates cache_dir if it doesn't exist, and returns True if it can be used
+    as a cache directory. An existing directory is never used if it isn't
+    private."""
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    except OSError:
+        logging.debug("Could not create cache directory %s.", cache_dir)
+        return False
+    if not is_private(cache_dir):
+        logging.warning(
+            "Not using cache directory %s, since it can be written by other users.",
+            cache_dir,
+        )
+        return False
+    return True
@@ -0,0 +1,425 @@
+"""Native casters for the field types used by the Mission Impact schema.
+
+Values are cast exactly like tableschema's Field.cast_value(value, constraints=True),
+but without raising and formatting an exception for every invalid value. Instead,
+casters return a reason code for each invalid value: TYPE_ERROR if the value
+can't be cast to the field type, or the name of the constraint that it doesn't
+satisfy. Fields with types, formats or constraints that aren't cast natively are
+cast by tableschema, and its errors are converted to reason codes.
+"""
+import collections
+import datetime
+import decimal
+import re
+import typing
+import numpy as np
+import pandas as pd
+from dateutil import parser
+from tableschema import exceptions
+
+# Reason code of values that can't be cast to the field type. Values that don't
+# satisfy a constraint use the name of the constraint (e.g. "minimum") instead.
+TYPE_ERROR = "type"
+RANGE_ERRORS = ("minimum", "maximum")
+
+# Constraints that are checked natively, by field type. Fields with other
+# types or constraints are cast by tableschema.
+NATIVE_CONSTRAINTS = {
+    "integer": {"required", "minimum", "maximum"},
+    "number": {"required", "minimum", "maximum"},
+    "boolean": {"required"},
+    "string": {"required", "enum", "pattern"},
+    "date": {"required"},
+}
+
+# Matches a subset of the strings that `Decimal()` accepts.
+DECIMAL_PATTERN = r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$"
+
+# Date formats that are parsed a whole column at a time, with the year, month
+# and day of each. Only strings that dateutil parses to the same date match.
+ISO_DATE = r"(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})"
+DATE_FORMATS = {
+    "iso": re.compile(r"\A" + ISO_DATE + r"\Z", re.ASCII),
+    "iso_timestamp": re.compile(
+        r"\A"
+        + ISO_DATE
+        + r"[T ](?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d{1,6})?)?"
+        + r"(?:Z|[+-](?:[01]\d|2[0-3]):?[0-5]\d)?\Z",
+        re.ASCII,
+    ),
+    "us": re.compile(
+        r"\A(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})\Z", re.ASCII
+    ),
+    "us_dash": re.compile(
+        r"\A(?P<month>\d{1,2})-(?P<day>\d{1,2})-(?P<year>\d{4})\Z", re.ASCII
+    ),
+    "ymd_slash": re.compile(
+        r"\A(?P<year>\d{4})/(?P<month>\d{1,2})/(?P<day>\d{1,2})\Z", re.ASCII
+    ),
+}
+
+# Number of distinct values of a date column sampled to infer its format.
+DATE_SAMPLE_SIZE = 100
+
+# Maximum number of date formats cached by member and field.
+DATE_FORMAT_CACHE_SIZE = 256
+
+WHITESPACE_PATTERN = re.compile(r"\s")
+CONSTRAINT_ERROR_PATTERN = re.compile(r'has constraint "(\w+)" which is not satisfied')
+
+# Returned by the per-type casters for values that can't be cast.
+_ERROR = object()
+
+# Inferred date format of each (member id, field name), least recently used first.
+_date_format_cache: "collections.OrderedDict[tuple, str]" = collections.OrderedDict()
+
+
+def string_mask(column: pd.Series) -> np.ndarray:
+    """Returns a boolean array that is True where the value is a string."""
+    if pd.api.types.infer_dtype(column, skipna=False) == "string":
+        return np.ones(len(column), dtype=bool)
+    return np.fromiter(
+        (isinstance(val, str) for val in column), dtype=bool, count=len(column)
+    )
+
+
+def type_mask(column: pd.Series, value_type: type) -> np.ndarray:
+    """Returns a boolean array that is True where the value has exactly the given type."""
+    return np.fromiter(
+        (type(val) is value_type for val in column), dtype=bool, count=len(column)
+    )
+
+
+def is_native(field) -> bool:
+    """Returns True iff values of the field can be cast natively."""
+    if field.type not in NATIVE_CONSTRAINTS:
+        return False
+    if not set(field.constraints.keys()) <= NATIVE_CONSTRAINTS[field.type]:
+        return False
+
+    descriptor = field.descriptor
+    if field.type == "integer":
+        return descriptor.get("bareNumber", True)
+    if field.type == "number":
+        return descriptor.get("decimalChar", ".") == "." and descriptor.get(
+            "bareNumber", True
+        )
+    if field.type == "string":
+        return field.format in ("default", None)
+    if field.type == "date":
+        return field.format in ("default", "any")
+    return True
+
+
+def _cast_integer(plan, value):
+    if isinstance(value, int):
+        if isinstance(value, bool):
+            return _ERROR
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return _ERROR
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, decimal.Decimal) and value % 1 == 0:
+        return int(value)
+    return _ERROR
+
+
+def _cast_number(plan, value):
+    if isinstance(value, str):
+        value = WHITESPACE_PATTERN.sub("", value)
+        if plan.group_char:
+            value = value.replace(plan.group_char, "")
+    elif isinstance(value, decimal.Decimal):
+        return value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    else:
+        return _ERROR
+
+    try:
+        return decimal.Decimal(value)
+    except (decimal.InvalidOperation, ValueError):
+        return _ERROR
+
+
+def _cast_boolean(plan, value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+    if value in plan.true_values:
+        return True
+    if value in plan.false_values:
+        return False
+    return _ERROR
+
+
+def _cast_string(plan, value):
+    return value if isinstance(value, str) else _ERROR
+
+
+def _cast_date(plan, value):
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.date()
+        return _ERROR
+    if isinstance(value, datetime.date):
+        return value
+    if not isinstance(value, str):
+        return _ERROR
+
+    try:
+        if plan.field.format == "any":
+            return parser.parse(value).date()
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except Exception:
+        return _ERROR
+
+
+_CASTERS = {
+    "integer": _cast_integer,
+    "number": _cast_number,
+    "boolean": _cast_boolean,
+    "string": _cast_string,
+    "date": _cast_date,
+}
+
+
+def _check_constraints(plan, value) -> typing.Optional[str]:
+    """Returns the name of the first constraint that a cast value doesn't satisfy."""
+    for name in plan.field.constraints:
+        if name == "required":
+            passed = value is not None or not plan.field.constraints[name]
+        elif value is None:
+            passed = True
+        elif name in RANGE_ERRORS:
+            try:
+                if name == "minimum":
+                    passed = value >= plan.bounds[name]
+                else:
+                    passed = value <= plan.bounds[name]
+            except decimal.InvalidOperation:
+                # Like tableschema, NaN never satisfies a constraint.
+                passed = False
+        elif name == "pattern":
+            passed = plan.pattern.match(value) is not None
+        else:
+            passed = value in plan.enum_options
+
+        if not passed:
+            return name
+    return None
+
+
+def cast_error_code(error: exceptions.CastError) -> str:
+    """Returns the reason code of a tableschema cast error."""
+    match = CONSTRAINT_ERROR_PATTERN.search(str(error))
+    return match.group(1) if match else TYPE_ERROR
+
+
+def cast_value(plan, value) -> typing.Tuple[typing.Any, typing.Optional[str]]:
+    """Casts a value using the field of a FieldPlan.
+
+    Returns tuple of the cast value and the reason code, which is None if the
+    value is valid. If the value is not valid, the cast value is None.
+    """
+    if not plan.native_cast:
+        try:
+            return (plan.field.cast_value(value, constraints=True), None)
+        except exceptions.CastError as e:
+            return (None, cast_error_code(e))
+
+    if value in plan.missing_values:
+        value = None
+    else:
+        value = _CASTERS[plan.type](plan, value)
+        if value is _ERROR:
+            return (None, TYPE_ERROR)
+
+    reason_code = _check_constraints(plan, value)
+    return (value, None) if reason_code is None else (None, reason_code)
+
+
+def infer_date_format(strings: pd.Series) -> typing.Optional[str]:
+    """Returns the name of the date format that matches the most values in a
+    sample of the distinct strings of a column, or None if none of them match."""
+    sample = pd.Series(strings.unique()[:DATE_SAMPLE_SIZE], dtype="object")
+    best_format, best_count = None, 0
+    for name, pattern in DATE_FORMATS.items():
+        count = sample.str.match(pattern).sum()
+        if count > best_count:
+            best_format, best_count = name, count
+    return best_format
+
+
+def _get_date_format(plan, strings: pd.Series, member_id) -> typing.Optional[str]:
+    """Returns the cached date format of a member's field, inferring it if needed."""
+    if member_id is None:
+        return infer_date_format(strings)
+
+    key = (member_id, plan.name)
+    if key in _date_format_cache:
+        _date_format_cache.move_to_end(key)
+        return _date_format_cache[key]
+
+    date_format = infer_date_format(strings)
+    if date_format is not None:
+        _date_format_cache[key] = date_format
+        if len(_date_format_cache) > DATE_FORMAT_CACHE_SIZE:
+            _date_format_cache.popitem(last=False)
+    return date_format
+
+
+def parse_date_column(plan, strings: pd.Series, member_id=None) -> np.ndarray:
+    """Parses a column of date strings in one go, using the format of the column.
+
+    Returns an object array with the date of each string, or None where the
+    string doesn't match the format or isn't a valid date. Those strings should
+    be cast one at a time.
+    """
+    result = np.full(len(strings), None, dtype=object)
+    date_format = _get_date_format(plan, strings, member_id)
+    if date_format is None:
+        return result
+
+    parts = strings.str.extract(DATE_FORMATS[date_format])
+    matched = parts["year"].notna().to_numpy()
+    if matched.any():
+        dates = pd.to_datetime(
+            parts[matched][["year", "month", "day"]].astype(np.int64), errors="coerce"
+        )
+        is_valid = dates.notna().to_numpy()
+        result[np.flatnonzero(matched)[is_valid]] = dates[is_valid].dt.date.to_numpy()
+    return result
+
+
+def _bounds_mask(values: np.ndarray, accepted: np.ndarray, plan) -> np.ndarray:
+    """Returns a boolean array that is True where accepted values satisfy the
+    minimum and maximum constraints of a field."""
+    in_bounds = np.ones(len(values), dtype=bool)
+    for constraint, compare in (
+        ("minimum", np.greater_equal),
+        ("maximum", np.less_equal),
+    ):
+        if constraint in plan.bounds:
+            in_bounds[accepted] &= compare(
+                values[accepted], plan.bounds[constraint]
+            ).astype(bool)
+    return in_bounds
+
+
+def cast_column(
+    plan, values: pd.Series, member_id=None
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Vectorized version of cast_value for a column of non-missing values.
+
+    Values that can't be cast in bulk, including every invalid value, are cast
+    one at a time. The formats of date columns are cached by member id, if given.
+
+    Returns tuple of an object array with the cast values, and an object array
+    with the reason code of each value, which is None where the value is valid.
+    """
+    result = np.empty(len(values), dtype=object)
+    accepted = np.zeros(len(values), dtype=bool)
+
+    if not plan.native_cast:
+        pass
+    elif plan.type == "integer":
+        accepted = type_mask(values, int)
+        result[accepted] = values[accepted].to_numpy(dtype=object)
+        accepted &= _bounds_mask(result, accepted, plan)
+
+    elif plan.type == "number":
+        positions = np.flatnonzero(string_mask(values))
+        numbers = values.iloc[positions].str.replace(r"\s", "", regex=True)
+        if plan.group_char:
+            numbers = numbers.str.replace(plan.group_char, "", regex=False)
+
+        is_decimal = numbers.str.match(DECIMAL_PATTERN).to_numpy(dtype=bool)
+        positions = positions[is_decimal]
+        result[positions] = [decimal.Decimal(num) for num in numbers[is_decimal]]
+        accepted[positions] = True
+        accepted &= _bounds_mask(result, accepted, plan)
+
+    elif plan.type == "boolean":
+        bools = type_mask(values, bool)
+        result[bools] = values[bools].to_numpy(dtype=object)
+
+        strings = string_mask(values)
+        stripped = values[strings].str.strip()
+        is_true = stripped.isin(plan.true_values).to_numpy()
+        is_false = stripped.isin(plan.false_values).to_numpy() & ~is_true
+        positions = np.flatnonzero(strings)
+        result[positions[is_true]] = True
+        result[positions[is_false]] = False
+        accepted = bools
+        accepted[positions[is_true | is_false]] = True
+
+    elif plan.type == "string":
+        accepted = string_mask(values)
+        strings = values[accepted]
+        if "enum" in plan.cast_constraints:
+            accepted[accepted] = strings.isin(plan.enum_options).to_numpy()
+            strings = values[accepted]
+        if plan.pattern is not None:
+            accepted[accepted] = strings.str.match(plan.pattern).to_numpy(dtype=bool)
+        result[accepted] = values[accepted].to_numpy(dtype=object)
+
+    # Values in missing_values (e.g. "") are cast one at a time, since they may
+    # not satisfy the required constraint.
+    if accepted.any() and plan.missing_values:
+        accepted[accepted] = ~values[accepted].isin(plan.missing_values).to_numpy()
+
+    reason_codes = np.full(len(values), None, dtype=object)
+    if plan.type == "date" and plan.native_cast:
+        positions = np.flatnonzero(string_mask(values))
+        if plan.field.format == "any":
+            dates = parse_date_column(plan, values.iloc[positions], member_id)
+            parsed = pd.notnull(dates)
+            result[positions[parsed]] = dates[parsed]
+            accepted[positions[parsed]] = True
+            positions = positions[~parsed]
+
+        # Cast each distinct string that wasn't parsed once.
+        codes, uniques = pd.factorize(values.iloc[positions])
+        unique_results = np.empty(len(uniques), dtype=object)
+        unique_reason_codes = np.empty(len(uniques), dtype=object)
+        for i, val in enumerate(uniques):
+            unique_results[i], unique_reason_codes[i] = cast_value(plan, val)
+
+        result[positions] = unique_results[codes]
+        reason_codes[positions] = unique_reason_codes[codes]
+        accepted[positions] = True
+
+    remaining = np.flatnonzero(~accepted)
+    for i in remaining:
+        result[i], reason_codes[i] = cast_value(plan, values.iat[i])
+
+    return result, reason_codes
+
+
+def reason_message(reason_code: str, value, field) -> str:
+    """Returns the invalid reason reported for a value with a reason code."""
+    if reason_code in RANGE_ERRORS:
+        if "maximum" in field.constraints and "minimum" in field.constraints:
+            return "{} must be within the range [{}, {}]".format(
+                field.name,
+                str(field.constraints["minimum"]),
+                str(field.constraints["maximum"]),
+            )
+        elif "maximum" in field.constraints:
+            return "{} must be less than or equal to {}".format(
+                field.name, str(field.constraints["maximum"])
+            )
+        elif "minimum" in field.constraints:
+            return "{} must be greater than or equal to {}".format(
+                field.name, str(field.constraints["minimum"])
+            )
+    elif field.name == "SOC":
+        return "SOC should be in the format ##-####"
+
+    return f"{str(value)} is not a valid {field.type}"
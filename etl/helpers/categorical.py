@@ -0,0 +1,119 @@
+"""Helpers for columns stored as pandas Categoricals.
+
+Enum, boolean and MilestoneFlag columns repeat a few distinct values over many
+rows. They are stored as Categoricals from shaping through processing, so each
+row only holds a small integer code, and functions are applied once per category
+instead of once per row.
+"""
+import typing
+import numpy as np
+import pandas as pd
+
+from etl.helpers.ledger import object_array
+
+
+def is_categorical(column: pd.Series) -> bool:
+    return isinstance(column.dtype, pd.CategoricalDtype)
+
+
+def recode(column: pd.Series, values: typing.Sequence, na_value=np.nan) -> pd.Series:
+    """Returns a categorical column with the rows of a categorical column replaced
+    by the new value of their category.
+
+    values holds the new value of each category. Categories with equal new values
+    are merged, and categories whose new value is missing (None or NaN) become
+    missing values. Missing rows are replaced by na_value.
+    """
+    codes = column.cat.codes.to_numpy()
+    # Missing rows have code -1, so they pick na_value, at the end.
+    values = object_array(list(values) + [na_value])
+    new_codes, categories = pd.factorize(values)
+    return pd.Series(
+        pd.Categorical.from_codes(
+            new_codes[codes], categories=pd.Index(categories, dtype=object)
+        ),
+        index=column.index,
+        name=column.name,
+    )
+
+
+def map_categories(
+    column: pd.Series, function: typing.Callable, na_value=np.nan
+) -> pd.Series:
+    """Applies a function to each category of a categorical column, like
+    column.map(function) would to every row, and returns a categorical column."""
+    return recode(
+        column,
+        [function(val) for val in column.cat.categories.tolist()],
+        na_value=na_value,
+    )
+
+
+def strings_to_categorical(column: pd.Series) -> pd.Series:
+    """Returns a column with the values of a column converted to strings, like
+    column.fillna("").astype(str), as a categorical column."""
+    if not is_categorical(column):
+        if pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+            # Values of other types are converted to strings first, since values
+            # that are equal but convert to different strings (e.g. 1 and True)
+            # would be merged into one category.
+            column = column.fillna("").astype(str)
+        column = column.astype("category")
+    return map_categories(column, str, na_value="")
+
+
+def to_objects(column: pd.Series) -> np.ndarray:
+    """Returns an object array with the value of each row of a categorical column,
+    and None for missing rows."""
+    values = object_array(column.cat.categories.tolist() + [None])
+    return values[column.cat.codes.to_numpy()]
+
+
+def concat(datasets: typing.List[pd.DataFrame], sort: bool = True) -> pd.DataFrame:
+    """Concatenates datasets like pd.concat(datasets, ignore_index=True, sort=sort).
+
+    Columns that are categorical in every dataset that has them stay categorical.
+    Their categories are merged, plus a blank string so that missing values can be
+    filled with fillna("").
+    """
+    column_names = {
+        column_name for dataset in datasets for column_name in dataset.columns
+    }
+    categorical_columns = [
+        column_name
+        for column_name in column_names
+        if all(
+            is_categorical(dataset[column_name])
+            for dataset in datasets
+            if column_name in dataset
+        )
+    ]
+
+    dtypes = {}
+    for column_name in categorical_columns:
+        categories = pd.Index([""], dtype=object)
+        for dataset in datasets:
+            if column_name in dataset:
+                categories = categories.append(
+                    dataset[column_name].cat.categories.astype(object)
+                )
+        dtypes[column_name] = pd.CategoricalDtype(categories.unique())
+
+    unified = []
+    for dataset in datasets:
+        # Only the categorical columns are replaced, so the others aren't copied.
+        dataset = dataset.copy(deep=False)
+        for column_name, dtype in dtypes.items():
+            if column_name in dataset:
+                dataset[column_name] = dataset[column_name].cat.set_categories(
+                    dtype.categories
+                )
+            else:
+                # Add the missing column, so pd.concat doesn't fill it with NaNs
+                # of another dtype.
+                dataset[column_name] = pd.Categorical.from_codes(
+                    np.full(len(dataset), -1), dtype=dtype
+                )
+        unified.append(dataset)
+
+    return pd.concat(unified, ignore_index=True, sort=sort)
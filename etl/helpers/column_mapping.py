@@ -2,12 +2,11 @@
 """
 
 import logging
-from typing import Dict
-import great_expectations as ge
+from typing import Dict, List
 import pandas as pd
 from tableschema import Schema
 
-from etl.helpers import common, drive, table_schema
+from etl.helpers import common, drive, table_schema, validation
 
 INTERNAL_COLUMN_NAME_COLUMN_NAME = "Internal Column Name"
 MI_FIELD_NAME_COLUMN_NAME = "Mission Impact Field Name"
@@ -16,6 +15,12 @@ COLUMN_NAMES = [INTERNAL_COLUMN_NAME_COLUMN_NAME, MI_FIELD_NAME_COLUMN_NAME]
 ColumnMapping = Dict[str, str]
 
 
+def get_dropped_column_names(column_mapping: ColumnMapping) -> List[str]:
+    """Returns the columns that the column mapping maps to None, which are dropped
+    from the datasets."""
+    return [k for k, v in column_mapping.items() if v is None]
+
+
 class ColumnMappingValidator:
     """Validates a column mapping file."""
 
@@ -23,9 +28,9 @@ class ColumnMappingValidator:
         self.table_schema: Schema = table_schema
         self.row_format: bool = row_format
 
-    def _get_expectations(self, column_mapping: pd.DataFrame) -> ge.dataset.Dataset:
+    def _get_expectations(self, column_mapping: pd.DataFrame) -> validation.Dataset:
         """
-        Returns great_expectations object for a pd.DataFrame with expectations attached.
+        Returns validation dataset for a pd.DataFrame with expectations attached.
 
         If not all expectations have been satisfied, this function may fail early for
         readability of the failed expectation(s).
@@ -35,8 +40,7 @@ class ColumnMappingValidator:
         - Does not have any repeated local column names
         - All supposed GII columns are valid ones
         """
-        column_mapping_ge = ge.from_pandas(column_mapping)
-        column_mapping_ge.set_default_expectation_argument("result_format", "COMPLETE")
+        column_mapping_ge = validation.from_pandas(column_mapping)
 
         # Shape
         shape_expectation = column_mapping_ge.expect_table_columns_to_match_ordered_list(
@@ -80,6 +84,24 @@ class ColumnMappingLoader:
             MI_FIELD_NAME_COLUMN_NAME
         ]
 
+    @staticmethod
+    def get_dropped_column_names_from_dataframe(
+        column_mapping_df: pd.DataFrame,
+    ) -> List[str]:
+        """Returns the columns that a column mapping, which may not have been
+        validated yet, drops (see get_dropped_column_names). If it doesn't have
+        the expected columns, none are dropped."""
+        if column_mapping_df is None or list(column_mapping_df.columns) != COLUMN_NAMES:
+            return []
+        internal_column_names = column_mapping_df[INTERNAL_COLUMN_NAME_COLUMN_NAME]
+        return [
+            k
+            for k, v in zip(
+                internal_column_names, column_mapping_df[MI_FIELD_NAME_COLUMN_NAME]
+            )
+            if v is None
+        ]
+
     @staticmethod
     def load_column_mappings_local(column_mapping_filename: str) -> ColumnMapping:
         return pd.read_csv(column_mapping_filename)
@@ -0,0 +1,173 @@
+"""Reads extracted data files.
+
+The values of extracted data are processed as strings, so they are read as
+strings, instead of inferring their types and converting them back to strings
+later (which also turned "02134" into "2134", and "1" into "1.0" in columns
+with missing values). Values are stripped of whitespace as they are read, and
+columns that the column mapping drops aren't read at all.
+
+If pyarrow is installed, its CSV reader is used, which parses and strips the
+values in native code. Otherwise the pandas C parser is used.
+"""
+import typing
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.csv
+except ImportError:  # Optional, see setup.py.
+    pyarrow = None
+
+PANDAS_ENGINE = "c"
+PYARROW_ENGINE = "pyarrow"
+ENGINES = [PANDAS_ENGINE, PYARROW_ENGINE]
+
+# Values read as missing, by both engines. These are the defaults of pandas,
+# listed here so they don't change with the version of pandas or pyarrow.
+NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "n/a",
+    "nan",
+    "null",
+]
+
+
+def get_default_engine() -> str:
+    return PANDAS_ENGINE if pyarrow is None else PYARROW_ENGINE
+
+
+def _read_column_names(filename: str) -> typing.List[str]:
+    """Returns the column names of a file as pandas names them, e.g. "Unnamed: 1"
+    for a column without a header, which the dataset shape validator relies on."""
+    return list(pd.read_csv(filename, nrows=0).columns)
+
+
+def _read_csv_pandas(
+    filename: str, all_column_names: typing.List[str], column_names: typing.List[str]
+) -> pd.DataFrame:
+    if len(column_names) == len(all_column_names):
+        usecols = None
+    else:
+        # Positions, since the names of duplicated columns are changed on read.
+        column_names = set(column_names)
+        usecols = [
+            position
+            for position, column in enumerate(all_column_names)
+            if column in column_names
+        ]
+
+    dataset = pd.read_csv(
+        filename,
+        dtype=str,
+        keep_default_na=False,
+        na_values=NA_VALUES,
+        usecols=usecols,
+    )
+    # Replacing the columns one at a time would copy the whole dataset each time.
+    stripped_dataset = pd.DataFrame(
+        {
+            position: _strip_values(dataset.iloc[:, position].to_numpy(dtype=object))
+            for position in range(dataset.shape[1])
+        }
+    )
+    stripped_dataset.columns = dataset.columns
+    return stripped_dataset
+
+
+def _strip_values(values: np.ndarray) -> np.ndarray:
+    """Strips the strings of an object array, keeping missing values.
+
+    Columns of extracted data have few distinct values, so each distinct value is
+    only stripped once.
+    """
+    codes, uniques = pd.factorize(values)
+    stripped_uniques = np.empty(len(uniques) + 1, dtype=object)
+    stripped_uniques[:-1] = [value.strip() for value in uniques]
+    stripped_uniques[-1] = np.nan
+    # Missing values have code -1, which takes the last value.
+    return stripped_uniques.take(codes)
+
+
+def _read_csv_pyarrow(
+    filename: str, all_column_names: typing.List[str], column_names: typing.List[str]
+) -> pd.DataFrame:
+    table = pyarrow.csv.read_csv(
+        filename,
+        # The header is replaced by the names pandas gives the columns.
+        read_options=pyarrow.csv.ReadOptions(
+            column_names=all_column_names, skip_rows=1
+        ),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types={column: pyarrow.string() for column in column_names},
+            include_columns=column_names,
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+
+    return pyarrow.Table.from_arrays(
+        [
+            pyarrow.compute.utf8_trim_whitespace(table.column(column))
+            for column in column_names
+        ],
+        names=column_names,
+    ).to_pandas()
+
+
+def read_csv(
+    filename: str,
+    dropped_column_names: typing.Collection[str] = (),
+    engine: typing.Optional[str] = None,
+) -> pd.DataFrame:
+    """Reads an extracted data file.
+
+    Parameters
+    ----------
+    filename : str
+        CSV file to read.
+    dropped_column_names : typing.Collection[str]
+        Columns that aren't read, e.g. the columns the column mapping drops
+        (see column_mapping.get_dropped_column_names).
+    engine : typing.Optional[str]
+        One of ENGINES. Defaults to pyarrow if it is installed.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataset, with every value a string stripped of whitespace, or a
+        missing value (NaN, or None with pyarrow) if it is one of NA_VALUES.
+
+    """
+    if engine is None:
+        engine = get_default_engine()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown CSV engine {engine}. Expected one of {ENGINES}.")
+    if engine == PYARROW_ENGINE and pyarrow is None:
+        raise ValueError(f"The {PYARROW_ENGINE} CSV engine requires pyarrow.")
+
+    all_column_names = _read_column_names(filename)
+    dropped_column_names = set(dropped_column_names)
+    column_names = [
+        column for column in all_column_names if column not in dropped_column_names
+    ]
+
+    if engine == PYARROW_ENGINE:
+        return _read_csv_pyarrow(filename, all_column_names, column_names)
+    return _read_csv_pandas(filename, all_column_names, column_names)
@@ -1,13 +1,32 @@
+import collections
+import concurrent.futures
+import contextlib
+import itertools
 import logging
 import numpy as np
 import pandas as pd
 import re
-from tableschema import exceptions, Schema, Field
-import us
-
-import sqlalchemy
+import types
+import typing
+from functools import partial
+from tableschema import config, Schema, Field
 
+from etl.helpers import casters, categorical, states
+from etl.helpers.casters import string_mask, type_mask
 from etl.helpers.field_mapping.common import FieldMapping, FieldMappings
+from etl.helpers.ledger import (
+    CASE_NUMBER_KEY,
+    FIELD_NAME_KEY,
+    MILESTONE_FLAG_KEY,
+    ORIGINAL_VALUE_KEY,
+    INVALID_REASON_KEY,
+    MISSING_FIELDS_KEY,
+    DUPLICATE_ROWS_KEY,
+    ROW_KEY,
+    DroppedRowLedger,
+    InvalidValueLedger,
+)
+from etl.helpers.table_schema import SchemaIndex, get_schema_index
 
 # Value to represent blank/empty cells.
 BLANK_VALUE = None
@@ -17,16 +36,43 @@ NUM_ROWS_TO_UPLOAD_KEY = "num_rows_to_upload"
 DROPPED_ROWS_KEY = "dropped_rows"
 DROPPED_VALUES_KEY = "dropped_values"
 
-# Keys used for value identifiers and reporting invalid data.
-CASE_NUMBER_KEY = "case_number"
-FIELD_NAME_KEY = "field_name"
-MILESTONE_FLAG_KEY = "milestone_flag"
-ORIGINAL_VALUE_KEY = "original_value"
-INVALID_REASON_KEY = "invalid_reasons"
+# Engines used to process columns. The cell engine transforms and casts one
+# value at a time and is kept as the reference implementation for parity tests.
+CELL_ENGINE = "cell"
+VECTORIZED_ENGINE = "vectorized"
+# The factorized engine runs the per-cell functions once per distinct value.
+FACTORIZED_ENGINE = "factorized"
+
+# Ways of logging invalid values. The detailed mode logs every invalid value. The
+# aggregated mode logs one summary per column, with the number of invalid values
+# for each reason and a sample of their case numbers. Either way, every invalid
+# value is recorded in invalid_values.
+DETAILED_LOGGING = "detailed"
+AGGREGATED_LOGGING = "aggregated"
+
+# Maximum number of reasons, and of case numbers per reason, in the summary of
+# the invalid values of a column.
+INVALID_VALUE_LOG_MAX_REASONS = 20
+INVALID_VALUE_LOG_SAMPLE_SIZE = 5
+
+# Matches every string that `float()` accepts (and some that it doesn't).
+FLOAT_LIKE_PATTERN = re.compile(
+    r"^\s*[+-]?(?:[\d_]*\.?[\d_]*(?:[eE][+-]?[\d_]+)?|inf(?:inity)?|nan)\s*$",
+    re.IGNORECASE,
+)
 
-MISSING_FIELDS_KEY = "missing_fields"
-DUPLICATE_ROWS_KEY = "duplicate_rows"
-ROW_KEY = "row"
+# Fields that identify a record. Records with the same values for all of these fields are duplicates.
+DUPLICATE_KEY_FIELDS = ["CaseNumber", "MilestoneFlag", "MemberOrganization"]
+
+# Maximum number of rows dropped for missing required fields that are logged
+# individually. The rest are only counted in the summary.
+DROPPED_ROWS_LOG_SAMPLE_SIZE = 20
+
+# Default number of rows processed at a time by DataProcessor.process_in_chunks.
+CHUNK_SIZE = 50000
+
+# Largest magnitude that can be converted from float to int64 exactly.
+MAX_INT64_FLOAT = float(2 ** 63)
 
 
 def is_int(s: str) -> bool:
@@ -55,14 +101,227 @@ def is_blank(val):
     return val is None or val != val or (isinstance(val, str) and val.strip() == "")
 
 
+def blank_mask(column: pd.Series) -> np.ndarray:
+    """Vectorized version of is_blank for a whole column."""
+    mask = column.isnull().to_numpy()
+    strings = string_mask(column)
+    if strings.any():
+        mask[strings] = (column[strings].str.strip() == "").to_numpy()
+    return mask
+
+
+def to_float(column: pd.Series) -> np.ndarray:
+    """Vectorized version of `float()` for a column of strings.
+
+    Returns NaN for values that can't be interpreted as a float.
+    """
+    result = np.full(len(column), np.nan)
+    candidates = column.str.match(FLOAT_LIKE_PATTERN).to_numpy(dtype=bool)
+    if not candidates.any():
+        return result
+
+    values = column.to_numpy(dtype=object)[candidates]
+    try:
+        result[candidates] = values.astype(np.float64)
+    except ValueError:
+        # Some of the candidates aren't valid floats, so fall back to casting
+        # them one at a time.
+        result[candidates] = [_float_or_nan(val) for val in values]
+    return result
+
+
+def _float_or_nan(s) -> float:
+    try:
+        return float(s)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def int_mask(nums: np.ndarray) -> np.ndarray:
+    """Vectorized version of is_int for floats that fit in an int64."""
+    with np.errstate(invalid="ignore"):
+        return (
+            np.isfinite(nums)
+            & (np.abs(nums) < MAX_INT64_FLOAT)
+            & (nums == np.floor(nums))
+        )
+
+
+def lookup(keys: pd.Series, table: dict) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Looks up every key of a column in a dict.
+
+    Returns a boolean array that is True where the key was found, and an object
+    array with the looked up values for those keys.
+    """
+    values = np.empty(len(table), dtype=object)
+    values[:] = list(table.values())
+
+    index = pd.Index(list(table.keys()), dtype=object)
+    if index.is_unique:
+        codes = index.get_indexer(keys)
+    else:
+        positions = {key: i for i, key in enumerate(table.keys())}
+        codes = np.fromiter(
+            (positions.get(key, -1) for key in keys), dtype=np.intp, count=len(keys)
+        )
+
+    found = codes >= 0
+    return found, values[codes[found]]
+
+
+def find_duplicates(
+    df: pd.DataFrame, key_fields: typing.List[str]
+) -> typing.Tuple[np.ndarray, pd.Series]:
+    """Finds the groups of rows with the same values for all of the key fields.
+
+    Returns a boolean array that is True for the rows with a unique key, and the
+    size of each group of duplicate rows, indexed by key, in the order the groups
+    first appear. Only the duplicate rows are grouped, since they are usually
+    few. The key fields are required, so they are expected not to be null.
+    """
+    keep = ~df.duplicated(key_fields, keep=False).to_numpy()
+    duplicate_keys = df[key_fields].take(np.flatnonzero(~keep))
+    group_sizes = (
+        duplicate_keys.groupby(key_fields, sort=False, observed=True)
+        .size()
+        .astype(np.int64)
+    )
+    return keep, group_sizes
+
+
+class FieldPlan:
+    """Everything needed to transform and cast the values of one field.
+
+    Plans are compiled once per DataProcessor (see compile_field_plans), so
+    nothing is re-derived from the schema or the field mappings for each column
+    or value. The field mappings are expected not to change while they are used
+    by a DataProcessor.
+    """
+
+    def __init__(self, field: Field, field_mapping: typing.Optional[FieldMapping]):
+        self.field: Field = field
+        self.name: str = field.name
+        self.type: str = field.type
+        self.is_enum: bool = (
+            "enum" in field.constraints.keys()
+            or "enum_mapping" in field.descriptor.keys()
+        )
+        self.allows_multiple: bool = bool(field.descriptor.get("allows_multiple"))
+        # Unbound DataProcessor function used to transform values, if any.
+        # Chosen by compile_field_plans.
+        self.transform: typing.Optional[typing.Callable] = None
+
+        # Values accepted by tableschema when casting booleans.
+        self.true_values: typing.List[str] = field.descriptor.get(
+            "trueValues", ["true", "True", "TRUE", "1"]
+        )
+        self.false_values: typing.List[str] = field.descriptor.get(
+            "falseValues", ["false", "False", "FALSE", "0"]
+        )
+
+        # Enum options, as stored in the schema.
+        if self.type == "boolean":
+            self.enum_options = self.true_values + self.false_values
+        elif self.type == "integer":
+            self.enum_options = field.descriptor.get("enum_mapping", {})
+        else:
+            self.enum_options = field.constraints.get("enum", [])
+
+        # Transformed value of each input value in the field mapping. Mappings
+        # to options that aren't valid for an integer enum are left out.
+        self.mapped_values: typing.Dict[str, typing.Any] = {}
+        if field_mapping is not None:
+            mapping = field_mapping.get_field_mapping_dict()
+            for val, (mapped_val, _) in mapping.items():
+                if is_blank(mapped_val):
+                    self.mapped_values[val] = BLANK_VALUE
+                elif self.type != "integer":
+                    self.mapped_values[val] = mapped_val
+                elif mapped_val in self.enum_options:
+                    self.mapped_values[val] = self.enum_options[mapped_val]
+
+        # Transformed value of each lowercase enum option.
+        self.case_insensitive_enum_options: typing.Dict[str, typing.Any] = {}
+        if self.type == "integer":
+            for option, num in self.enum_options.items():
+                self.case_insensitive_enum_options[option.lower()] = num
+        else:
+            # Keep the first option that matches, like list.index() does.
+            for option in self.enum_options:
+                self.case_insensitive_enum_options.setdefault(option.lower(), option)
+
+        # Cast metadata. Fields that can't be cast natively are cast by tableschema.
+        self.native_cast: bool = casters.is_native(field)
+        self.missing_values: typing.List[str] = (
+            field.schema.missing_values
+            if field.schema is not None
+            else config.DEFAULT_MISSING_VALUES
+        )
+        self.cast_constraints: typing.Set[str] = set(field.constraints.keys()) - {
+            "required"
+        }
+        self.bounds: typing.Dict[str, typing.Any] = {
+            constraint: field.cast_value(
+                field.constraints[constraint], constraints=False
+            )
+            for constraint in ("minimum", "maximum")
+            if constraint in field.constraints
+        }
+        self.pattern: typing.Optional[typing.Pattern] = (
+            re.compile("^{0}$".format(field.constraints["pattern"]))
+            if "pattern" in field.constraints
+            else None
+        )
+        self.group_char: str = field.descriptor.get("groupChar", "")
+        # Whether numbers use the default decimal character and no currency symbols.
+        self.is_plain_number: bool = field.descriptor.get(
+            "decimalChar", "."
+        ) == "." and field.descriptor.get("bareNumber", True)
+
+
 class DataProcessor:
-    def __init__(self, field_mappings, table_schema: Schema):
+    def __init__(
+        self,
+        field_mappings,
+        table_schema: Schema,
+        engine: str = VECTORIZED_ENGINE,
+        num_workers: int = 1,
+        member_id: typing.Optional[str] = None,
+        invalid_value_logging: str = DETAILED_LOGGING,
+        low_copy: bool = False,
+    ):
         self.field_mappings = (
             field_mappings  # Field mappings for enum and boolean values.
         )
         self.table_schema: Schema = table_schema  # Schema of fields present in dataframe.
-        self.dropped_rows = []
-        self.invalid_values = []
+        self.schema_index: SchemaIndex = get_schema_index(table_schema)
+        self.engine: str = engine  # Engine used to transform and cast columns.
+        # Number of processes used to process the non-required columns. If 1, they
+        # are processed serially.
+        self.num_workers: int = num_workers
+        # Member whose data is processed. Used to cache the formats of date columns.
+        self.member_id: typing.Optional[str] = member_id
+        # How invalid values are logged (DETAILED_LOGGING or AGGREGATED_LOGGING).
+        self.invalid_value_logging: str = invalid_value_logging
+        # If True, process transforms the dataset in place instead of copying it.
+        self.low_copy: bool = low_copy
+        self.field_plans: typing.Dict[str, FieldPlan] = compile_field_plans(
+            table_schema, field_mappings
+        )
+        self.dropped_rows: DroppedRowLedger = DroppedRowLedger()
+        self.invalid_values: InvalidValueLedger = InvalidValueLedger()
+        # Number of occurrences of each distinct invalid value, by field name.
+        # Only counted by the factorized engine.
+        self.invalid_value_counts = {}
+
+        # Vectorized versions of the per-cell transformation functions.
+        self.column_functions = {
+            self._transform_enum: self._transform_enum_column,
+            self._transform_soc: self._transform_soc_column,
+            self._transform_state: self._transform_state_column,
+            self._transform_int: self._transform_int_column,
+            self._cast_val: self._cast_column,
+        }
 
     def _report_invalid_value(self, value_identifier, reason, suppress_invalid):
         """Reports invalid value.
@@ -84,24 +343,30 @@ class DataProcessor:
             value_identifier[INVALID_REASON_KEY] = reason
 
         if not suppress_invalid:
-            case_number = value_identifier[CASE_NUMBER_KEY]
-            field_name = value_identifier[FIELD_NAME_KEY]
-            milestone_flag = value_identifier[MILESTONE_FLAG_KEY]
-            original_value = value_identifier[ORIGINAL_VALUE_KEY]
-
-            logging.error(
-                "(Case Number: %s, Milestone: %s) Invalid value for %s: %s. Type: %s. Reason: %s",
-                case_number,
-                milestone_flag,
-                field_name,
-                str(original_value),
-                type(original_value),
+            self._log_invalid_value(
+                value_identifier[CASE_NUMBER_KEY],
+                value_identifier[MILESTONE_FLAG_KEY],
+                value_identifier[FIELD_NAME_KEY],
+                value_identifier[ORIGINAL_VALUE_KEY],
                 reason,
             )
             self.invalid_values.append(value_identifier)
         return (BLANK_VALUE, False)
 
-    def _transform_enum(self, val, field, value_identifier, suppress_invalid=False):
+    def _log_invalid_value(
+        self, case_number, milestone_flag, field_name, original_value, reason
+    ):
+        logging.error(
+            "(Case Number: %s, Milestone: %s) Invalid value for %s: %s. Type: %s. Reason: %s",
+            case_number,
+            milestone_flag,
+            field_name,
+            str(original_value),
+            type(original_value),
+            reason,
+        )
+
+    def _transform_enum(self, val, plan, value_identifier, suppress_invalid=False):
         """Transforms enum based on field mapping.
 
         This function handles booleans, string enums, and integer enums.
@@ -109,13 +374,9 @@ class DataProcessor:
         Returns tuple of transformed value and bool indicating if the input value is valid.
         If input value is not valid, returns BLANK_VALUE instead of transformed value.
         """
-        data_type = field.type
+        data_type = plan.type
 
-        # Enum options are stored differently based on field type.
         if data_type == "boolean":
-            enum_options = (
-                field.descriptor["trueValues"] + field.descriptor["falseValues"]
-            )
             # If the value is "1.0" or "2.0", make sure the decimals and 0 are stripped.
             if is_int(val):
                 val = str(int(float(val)))
@@ -123,55 +384,26 @@ class DataProcessor:
             # If the field is an integer enum and the value can be intepreted as an integer, return its integer value.
             if is_int(val):
                 return (int(float(val)), True)
-            enum_options = field.descriptor["enum_mapping"]
         elif data_type == "string":
             val = str(val)
-            enum_options = field.constraints["enum"]
 
-        if field.name in self.field_mappings:
-            mapping = self.field_mappings[field.name].get_field_mapping_dict()
-        else:
-            mapping = {}
-
-        if val in mapping:
-            # Ignore the approval state, not needed here
-            mapped_val, _ = mapping[val]
-
-            # Return BLANK_VALUE if mapped value is empty.
-            if is_blank(mapped_val):
-                return (BLANK_VALUE, True)
-
-            # For integer enums, the enum options are a dict mapping from string
-            # values to integer values, so we use this dict to transform to int.
-            return (
-                (mapped_val, True)
-                if data_type != "integer"
-                else (enum_options[mapped_val], True)
-            )
-        elif data_type == "integer":
-            case_insensitive_enum_options = {
-                option.lower(): num for option, num in enum_options.items()
-            }
-            if val.lower() in case_insensitive_enum_options:
-                enum_index = case_insensitive_enum_options[val.lower()]
-                return (enum_index, True)
-        else:
-            case_insensitive_enum_options = [option.lower() for option in enum_options]
-            if val.lower() in case_insensitive_enum_options:
-                idx = case_insensitive_enum_options.index(val.lower())
-                return (enum_options[idx], True)
+        if val in plan.mapped_values:
+            return (plan.mapped_values[val], True)
+
+        if val.lower() in plan.case_insensitive_enum_options:
+            return (plan.case_insensitive_enum_options[val.lower()], True)
 
         invalid_reason = f"{val} is not in field mapping or valid value set"
 
         # If field is boolean, include list of valid boolean values.
         if data_type == "boolean":
-            invalid_reason += f" ({str(enum_options)})"
+            invalid_reason += f" ({str(plan.enum_options)})"
 
         return self._report_invalid_value(
             value_identifier, invalid_reason, suppress_invalid
         )
 
-    def _transform_soc(self, val, field, value_identifier, suppress_invalid=False):
+    def _transform_soc(self, val, plan, value_identifier, suppress_invalid=False):
         """Remove numbers after decimal point from SOC value.
 
         Doesn't check regex here, since pattern matching is done in cast_val.
@@ -188,7 +420,7 @@ class DataProcessor:
                 value_identifier, invalid_reason, suppress_invalid
             )
 
-    def _transform_state(self, val, field, value_identifier, suppress_invalid=False):
+    def _transform_state(self, val, plan, value_identifier, suppress_invalid=False):
         """Transforms state to two-letter abbreviation.
 
         The states lookup can handle full state names, abbreviations, and some misspellings.
@@ -197,16 +429,16 @@ class DataProcessor:
         Returns tuple of state abbreviation and bool indicating if the input value is valid.
         If input value is not valid, returns BLANK_VALUE instead of state abbreviation.
         """
-        s = us.states.lookup(str(val).strip())
+        abbr = states.lookup_abbr(str(val).strip())
         return (
-            (s.abbr, True)
-            if s
+            (abbr, True)
+            if abbr
             else self._report_invalid_value(
                 value_identifier, f"{val} is not a valid state", suppress_invalid
             )
         )
 
-    def _transform_int(self, val, field, value_identifier, suppress_invalid=False):
+    def _transform_int(self, val, plan, value_identifier, suppress_invalid=False):
         """Transforms integer.
 
         Returns tuple of int value and bool indicating if the input value is valid.
@@ -219,68 +451,47 @@ class DataProcessor:
                 value_identifier, f"{val} is not an integer", suppress_invalid
             )
 
-    def _cast_val(self, value, field, value_identifier, suppress_invalid=False):
+    def _cast_val(self, value, plan, value_identifier, suppress_invalid=False):
         """Cast value to proper type using schema.
 
         Returns tuple of casted value and bool indicating if the input value is valid.
         If input value is not valid, returns BLANK_VALUE instead of casted value.
         """
-        try:
-            return (field.cast_value(value, constraints=True), True)
-        except exceptions.CastError as e:
-            return self._report_invalid_value(
-                value_identifier,
-                self._parse_cast_error(e, value, field),
-                suppress_invalid,
-            )
+        cast_value, reason_code = casters.cast_value(plan, value)
+        if reason_code is None:
+            return (cast_value, True)
 
-    def _parse_cast_error(self, e, value, field):
-        error_message = str(e)
-        if "maximum" in error_message or "minimum" in error_message:
-            if "maximum" in field.constraints and "minimum" in field.constraints:
-                return "{} must be within the range [{}, {}]".format(
-                    field.name,
-                    str(field.constraints["minimum"]),
-                    str(field.constraints["maximum"]),
-                )
-            elif "maximum" in field.constraints:
-                return "{} must be less than or equal to {}".format(
-                    field.name, str(field.constraints["maximum"])
-                )
-            elif "minimum" in field.constraints:
-                return "{} must be greater than or equal to {}".format(
-                    field.name, str(field.constraints["minimum"])
-                )
-        elif '"date"' in error_message:
-            return f"{str(value)} is not a valid date"
-        elif field.name == "SOC":
-            return "SOC should be in the format ##-####"
-
-        return f"{str(value)} is not a valid {field.type}"
+        return self._report_invalid_value(
+            value_identifier,
+            casters.reason_message(reason_code, value, plan.field),
+            suppress_invalid,
+        )
 
-    def _apply_multiple(self, function, values, field, value_identifier):
+    def _apply_multiple(
+        self, function, values, plan, value_identifier, suppress_invalid=False
+    ):
         """Applies a function to each value in a multiple value cell.
 
         The cell is considered invalid if the input is not a list, or any value in the list is invalid.
 
-        Returns the list of values with function applied.
-        If list is empty or input is not valid, returns BLANK_VALUE.
+        Returns tuple of the list of values with function applied and bool indicating if the cell is valid.
+        If list is empty or input is not valid, returns BLANK_VALUE instead of the list.
         """
         if np.isscalar(values):
             return self._report_invalid_value(
-                value_identifier, f"{str(values)} is not a list", False
-            )[0]
+                value_identifier, f"{str(values)} is not a list", suppress_invalid
+            )
 
         transformed_tuples = [
             (BLANK_VALUE, True)
             if is_blank(value)
-            else function(value, field, value_identifier, suppress_invalid=True)
+            else function(value, plan, value_identifier, suppress_invalid=True)
             for value in values
         ]
 
         # If a single value in the cell is invalid, then drop the entire cell.
         if not all(map(lambda t: t[1], transformed_tuples)):
-            return self._report_invalid_value(value_identifier, None, False)[0]
+            return self._report_invalid_value(value_identifier, None, suppress_invalid)
 
         # Get transformed values and filter out blank values.
         transformed_vals = map(lambda t: t[0], transformed_tuples)
@@ -289,155 +500,473 @@ class DataProcessor:
         )
 
         # If the list is empty, return BLANK_VALUE instead.
-        return non_missing_vals if non_missing_vals else BLANK_VALUE
+        return (non_missing_vals if non_missing_vals else BLANK_VALUE, True)
 
-    def _apply_function(self, data_column, function, field, value_identifiers):
+    def _apply_function(self, values, function, plan):
         """Applies a function to a given field/column in the dataframe.
 
-        Returns the column with the function applied and invalid values replaced with BLANK_VALUE.
+        Returns the column with the function applied and invalid values replaced with
+        BLANK_VALUE, and a Series of reasons for the invalid values.
         """
-        data_iterator = pd.concat([data_column, value_identifiers], axis=1).itertuples()
+        if plan.allows_multiple:
+            function = partial(self._apply_multiple, function)
+
+        result = []
+        reasons = {}
+        for position, value in enumerate(values):
+            if is_blank(value):
+                result.append(BLANK_VALUE)
+                continue
+
+            value_identifier = {}
+            transformed, is_valid = function(
+                value, plan, value_identifier, suppress_invalid=True
+            )
+            result.append(transformed)
+            if not is_valid:
+                reasons[position] = value_identifier.get(INVALID_REASON_KEY)
 
-        allows_multiple = (
-            "allows_multiple" in field.descriptor.keys()
-            and field.descriptor["allows_multiple"]
-        )
+        return pd.Series(result, dtype="object"), pd.Series(reasons, dtype="object")
 
-        if allows_multiple:
-            return pd.Series(
-                [
-                    BLANK_VALUE
-                    if is_blank(value)
-                    else self._apply_multiple(function, value, field, value_identifier)
-                    for _, value, value_identifier in data_iterator
-                ],
-                dtype="object",
-            )
+    def _get_transform_func(self, plan: FieldPlan):
+        """Returns the per-cell function used to transform a field, if any."""
+        if plan.transform is None:
+            return None
+        return types.MethodType(plan.transform, self)
 
-        else:
-            return pd.Series(
-                [
-                    BLANK_VALUE
-                    if is_blank(value)
-                    else function(value, field, value_identifier)[0]
-                    for _, value, value_identifier in data_iterator
-                ],
-                dtype="object",
+    def _process_column(self, df, column_name):
+        """Transforms, validates, and casts a column in the dataframe.
+
+        Any invalid values will be dropped during transformation/casting.
+        """
+        plan: FieldPlan = self.field_plans[column_name]
+
+        # Transform values that need transformations, then cast values using Schema Field.
+        transform_func = self._get_transform_func(plan)
+        functions = [self._cast_val]
+        if transform_func is not None:
+            functions.insert(0, transform_func)
+
+        if categorical.is_categorical(df[column_name]) and not plan.allows_multiple:
+            self._process_categorical_column(df, column_name, functions)
+            return
+
+        original_values = pd.Series(df[column_name].to_numpy(dtype=object))
+        values = original_values
+        for function in functions:
+            if self.engine == CELL_ENGINE:
+                values, reasons = self._apply_function(values, function, plan)
+            else:
+                values, reasons = self._apply_column_function(
+                    values, self._get_column_function(function), plan
+                )
+            self._report_invalid_column(df, column_name, original_values, reasons)
+
+        df[column_name] = pd.Series(values.to_numpy(), index=df.index, dtype="object")
+
+    def _process_categorical_column(self, df, column_name, functions):
+        """Version of _process_column for categorical columns.
+
+        The functions are applied to the categories instead of the rows, and the
+        column stays categorical. Invalid categories are reported for every row
+        that has them.
+        """
+        plan: FieldPlan = self.field_plans[column_name]
+        column = df[column_name]
+        codes = column.cat.codes.to_numpy()
+        # Number of rows with each category.
+        counts = np.bincount(codes[codes >= 0], minlength=len(column.cat.categories))
+        original_values = pd.Series(column.array)
+
+        values = pd.Series(column.cat.categories.to_numpy(dtype=object))
+        for function in functions:
+            if self.engine == CELL_ENGINE:
+                transformed, reasons = self._apply_function(values, function, plan)
+            else:
+                # Categories are already distinct, so the factorized engine uses the
+                # vectorized functions too.
+                transformed, reasons = self._apply_column_function(
+                    values, self.column_functions[function], plan
+                )
+
+            invalid_categories = reasons.index.to_numpy(dtype=np.intp)
+            invalid = np.zeros(len(values), dtype=bool)
+            invalid[invalid_categories] = True
+            if self.engine == FACTORIZED_ENGINE:
+                invalid_value_counts = self.invalid_value_counts.setdefault(
+                    plan.name, {}
+                )
+                for i in np.flatnonzero(invalid):
+                    invalid_value_counts[values.iat[i]] = invalid_value_counts.get(
+                        values.iat[i], 0
+                    ) + int(counts[i])
+
+            # Report the reasons of the invalid categories for each of their rows.
+            category_reasons = np.full(len(values), None, dtype=object)
+            category_reasons[invalid_categories] = reasons.to_numpy(dtype=object)
+            positions = np.flatnonzero((codes >= 0) & invalid[codes])
+            self._report_invalid_column(
+                df,
+                column_name,
+                original_values,
+                pd.Series(category_reasons[codes[positions]], index=positions),
             )
+            values = transformed
+
+        df[column_name] = categorical.recode(column, values.to_numpy(dtype=object))
 
-    def _create_value_identifiers(self, data, column_name):
-        """Create identifiers for each value.
+    def _finish_column(self, function, values, plan, result, accepted):
+        """Runs the per-cell function over the values that a vectorized function
+        did not accept.
 
-        Used for reporting invalid values.
+        The vectorized functions only accept values that they can transform
+        exactly like the per-cell function would. Everything else, including
+        every invalid value, goes through the per-cell function, so that results
+        and invalid reasons match the cell engine.
 
-        Identifiers include the case number, field name, milestone flag, and
-        original value of the given column pre-transformation.
+        Returns a tuple with the transformed values and a Series of invalid
+        reasons, both indexed like the input values.
         """
-        return pd.Series(
-            [
-                {
-                    CASE_NUMBER_KEY: case_number,
-                    FIELD_NAME_KEY: column_name,
-                    MILESTONE_FLAG_KEY: milestone_flag,
-                    ORIGINAL_VALUE_KEY: original_value,
-                }
-                for _, case_number, milestone_flag, original_value in data[
-                    ["CaseNumber", "MilestoneFlag", column_name]
-                ].itertuples()
-            ],
-            dtype="object",
+        reasons = {}
+        for i in np.flatnonzero(~accepted):
+            value_identifier = {}
+            result[i], is_valid = function(
+                values.iat[i], plan, value_identifier, suppress_invalid=True
+            )
+            if not is_valid:
+                reasons[values.index[i]] = value_identifier.get(INVALID_REASON_KEY)
+
+        return (
+            pd.Series(result, index=values.index, dtype="object"),
+            pd.Series(reasons, dtype="object"),
         )
 
-    def _process_column(self, df, column_name):
-        """Transforms, validates, and casts a column in the dataframe.
+    def _apply_distinct(self, function, values, plan):
+        """Applies a per-cell function once per distinct value of a column.
 
-        Any invalid values will be dropped during transformation/casting.
+        Values are grouped by type as well as by value, since the per-cell
+        functions treat equal values of different types (e.g. 1 and True)
+        differently. Results and invalid reasons are broadcast back to every
+        occurrence of the value.
+
+        Returns a tuple with the transformed values and a Series of invalid
+        reasons, both indexed like the input values.
         """
+        result = np.empty(len(values), dtype=object)
+        reasons = np.full(len(values), None, dtype=object)
+        is_valid = np.ones(len(values), dtype=bool)
+        invalid_value_counts = self.invalid_value_counts.setdefault(plan.name, {})
+
+        if pd.api.types.infer_dtype(values, skipna=False) == "string":
+            type_codes, types = np.zeros(len(values), dtype=np.intp), [str]
+        else:
+            type_codes, types = pd.factorize(values.map(type))
+
+        for type_code, value_type in enumerate(types):
+            positions = np.flatnonzero(type_codes == type_code)
+            if value_type.__hash__ is None:
+                # Unhashable values can't be factorized, so each one is distinct.
+                codes = np.arange(len(positions))
+                uniques = values.iloc[positions].to_numpy(dtype=object)
+            else:
+                codes, uniques = pd.factorize(
+                    values.iloc[positions].to_numpy(dtype=object)
+                )
+                uniques = np.asarray(uniques, dtype=object)
+
+                # Values that pandas considers missing (e.g. pd.NaT) aren't
+                # factorized, so treat each of them as distinct.
+                missing = np.flatnonzero(codes < 0)
+                if len(missing):
+                    codes[missing] = len(uniques) + np.arange(len(missing))
+                    uniques = np.concatenate(
+                        [
+                            uniques,
+                            values.iloc[positions[missing]].to_numpy(dtype=object),
+                        ]
+                    )
+
+            unique_results = np.empty(len(uniques), dtype=object)
+            unique_reasons = np.full(len(uniques), None, dtype=object)
+            unique_is_valid = np.ones(len(uniques), dtype=bool)
+            for i, val in enumerate(uniques):
+                value_identifier = {}
+                unique_results[i], unique_is_valid[i] = function(
+                    val, plan, value_identifier, suppress_invalid=True
+                )
+                unique_reasons[i] = value_identifier.get(INVALID_REASON_KEY)
 
-        field: Field = self.table_schema.get_field(column_name)
+            result[positions] = unique_results[codes]
+            reasons[positions] = unique_reasons[codes]
+            is_valid[positions] = unique_is_valid[codes]
 
-        data_type = field.type
-        is_enum: bool = (
-            "enum" in field.constraints.keys()
-            or "enum_mapping" in field.descriptor.keys()
+            counts = np.bincount(codes, minlength=len(uniques))
+            for i in np.flatnonzero(~unique_is_valid):
+                invalid_value_counts[uniques[i]] = invalid_value_counts.get(
+                    uniques[i], 0
+                ) + int(counts[i])
+
+        return (
+            pd.Series(result, index=values.index, dtype="object"),
+            pd.Series(
+                reasons[~is_valid], index=values.index[~is_valid], dtype="object"
+            ),
         )
 
-        value_identifiers = self._create_value_identifiers(df, column_name)
+    def _get_column_function(self, function):
+        """Returns the function that applies a per-cell function to a whole column."""
+        if self.engine == FACTORIZED_ENGINE:
+            return partial(self._apply_distinct, function)
+        return self.column_functions[function]
+
+    def _transform_enum_column(self, values, plan):
+        """Vectorized version of _transform_enum."""
+        data_type = plan.type
+        result = np.empty(len(values), dtype=object)
+        accepted = np.zeros(len(values), dtype=bool)
+
+        positions = np.flatnonzero(string_mask(values))
+        keys = pd.Series(values.to_numpy(dtype=object)[positions], dtype="object")
+
+        if data_type in ("boolean", "integer"):
+            nums = to_float(keys)
+            ints = int_mask(nums)
+            int_values = nums[ints].astype(np.int64)
+            if data_type == "boolean":
+                # If the value is "1.0" or "2.0", make sure the decimals and 0 are stripped.
+                keys[ints] = int_values.astype(str).astype(object)
+            else:
+                # Integer enums that are already integers don't need to be looked up.
+                result[positions[ints]] = int_values.astype(object)
+                accepted[positions[ints]] = True
+
+            # Integers that don't fit in an int64 are left to the per-cell function.
+            remaining = ~(np.isfinite(nums) & (np.abs(nums) >= MAX_INT64_FLOAT))
+            if data_type == "integer":
+                remaining &= ~ints
+            positions, keys = positions[remaining], keys[remaining]
+
+        found, found_values = lookup(keys, plan.mapped_values)
+        result[positions[found]] = found_values
+        accepted[positions[found]] = True
+        positions, keys = positions[~found], keys[~found]
+
+        found, found_values = lookup(
+            keys.str.lower(), plan.case_insensitive_enum_options
+        )
+        result[positions[found]] = found_values
+        accepted[positions[found]] = True
 
-        # Transform values that need transformations.
-        transform_func = None
+        return self._finish_column(self._transform_enum, values, plan, result, accepted)
 
-        if is_enum or data_type == "boolean":
-            transform_func = self._transform_enum
-        elif column_name == "SOC":
-            transform_func = self._transform_soc
-        elif column_name == "State":
-            transform_func = self._transform_state
-        elif data_type == "integer":
-            transform_func = self._transform_int
+    def _transform_soc_column(self, values, plan):
+        """Vectorized version of _transform_soc."""
+        result = np.empty(len(values), dtype=object)
+        accepted = string_mask(values)
+        result[accepted] = (
+            values[accepted].str.strip().str.split(".").str[0].to_numpy(dtype=object)
+        )
 
-        if transform_func is not None:
-            df[column_name] = self._apply_function(
-                df[column_name], transform_func, field, value_identifiers
+        return self._finish_column(self._transform_soc, values, plan, result, accepted)
+
+    def _transform_state_column(self, values, plan):
+        """Vectorized version of _transform_state.
+
+        Each distinct value is only looked up once.
+        """
+        result = np.empty(len(values), dtype=object)
+        keys = values.astype(str).str.strip()
+
+        found, found_values = lookup(keys, states.lookup_abbrs(keys.unique()))
+        result[found] = found_values
+
+        return self._finish_column(self._transform_state, values, plan, result, found)
+
+    def _transform_int_column(self, values, plan):
+        """Vectorized version of _transform_int."""
+        result = np.empty(len(values), dtype=object)
+        accepted = np.zeros(len(values), dtype=bool)
+
+        positions = np.flatnonzero(string_mask(values))
+        nums = to_float(values.iloc[positions])
+        ints = int_mask(nums)
+        result[positions[ints]] = nums[ints].astype(np.int64).astype(object)
+        accepted[positions[ints]] = True
+
+        return self._finish_column(self._transform_int, values, plan, result, accepted)
+
+    def _cast_column(self, values, plan):
+        """Vectorized version of _cast_val."""
+        result, reason_codes = casters.cast_column(plan, values, self.member_id)
+        invalid = np.flatnonzero(pd.notnull(reason_codes))
+        reasons = [
+            casters.reason_message(reason_codes[i], values.iat[i], plan.field)
+            for i in invalid
+        ]
+        return (
+            pd.Series(result, index=values.index, dtype="object"),
+            pd.Series(reasons, index=values.index[invalid], dtype="object"),
+        )
+
+    def _apply_multiple_column(self, function, values, plan):
+        """Vectorized version of _apply_multiple.
+
+        Flattens all lists in the column so that the function is applied to all
+        values at once, then regroups the values by cell.
+        """
+        scalars = np.fromiter(
+            (np.isscalar(val) for val in values), dtype=bool, count=len(values)
+        )
+        reasons = {
+            label: f"{str(val)} is not a list" for label, val in values[scalars].items()
+        }
+
+        lists = values[~scalars]
+        lengths = np.fromiter((len(l) for l in lists), dtype=np.intp, count=len(lists))
+        owners = np.repeat(np.arange(len(lists)), lengths)
+        items = pd.Series(list(itertools.chain.from_iterable(lists)), dtype="object")
+
+        item_values = np.full(len(items), BLANK_VALUE, dtype=object)
+        present = np.flatnonzero(~blank_mask(items))
+        transformed, item_reasons = function(items.iloc[present], plan)
+        item_values[present] = transformed.to_numpy(dtype=object)
+
+        # If a single value in the cell is invalid, then drop the entire cell, and
+        # report the reason for the first invalid value.
+        invalid_owners = owners[item_reasons.index.to_numpy(dtype=np.intp)]
+        first = ~pd.Index(invalid_owners).duplicated()
+        for owner, reason in zip(invalid_owners[first], item_reasons.to_numpy()[first]):
+            reasons[lists.index[owner]] = reason
+        invalid = np.zeros(len(lists), dtype=bool)
+        invalid[invalid_owners] = True
+
+        # Regroup the non-missing values by cell. If the list is empty, use BLANK_VALUE instead.
+        kept = ~invalid[owners] & (item_values != BLANK_VALUE)
+        counts = np.bincount(owners[kept], minlength=len(lists))
+        groups = np.split(item_values[kept], np.cumsum(counts)[:-1])
+        regrouped = np.full(len(lists), BLANK_VALUE, dtype=object)
+        for i in np.flatnonzero(~invalid & (counts > 0)):
+            regrouped[i] = groups[i].tolist()
+
+        result = np.full(len(values), BLANK_VALUE, dtype=object)
+        result[~scalars] = regrouped
+        return (
+            pd.Series(result, index=values.index, dtype="object"),
+            pd.Series(reasons, dtype="object").sort_index(),
+        )
+
+    def _apply_column_function(self, values, function, plan):
+        """Vectorized version of _apply_function.
+
+        Returns the transformed column and a Series of reasons for the invalid values.
+        """
+        result = np.full(len(values), BLANK_VALUE, dtype=object)
+        present = np.flatnonzero(~blank_mask(values))
+
+        if plan.allows_multiple:
+            transformed, reasons = self._apply_multiple_column(
+                function, values.iloc[present], plan
             )
+        else:
+            transformed, reasons = function(values.iloc[present], plan)
 
-        # Cast values using Schema Field.
-        df[column_name] = pd.Series(
-            self._apply_function(
-                df[column_name], self._cast_val, field, value_identifiers
-            ),
-            dtype="object",
+        result[present] = transformed.to_numpy(dtype=object)
+        return pd.Series(result, dtype="object"), reasons
+
+    def _report_invalid_column(self, df, column_name, original_values, reasons):
+        """Reports the invalid values of a column.
+
+        Only the invalid values are recorded in invalid_values, so no value
+        identifiers are created for the valid ones.
+        """
+        if reasons.empty:
+            return
+
+        positions = reasons.index.to_numpy(dtype=np.intp)
+        case_numbers = df["CaseNumber"].take(positions).to_numpy(dtype=object)
+        milestone_flags = df["MilestoneFlag"].take(positions).to_numpy(dtype=object)
+        original_values = original_values.take(positions).to_numpy(dtype=object)
+        reasons = reasons.to_numpy(dtype=object)
+
+        if self.invalid_value_logging == AGGREGATED_LOGGING:
+            self._log_invalid_column(column_name, case_numbers, reasons)
+        else:
+            for case_number, milestone_flag, original_value, reason in zip(
+                case_numbers, milestone_flags, original_values, reasons
+            ):
+                self._log_invalid_value(
+                    case_number, milestone_flag, column_name, original_value, reason
+                )
+        self.invalid_values.record(
+            column_name,
+            positions,
+            case_numbers,
+            milestone_flags,
+            original_values,
+            reasons,
         )
 
-    def _get_invalid_required_fields(self, row, required_fields):
-        """Returns all required fields that are missing in a row."""
-        return [f for f in required_fields if row[f] is BLANK_VALUE]
+    def _log_invalid_column(self, column_name, case_numbers, reasons):
+        """Logs a summary of the invalid values of a column, with the number of
+        invalid values for each of the most common reasons, and a sample of
+        their case numbers."""
+        reasons = pd.Series(reasons, dtype="object")
+        reason_counts = reasons.value_counts(dropna=False)
+
+        summary = []
+        top_reason_counts = reason_counts.iloc[:INVALID_VALUE_LOG_MAX_REASONS]
+        for reason, count in top_reason_counts.items():
+            has_reason = reasons.isnull() if pd.isnull(reason) else reasons == reason
+            sample = case_numbers[has_reason.to_numpy()]
+            sample = sample[:INVALID_VALUE_LOG_SAMPLE_SIZE]
+            summary.append(
+                f"{count} x {reason} (Case Numbers: {', '.join(map(str, sample))})"
+            )
+        if len(reason_counts) > INVALID_VALUE_LOG_MAX_REASONS:
+            summary.append(
+                f"{len(reason_counts) - INVALID_VALUE_LOG_MAX_REASONS} more reasons"
+            )
+
+        logging.error(
+            "%d invalid values for %s:\n\t%s",
+            len(reasons),
+            column_name,
+            "\n\t".join(summary),
+        )
 
     def _drop_duplicates(self, dataset):
-        """Returns a DataFrame with duplicate records removed and a DataFrame with the first instance of
-        each duplicate record.
+        """Returns a DataFrame with duplicate records removed, a DataFrame with every
+        instance of each duplicate record, and the size of each group of duplicates.
 
         GII defines 'duplicate' as records with the same CaseNumber, MilestoneFlag, and MemberOrganization.
         """
         logging.info(f"Length of dataset *before* dedupe: {dataset.shape[0]}")
 
-        dataset_deduped = dataset.drop_duplicates(
-            keep=False, subset=["CaseNumber", "MilestoneFlag", "MemberOrganization"]
-        ).reset_index(drop=True)
-
-        dropped_rows = dataset[
-            dataset.duplicated(
-                keep=False, subset=["CaseNumber", "MilestoneFlag", "MemberOrganization"]
-            )
-        ].reset_index(drop=True)
+        keep, duplicate_group_sizes = find_duplicates(dataset, DUPLICATE_KEY_FIELDS)
+        # Select the rows with take and replace their index, instead of copying
+        # them again with reset_index. If there are no duplicates, nothing is copied.
+        if keep.all():
+            dataset_deduped = dataset
+        else:
+            dataset_deduped = dataset.take(np.flatnonzero(keep))
+            dataset_deduped.index = pd.RangeIndex(len(dataset_deduped))
+        dropped_rows = dataset.take(np.flatnonzero(~keep))
+        dropped_rows.index = pd.RangeIndex(len(dropped_rows))
 
         logging.info(f"Length of dataset *after* dedupe: {dataset_deduped.shape[0]}")
 
-        return dataset_deduped, dropped_rows
+        return dataset_deduped, dropped_rows, duplicate_group_sizes
 
-    def process(self, dataset):
-        """Transforms and validates the entire Dataframe.
-        Expects dataframe to contain all required columns and no columns outside of the
-        schema.
+    def _get_required_fields(self):
+        return self.schema_index.required_field_names
 
-        Drops cells if they don't have a valid value.
-        Drops rows if they don't have a valid value for a required value.
+    def _process_required_columns(self, dataset, df, required_fields):
+        """Processes the required columns of df, then drops the rows where a
+        required value is missing or invalid, and records them.
 
-        Returns a tuple with:
-          - Transformed dataframe
-          - List of tuples of invalid values
-            - Each tuple includes the invalid value, the field name of the value, and row identifier.
-          - List of tuples of dropped rows
-            - Each tuple includes the row and the name of the required column that had the invalid/missing value.
+        dataset holds the pre-transformed rows of df, in the same order.
+        Returns the remaining rows of df.
         """
-
-        df = dataset.copy()
-
-        required_fields = [
-            field.name for field in self.table_schema.fields if field.required
-        ]
-
-        # Process required columns.
         for column_name in required_fields:
             if column_name not in df:
                 df[column_name] = None
@@ -446,37 +975,352 @@ class DataProcessor:
 
         # Drop any rows where required columns are missing, and record dropped rows.
         # Note: If BLANK_VALUE is changed to not be None, this will break.
-        null_rows = df[df[required_fields].isnull().any(axis=1)]
-        df = df.dropna(subset=required_fields).reset_index(drop=True)
-        for ind, new_row in null_rows.iterrows():
-            # Get all invalid required fields for this row.
-            missing_fields = self._get_invalid_required_fields(new_row, required_fields)
-
-            # Log and record the pre-transformed row.
-            row = dataset.loc[ind]
+        missing = df[required_fields].isnull().to_numpy()
+        null_rows = missing.any(axis=1)
+        missing = missing[null_rows]
+        dropped_rows = dataset.take(np.flatnonzero(null_rows))
+        if len(dropped_rows):
+            self._log_missing_fields(dropped_rows, required_fields, missing)
+        # Record the pre-transformed rows.
+        self.dropped_rows.record_missing_fields(dropped_rows, required_fields, missing)
+
+        if not len(dropped_rows):
+            return df
+        return df.take(np.flatnonzero(~null_rows))
+
+    def _log_missing_fields(self, dropped_rows, required_fields, missing):
+        """Logs how many rows were dropped for each missing required field, and
+        the pre-transformed values of a sample of the dropped rows."""
+        num_missing = missing.sum(axis=0)
+        logging.error(
+            "Dropping %d rows due to invalid/missing values for critical fields:\n\t%s",
+            len(dropped_rows),
+            {
+                col: int(count)
+                for col, count in zip(required_fields, num_missing)
+                if count
+            },
+        )
+
+        sample_size = min(len(dropped_rows), DROPPED_ROWS_LOG_SAMPLE_SIZE)
+        for i in range(sample_size):
             logging.error(
                 "Dropping row %d due to invalid/missing value for critical field(s):\n\t%s",
-                ind,
+                dropped_rows.index[i],
                 {
-                    col: dataset.loc[ind, col] if col in dataset else None
-                    for col in missing_fields
+                    col: dropped_rows[col].iat[i] if col in dropped_rows else None
+                    for col, is_missing in zip(required_fields, missing[i])
+                    if is_missing
                 },
             )
-            self.dropped_rows.append({ROW_KEY: row, MISSING_FIELDS_KEY: missing_fields})
+        if len(dropped_rows) > sample_size:
+            logging.error(
+                "%d more rows were dropped due to invalid/missing values for critical fields",
+                len(dropped_rows) - sample_size,
+            )
 
-        # Drop duplicates, and record dropped rows.
-        df, dropped_duplicate_rows = self._drop_duplicates(df)
-        for ind, dropped_row in dropped_duplicate_rows.iterrows():
+    def _log_duplicate_groups(self, duplicate_group_sizes):
+        for (case_number, _, _), size in duplicate_group_sizes.items():
             logging.error(
-                f"Dropping row with CaseNumber {dropped_row['CaseNumber']} due to duplicate values in the uploaded file"
+                f"Dropping {size} rows with CaseNumber {case_number} due to duplicate values in the uploaded file"
             )
-            self.dropped_rows.append({ROW_KEY: dropped_row, DUPLICATE_ROWS_KEY: True})
 
-        # Process the non-required columns.
-        non_required_columns = (
-            set(df.columns) & set(self.table_schema.field_names)
-        ) - set(required_fields)
-        for column_name in non_required_columns:
-            self._process_column(df, column_name)
+    def _process_non_required_columns(self, df, required_fields, executor):
+        # Process the non-required columns, in the order they appear in the dataset.
+        required_fields = set(required_fields)
+        non_required_columns = [
+            column_name
+            for column_name in df.columns
+            if column_name in self.schema_index.fields
+            and column_name not in required_fields
+        ]
+        if executor is not None and len(non_required_columns) > 1:
+            self._process_columns_in_parallel(df, non_required_columns, executor)
+        else:
+            self._process_columns(df, non_required_columns)
+
+    @contextlib.contextmanager
+    def _worker_pool(self):
+        """Yields the pool of worker processes that non-required columns are
+        processed in, or None if they are processed serially.
+
+        A pool is used for a whole dataset, so that the workers are only started,
+        and sent the field mappings and the schema, once for all its chunks.
+        """
+        if self.num_workers <= 1:
+            yield None
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_worker,
+            initargs=(
+                self.field_mappings,
+                self.table_schema,
+                self.engine,
+                self.member_id,
+                self.invalid_value_logging,
+            ),
+        ) as executor:
+            yield executor
+
+    def process(self, dataset):
+        """Transforms and validates the entire Dataframe.
+        Expects dataframe to contain all required columns and no columns outside of the
+        schema.
+
+        Drops cells if they don't have a valid value.
+        Drops rows if they don't have a valid value for a required value.
+
+        Returns a tuple with:
+          - Transformed dataframe
+          - InvalidValueLedger of invalid values
+            - Each entry includes the invalid value, the field name of the value, and row identifier.
+          - DroppedRowLedger of dropped rows
+            - Each entry includes the row and the name of the required column that had the invalid/missing value.
+        """
+
+        required_fields = self._get_required_fields()
+
+        # Process required columns, and drop rows where they are missing.
+        if self.low_copy:
+            df = self._process_required_columns_low_copy(dataset, required_fields)
+        else:
+            df = dataset.copy()
+            df = self._process_required_columns(dataset, df, required_fields)
+            df = df.reset_index(drop=True)
+
+        # Drop duplicates, and record dropped rows.
+        df, dropped_duplicate_rows, duplicate_group_sizes = self._drop_duplicates(df)
+        self._log_duplicate_groups(duplicate_group_sizes)
+        self.dropped_rows.record(dropped_duplicate_rows, DUPLICATE_ROWS_KEY)
+
+        with self._worker_pool() as executor:
+            self._process_non_required_columns(df, required_fields, executor)
 
         return df, self.invalid_values, self.dropped_rows
+
+    def _process_required_columns_low_copy(self, dataset, required_fields):
+        """Low-copy version of the processing of the required columns in process.
+
+        Only the required columns are copied and processed, like in
+        process_in_chunks. If no rows are dropped, their processed values are
+        written back to the dataset itself, which the rest of process then
+        transforms in place. Otherwise, only the remaining rows are copied.
+        """
+        required_df = dataset[
+            [column_name for column_name in required_fields if column_name in dataset]
+        ]
+        required_df = self._process_required_columns(
+            dataset, required_df.reset_index(drop=True), required_fields
+        )
+
+        if len(required_df) == len(dataset):
+            df = dataset
+        else:
+            df = dataset.take(required_df.index.to_numpy())
+        # The index is only reset once, here, and isn't copied.
+        df.index = pd.RangeIndex(len(df))
+        for column_name in required_fields:
+            df[column_name] = required_df[column_name].array
+        return df
+
+    def process_in_chunks(
+        self,
+        dataset: typing.Union[
+            pd.DataFrame, typing.Callable[[], typing.Iterable[pd.DataFrame]]
+        ],
+        chunk_size: int = CHUNK_SIZE,
+    ) -> typing.Iterator[pd.DataFrame]:
+        """Streaming version of process.
+
+        Transforms and validates the dataset one chunk at a time, and yields each
+        processed chunk. Concatenating the chunks gives the same dataframe as
+        process, but only one chunk is copied and transformed at a time.
+
+        The dataset is either a dataframe, which is split into chunks of
+        chunk_size rows, or a function that returns the chunks of the dataset,
+        such as `lambda: pd.read_csv(filename, chunksize=chunk_size)`. The
+        function is called once per pass, and must return the same chunks each
+        time. A dataframe is already in memory, so with a dataframe only the
+        working copy is bounded to one chunk; with a function, the dataset itself
+        is never in memory at once.
+
+        The rows are read twice. The first pass processes the required columns and
+        counts the duplicate keys (CaseNumber, MilestoneFlag, MemberOrganization)
+        of the rows that are kept, so that every instance of a duplicate record is
+        dropped, even if the instances are in different chunks. Only the required
+        columns are kept in memory between the passes.
+
+        invalid_values and dropped_rows are complete once all chunks have been
+        yielded. They hold the same values and rows as after process, but invalid
+        values are reported chunk by chunk.
+        """
+        if isinstance(dataset, pd.DataFrame):
+            get_chunks = partial(_split_into_chunks, dataset, chunk_size)
+        else:
+            get_chunks = dataset
+        required_fields = self._get_required_fields()
+
+        # Process the required columns, and count the keys of the rows that are kept.
+        key_counts = collections.Counter()
+        required_chunks = []
+        for chunk in get_chunks():
+            df = chunk[
+                [column_name for column_name in required_fields if column_name in chunk]
+            ]
+            df = self._process_required_columns(
+                chunk, df.reset_index(drop=True), required_fields
+            )
+            key_counts.update(zip(*(df[key] for key in DUPLICATE_KEY_FIELDS)))
+            required_chunks.append(df)
+
+        num_rows = sum(len(df) for df in required_chunks)
+        num_duplicates = sum(count for count in key_counts.values() if count > 1)
+        logging.info(f"Length of dataset *before* dedupe: {num_rows}")
+        logging.info(f"Length of dataset *after* dedupe: {num_rows - num_duplicates}")
+        self._log_duplicate_groups(
+            pd.Series(
+                {key: count for key, count in key_counts.items() if count > 1},
+                dtype=np.int64,
+            )
+        )
+
+        # Drop duplicates and process the non-required columns of each chunk,
+        # in the same worker pool.
+        with self._worker_pool() as executor:
+            num_output_rows = num_dropped_rows = 0
+            for i, chunk in enumerate(get_chunks()):
+                if i >= len(required_chunks):
+                    raise ValueError("The dataset returned more chunks than before.")
+                required_df, required_chunks[i] = required_chunks[i], None
+                df = chunk.iloc[required_df.index.to_numpy()].copy()
+                for column_name in required_fields:
+                    df[column_name] = required_df[column_name].array
+
+                duplicated = np.fromiter(
+                    (
+                        key_counts[key] > 1
+                        for key in zip(*(df[key] for key in DUPLICATE_KEY_FIELDS))
+                    ),
+                    dtype=bool,
+                    count=len(df),
+                )
+                dropped_duplicate_rows = df[duplicated]
+                dropped_duplicate_rows.index = pd.RangeIndex(
+                    num_dropped_rows, num_dropped_rows + len(dropped_duplicate_rows)
+                )
+                num_dropped_rows += len(dropped_duplicate_rows)
+                self.dropped_rows.record(dropped_duplicate_rows, DUPLICATE_ROWS_KEY)
+
+                df = df[~duplicated].reset_index(drop=True)
+                df.index += num_output_rows
+                num_output_rows += len(df)
+
+                self._process_non_required_columns(df, required_fields, executor)
+                yield df
+
+            if required_chunks and required_chunks[-1] is not None:
+                raise ValueError("The dataset returned fewer chunks than before.")
+
+    def _process_columns(self, df, column_names):
+        for column_name in column_names:
+            self._process_column(df, column_name)
+
+    def _process_columns_in_parallel(self, df, column_names, executor):
+        """Processes columns in the worker pool of executor (see _worker_pool).
+
+        The columns are split into contiguous groups, and the results of each group
+        are merged in order, so the dataframe and the invalid values are the same
+        as when the columns are processed serially.
+        """
+        num_groups = min(len(column_names), self.num_workers * COLUMN_GROUPS_PER_WORKER)
+        groups = [
+            group.tolist()
+            for group in np.array_split(np.array(column_names), num_groups)
+        ]
+
+        futures = [
+            executor.submit(
+                _process_columns_in_worker,
+                df[["CaseNumber", "MilestoneFlag"] + group],
+                group,
+            )
+            for group in groups
+        ]
+
+        for future in futures:
+            columns, invalid_values, invalid_value_counts = future.result()
+            for column_name, values in columns.items():
+                df[column_name] = pd.Series(values, index=df.index)
+            self.invalid_values += invalid_values
+            self.invalid_value_counts.update(invalid_value_counts)
+
+
+def _split_into_chunks(
+    dataset: pd.DataFrame, chunk_size: int
+) -> typing.Iterator[pd.DataFrame]:
+    for start in range(0, len(dataset), chunk_size):
+        yield dataset.iloc[start : start + chunk_size]
+
+
+# Number of column groups given to each worker process by the parallel mode, so
+# that columns that are slow to process are spread across the workers.
+COLUMN_GROUPS_PER_WORKER = 4
+
+# DataProcessor used by a worker process of the parallel mode.
+_worker_processor: typing.Optional[DataProcessor] = None
+
+
+def _init_worker(
+    field_mappings,
+    table_schema: Schema,
+    engine: str,
+    member_id,
+    invalid_value_logging: str,
+):
+    """Creates the DataProcessor of a worker process, once per process."""
+    global _worker_processor
+    _worker_processor = DataProcessor(
+        field_mappings,
+        table_schema,
+        engine=engine,
+        member_id=member_id,
+        invalid_value_logging=invalid_value_logging,
+    )
+
+
+def _process_columns_in_worker(df, column_names):
+    """Processes columns of df in a worker process.
+
+    Returns the processed columns, and the invalid values and invalid value counts
+    found while processing them.
+    """
+    processor = _worker_processor
+    processor.invalid_values = InvalidValueLedger()
+    processor.invalid_value_counts = {}
+    processor._process_columns(df, column_names)
+    return (
+        {column_name: df[column_name].array for column_name in column_names},
+        processor.invalid_values,
+        processor.invalid_value_counts,
+    )
+
+
+def compile_field_plans(
+    table_schema: Schema, field_mappings
+) -> typing.Dict[str, FieldPlan]:
+    """Returns a FieldPlan for each field of the schema, keyed by field name."""
+    field_plans = {}
+    for field in table_schema.fields:
+        plan = FieldPlan(field, field_mappings.get(field.name))
+        if plan.is_enum or plan.type == "boolean":
+            plan.transform = DataProcessor._transform_enum
+        elif plan.name == "SOC":
+            plan.transform = DataProcessor._transform_soc
+        elif plan.name == "State":
+            plan.transform = DataProcessor._transform_state
+        elif plan.type == "integer":
+            plan.transform = DataProcessor._transform_int
+        field_plans[plan.name] = plan
+    return field_plans
@@ -1,59 +1,19 @@
 """Classes and methods to help transform and validate dataset shape.
 """
+import concurrent.futures
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-import great_expectations as ge
-from great_expectations.dataset import PandasDataset, Dataset
-from tableschema import Schema, Field
+from tableschema import Schema
 
-from etl.helpers import column_mapping, common, table_schema
+from etl.helpers import categorical, column_mapping, common, table_schema, validation
 
 FORCE_OVERWRITE_VALUE = "1"
 
-
-class ShapePandasDataset(PandasDataset):
-    @Dataset.expectation(["column_list"])
-    def expect_table_columns_to_be_in_set(
-        self,
-        column_list,
-        result_format=None,
-        include_config=False,
-        catch_exceptions=None,
-        meta=None,
-    ):
-        """
-        Checks if observed columns are in the set of expected columns. The
-        expectations will fail if columns are not in the expected set.
-        On failure, details are provided on the location of the unexpected
-        column(s).
-        """
-        named_columns = [col for col in self.columns if "Unnamed:" not in col]
-
-        if set(named_columns) <= set(column_list):
-            return {"success": True}
-
-        invalid_cols = sorted(list(set(named_columns) - set(column_list)))
-        return {
-            "success": False,
-            "invalid_columns": invalid_cols,
-        }
-
-    @Dataset.expectation(["column_list"])
-    def expect_named_cols(
-        self,
-        result_format=None,
-        include_config=False,
-        catch_exceptions=None,
-        meta=None,
-    ):
-
-        cols = list(set(self.columns))
-        columns_without_headers = [col[9:] for col in cols if "Unnamed" in col]
-        if not columns_without_headers:
-            return {"success": True}
-
-        return {"success": False, "columns_without_headers": columns_without_headers}
+# The great_expectations dataset class of the shape expectations. It is given by
+# name, so that great_expectations is only imported by its validation backend.
+SHAPE_DATASET_CLASS = "etl.helpers.dataset_shape_ge.ShapePandasDataset"
 
 
 class DatasetShapeValidator:
@@ -69,15 +29,14 @@ class DatasetShapeValidator:
         self.column_mapping: column_mapping.ColumnMapping = column_mapping
         self.row_format: bool = row_format
 
-    def _get_shape_expectations(self, dataset: pd.DataFrame) -> ge.dataset.Dataset:
+    def _get_shape_expectations(self, dataset: pd.DataFrame) -> validation.Dataset:
         """
         Validates dataset shape.
 
         Validations:
         - Dataset columns names are a subset of mapped column names and table_schema field names
         """
-        dataset_ge = ge.from_pandas(dataset, dataset_class=ShapePandasDataset)
-        dataset_ge.set_default_expectation_argument("result_format", "COMPLETE")
+        dataset_ge = validation.from_pandas(dataset, dataset_class=SHAPE_DATASET_CLASS)
 
         valid_field_names: List[str] = table_schema.get_valid_field_names(
             self.table_schema, self.row_format
@@ -110,60 +69,99 @@ class DatasetShapeTransformer:
         column_mapping: column_mapping.ColumnMapping,
         row_format: bool,
         multiple_val_delimiter: str = ";",
+        low_copy: bool = False,
+        strip_whitespace: bool = True,
     ):
         self.member_id: str = member_id
         self.table_schema: Schema = table_schema
         self.column_mapping: column_mapping.ColumnMapping = column_mapping
         self.row_format: bool = row_format
         self.multiple_val_delimiter: str = multiple_val_delimiter
+        # If True, datasets are renamed and transformed in place, instead of being
+        # copied, so the datasets passed to transform_dataset_shape are modified.
+        self.low_copy: bool = low_copy
+        # If False, values are not stripped of whitespace, e.g. because the
+        # datasets were read with csv_ingestion.read_csv, which strips them.
+        self.strip_whitespace: bool = strip_whitespace
 
     def _transform_column_format_to_row_format(
         self, dataset: pd.DataFrame
     ) -> pd.DataFrame:
+        """Moves the data of each milestone into its own rows.
+
+        A row is added for each milestone where the original row has values, with
+        the administrative columns of the original row, the milestone's columns
+        renamed to their row-format field names and the MilestoneFlag.
+        """
         (
             field_names_by_milestone,
             field_names_admin,
         ) = table_schema.get_column_format_fields(self.table_schema)
+        dataset_column_names = set(dataset.columns)
 
-        admin_columns = dataset[
-            list(set(field_names_admin) & set(dataset.columns.values))
-        ]
-
-        datasets = []
-
-        # For each milestone, move the data for that milestone into their own rows
+        # The milestones' columns that are in the dataset, grouped by milestone.
+        # E.g., a dataset might have 68 columns for Intake milestone data.
+        milestone_names = []
+        source_columns = []
+        field_names = []
         for milestone_name, fields_for_milestone in field_names_by_milestone.items():
-            # Get the milestone-specific columns from the local Goodwills dataset
-            # E.g., a dataset might have 68 columns for Intake milestone data.
-            # The milestone_dataset will contain those 68 columns (but not the other 300+ columns).
-            milestone_field_names = fields_for_milestone.keys()
-            milestone_dataset = dataset[
-                list(set(milestone_field_names) & set(dataset.columns.values))
+            columns = [
+                column
+                for column in fields_for_milestone
+                if column in dataset_column_names
             ]
-
-            # Drop empty rows
-            milestone_dataset = milestone_dataset.dropna(how="all")
-
-            # If, after removing all of the empty rows, the data for the milestone is empty, go to the next one
-            if milestone_dataset.empty:
+            if columns:
+                milestone_names.append(milestone_name)
+                source_columns.append(columns)
+                field_names.append([fields_for_milestone[c] for c in columns])
+
+        # Find the rows with values for each milestone. Columns are checked one
+        # at a time, since finding the missing values of a 2D object array is
+        # several times slower.
+        all_missing = np.ones((len(milestone_names), len(dataset)), dtype=bool)
+        for i, columns in enumerate(source_columns):
+            for column in columns:
+                all_missing[i] &= pd.isna(dataset[column].to_numpy())
+        # Rows of the original dataset, ordered by milestone, then by row.
+        # Milestones without any are left out.
+        milestone_positions, rows = np.nonzero(~all_missing)
+        row_counts = np.bincount(milestone_positions, minlength=len(milestone_names))
+        offsets = np.cumsum(row_counts) - row_counts
+
+        # Take the rows of each milestone in one go, and rename their columns. The
+        # dtypes of the combined columns are left to pd.concat, as before.
+        milestone_datasets = []
+        for i, columns in enumerate(source_columns):
+            if not row_counts[i]:
                 continue
-
-            # Rename column-format field names to row-format field names
-            renamed_milestone_dataset = milestone_dataset.rename(
-                mapper=fields_for_milestone, axis="columns"
+            milestone_dataset = dataset[columns].take(
+                rows[offsets[i] : offsets[i] + row_counts[i]]
             )
+            milestone_dataset.columns = field_names[i]
+            milestone_datasets.append(milestone_dataset)
+        shaped_dataset = pd.concat(milestone_datasets, ignore_index=True, sort=True)
+
+        # Join the admin columns by row instead of copying them for each milestone,
+        # and keep the columns sorted. Note that the milestone name may slightly
+        # diverge from the GII-accepted MilestoneFlag values, (i.e. "MidPoint" vs
+        # "Midpoint"), but any differences should be handled by fuzzy text
+        # matching later in the pipeline.
+        new_columns = {
+            column: dataset[column].take(rows).array
+            for column in field_names_admin
+            if column in dataset_column_names and column != "MilestoneFlag"
+        }
+        new_columns["MilestoneFlag"] = np.repeat(
+            np.array(milestone_names, dtype=object), row_counts
+        )
+        shaped_dataset = pd.concat(
+            [shaped_dataset, pd.DataFrame(new_columns, index=shaped_dataset.index)],
+            axis=1,
+            copy=False,
+        )
+        shaped_dataset = shaped_dataset[sorted(shaped_dataset.columns)]
 
-            # Add the admin columns and the MilestoneFlag column
-            milestone_dataset = pd.concat(
-                [admin_columns, renamed_milestone_dataset], axis=1, sort=False
-            )
-
-            # Note that the milestone name may slightly diverge from the GII-accepted MilestoneFlag values,
-            # (i.e. "MidPoint" vs "Midpoint"), but any differences should be handled by fuzzy text matching later in the pipeline.
-            milestone_dataset["MilestoneFlag"] = milestone_name
-            datasets.append(milestone_dataset)
-
-        return pd.concat(datasets, ignore_index=True, sort=True)
+        return shaped_dataset
 
     def _transform_shape(self, dataset: pd.DataFrame) -> pd.DataFrame:
         """
@@ -172,12 +170,18 @@ class DatasetShapeTransformer:
         """
         cols_to_drop = [
             k
-            for k, v in self.column_mapping.items()
-            if self.column_mapping[k] is None and k in dataset.columns
+            for k in column_mapping.get_dropped_column_names(self.column_mapping)
+            if k in dataset.columns
         ]
-        renamed_dataset: pd.DataFrame = dataset.drop(columns=cols_to_drop).rename(
-            mapper=self.column_mapping, axis="columns"
-        )
+        if self.low_copy:
+            if cols_to_drop:
+                dataset.drop(columns=cols_to_drop, inplace=True)
+            dataset.rename(mapper=self.column_mapping, axis="columns", inplace=True)
+            renamed_dataset = dataset
+        else:
+            renamed_dataset: pd.DataFrame = dataset.drop(columns=cols_to_drop).rename(
+                mapper=self.column_mapping, axis="columns"
+            )
 
         if self.row_format:
             return renamed_dataset
@@ -187,35 +191,93 @@ class DatasetShapeTransformer:
 
     def _transform_multiple_value_fields(self, dataset: pd.DataFrame) -> pd.DataFrame:
         """Transforms data for fields that allow multiple values into arrays."""
-        dataset_column_names = dataset.columns
-
-        fields_multiple: List[Field] = list(
-            filter(
-                lambda field: "allows_multiple" in field.descriptor.keys()
-                and field.descriptor["allows_multiple"],
-                self.table_schema.fields,
-            )
-        )
-
-        fields_multiple_in_dataset: List[Field] = list(
-            filter(lambda field: field.name in dataset_column_names, fields_multiple)
-        )
-
-        for field in fields_multiple_in_dataset:
-            dataset[field.name] = (
-                dataset[field.name]
+        allows_multiple = table_schema.get_schema_index(
+            self.table_schema
+        ).allows_multiple
+
+        for column_name in [
+            column for column in dataset.columns if column in allows_multiple
+        ]:
+            self._replace_column(
+                dataset,
+                column_name,
+                dataset[column_name]
                 .str.split(self.multiple_val_delimiter)
                 .apply(lambda x: [s.strip() for s in x])
+                .to_numpy(),
             )
 
         return dataset
 
+    def _to_strings(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """Converts all values to strings, and missing values to blank strings.
+
+        Enum and boolean fields are stored as categoricals, so only their
+        categories are converted.
+        """
+        categorical_field_names = set(
+            table_schema.get_categorical_field_names(self.table_schema)
+        )
+        categorical_columns = [
+            column for column in dataset if column in categorical_field_names
+        ]
+
+        column_names = list(dataset.columns)
+
+        # Replacing the columns one at a time would copy the other columns of
+        # the same dtype each time, so the categorical columns are converted
+        # separately and inserted back in place, which doesn't copy the others.
+        if self.low_copy:
+            categorical_values = {
+                column: categorical.strings_to_categorical(dataset[column])
+                for column in categorical_columns
+            }
+            if categorical_columns:
+                dataset.drop(columns=categorical_columns, inplace=True)
+            for column in dataset:
+                self._replace_column(
+                    dataset,
+                    column,
+                    dataset[column].fillna("").astype(str).to_numpy(dtype=object),
+                )
+            for position, column in enumerate(column_names):
+                if column in categorical_values:
+                    dataset.insert(position, column, categorical_values[column])
+            return dataset
+
+        strings = dataset.drop(columns=categorical_columns).fillna("").astype(str)
+        for position, column in enumerate(column_names):
+            if column in categorical_field_names:
+                strings.insert(
+                    position,
+                    column,
+                    categorical.strings_to_categorical(dataset[column]),
+                )
+
+        return strings
+
     def _strip_whitespace(self, dataset: pd.DataFrame):
         for column in dataset:
-            dataset[column] = dataset[column].str.strip()
+            if categorical.is_categorical(dataset[column]):
+                dataset[column] = categorical.map_categories(dataset[column], str.strip)
+            else:
+                self._replace_column(
+                    dataset, column, dataset[column].str.strip().to_numpy(dtype=object)
+                )
 
         return dataset
 
+    def _replace_column(self, dataset: pd.DataFrame, column: str, values: np.ndarray):
+        """Replaces the values of a column with an object array.
+
+        In low-copy mode, the values of object columns are overwritten in place.
+        Replacing the column would also copy the other columns stored with it.
+        """
+        if self.low_copy and dataset[column].dtype == object:
+            dataset.loc[:, column] = values
+        else:
+            dataset[column] = values
+
     def _transform_columns(self, dataset: pd.DataFrame):
         """
         Sets values for certain columns to their known/expected values.
@@ -230,9 +292,10 @@ class DatasetShapeTransformer:
             return dataset
         shaped_dataset = self._transform_shape(dataset)
 
-        shaped_dataset = shaped_dataset.fillna("").astype(str)
+        shaped_dataset = self._to_strings(shaped_dataset)
 
-        shaped_dataset = self._strip_whitespace(shaped_dataset)
+        if self.strip_whitespace:
+            shaped_dataset = self._strip_whitespace(shaped_dataset)
 
         shaped_dataset = self._transform_multiple_value_fields(shaped_dataset)
 
@@ -249,13 +312,6 @@ class GatewayDatasetShapeTransformer:
     def __init__(self, table_schema: Schema):
         self.table_schema: Schema = table_schema
 
-    def _allows_multiple(self, schema, field_name):
-        field = schema.get_field(field_name)
-        return (
-            "allows_multiple" in field.descriptor.keys()
-            and field.descriptor["allows_multiple"]
-        )
-
     def _convert_multiple_val(self, val):
         """
         Converts multiple-value fields from lists to comma separated strings.
@@ -274,14 +330,105 @@ class GatewayDatasetShapeTransformer:
         if dataset.empty:
             return dataset
 
-        schema_columns = set(dataset.columns) & set(self.table_schema.field_names)
+        allows_multiple = table_schema.get_schema_index(
+            self.table_schema
+        ).allows_multiple
         multiple_val_schema_cols = [
-            col
-            for col in schema_columns
-            if self._allows_multiple(self.table_schema, col)
+            col for col in dataset.columns if col in allows_multiple
         ]
 
         for column_name in multiple_val_schema_cols:
             self._reformat_multiple_val_col(dataset, column_name)
 
+        # Categorical columns are only converted back to values when the dataset
+        # is written for Gateway.
+        for column_name in dataset.columns:
+            if categorical.is_categorical(dataset[column_name]):
+                dataset[column_name] = categorical.to_objects(dataset[column_name])
+
         return dataset
+
+
+def validate_and_transform_datasets(
+    validator: DatasetShapeValidator,
+    transformer: DatasetShapeTransformer,
+    datasets: Dict[str, pd.DataFrame],
+    num_workers: int = 1,
+) -> Tuple[Dict[str, Dict], Dict[str, pd.DataFrame]]:
+    """Validates the shape of each dataset and, if they are all valid, shapes them.
+
+    Returns the validation failures, keyed by dataset name like
+    DatasetShapeValidator.validate_multiple_dataset_shape, and the shaped datasets,
+    also keyed by name. If any dataset is invalid, no shaped datasets are returned.
+
+    If num_workers is more than 1 and there are several datasets, each dataset is
+    validated and shaped in a pool of num_workers processes. Workers have their
+    own copy of each dataset, so they shape it in place.
+    """
+    if num_workers <= 1 or len(datasets) <= 1:
+        validation_failures = validator.validate_multiple_dataset_shape(datasets)
+        if validation_failures:
+            return validation_failures, {}
+        return (
+            {},
+            {
+                dataset_name: transformer.transform_dataset_shape(dataset)
+                for dataset_name, dataset in datasets.items()
+            },
+        )
+
+    validation_failures = {}
+    shaped_datasets = {}
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_init_worker,
+        initargs=(validator, transformer),
+    ) as executor:
+        futures = {
+            dataset_name: executor.submit(
+                _validate_and_transform_in_worker, dataset_name, dataset
+            )
+            for dataset_name, dataset in datasets.items()
+        }
+        # Collect the results in the order of the datasets.
+        for dataset_name, future in futures.items():
+            dataset_failures, shaped_dataset = future.result()
+            validation_failures.update(dataset_failures)
+            if shaped_dataset is not None:
+                shaped_datasets[dataset_name] = shaped_dataset
+
+    if validation_failures:
+        return validation_failures, {}
+    return validation_failures, shaped_datasets
+
+
+# Validator and transformer used by a worker process of the parallel mode.
+_worker_validator: Optional[DatasetShapeValidator] = None
+_worker_transformer: Optional[DatasetShapeTransformer] = None
+
+
+def _init_worker(
+    validator: DatasetShapeValidator, transformer: DatasetShapeTransformer
+):
+    """Sets the validator and transformer of a worker process, once per process."""
+    global _worker_validator, _worker_transformer
+    _worker_validator = validator
+    _worker_transformer = transformer
+    # The datasets of a worker are copies, so they can be shaped in place.
+    _worker_transformer.low_copy = True
+
+
+def _validate_and_transform_in_worker(
+    dataset_name: str, dataset: pd.DataFrame
+) -> Tuple[Dict[str, Dict], Optional[pd.DataFrame]]:
+    """Validates and shapes a dataset in a worker process.
+
+    Returns the validation failures of the dataset, keyed by its name, and the
+    shaped dataset, or None if it isn't valid.
+    """
+    validation_failures = _worker_validator.validate_multiple_dataset_shape(
+        {dataset_name: dataset}
+    )
+    if validation_failures:
+        return validation_failures, None
+    return {}, _worker_transformer.transform_dataset_shape(dataset)
@@ -0,0 +1,50 @@
+"""great_expectations dataset with the dataset shape expectations.
+
+It is in its own module, since importing great_expectations is slow, and it is
+only needed by the great_expectations validation backend (see validation.py).
+"""
+from great_expectations.dataset import PandasDataset, Dataset
+
+
+class ShapePandasDataset(PandasDataset):
+    @Dataset.expectation(["column_list"])
+    def expect_table_columns_to_be_in_set(
+        self,
+        column_list,
+        result_format=None,
+        include_config=False,
+        catch_exceptions=None,
+        meta=None,
+    ):
+        """
+        Checks if observed columns are in the set of expected columns. The
+        expectations will fail if columns are not in the expected set.
+        On failure, details are provided on the location of the unexpected
+        column(s).
+        """
+        named_columns = [col for col in self.columns if "Unnamed:" not in col]
+
+        if set(named_columns) <= set(column_list):
+            return {"success": True}
+
+        invalid_cols = sorted(list(set(named_columns) - set(column_list)))
+        return {
+            "success": False,
+            "invalid_columns": invalid_cols,
+        }
+
+    @Dataset.expectation(["column_list"])
+    def expect_named_cols(
+        self,
+        result_format=None,
+        include_config=False,
+        catch_exceptions=None,
+        meta=None,
+    ):
+
+        cols = list(set(self.columns))
+        columns_without_headers = [col[9:] for col in cols if "Unnamed" in col]
+        if not columns_without_headers:
+            return {"success": True}
+
+        return {"success": False, "columns_without_headers": columns_without_headers}
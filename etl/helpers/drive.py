@@ -1,10 +1,10 @@
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, TYPE_CHECKING
 
-from googleapiclient import discovery
-from googleapiclient.discovery import Resource
-from google.oauth2.service_account import Credentials
-from googleapiclient.errors import HttpError
+if TYPE_CHECKING:
+    # The Google API client is slow to import, so it is only imported when a
+    # service is built (see get_google_service).
+    from googleapiclient.discovery import Resource
 
 SheetInfo = Dict[str, str]
 
@@ -19,9 +19,12 @@ SCOPES = [
 SHEET_RANGE_SPLIT_CHAR = "!"
 
 
-def get_google_service(account_info: Dict, api: str, api_version: str) -> Resource:
+def get_google_service(account_info: Dict, api: str, api_version: str) -> "Resource":
     """Returns a Google API Resource for a given account authorization, api type, and
     version."""
+    from googleapiclient import discovery
+    from google.oauth2.service_account import Credentials
+
     credentials: Credentials = Credentials.from_service_account_info(
         account_info, scopes=SCOPES
     )
@@ -33,18 +36,18 @@ def get_google_service(account_info: Dict, api: str, api_version: str) -> Resour
     )
 
 
-def get_google_sheets_service(account_info: Dict) -> Resource:
+def get_google_sheets_service(account_info: Dict) -> "Resource":
     """Returns a Google Sheets API Resource."""
     return get_google_service(account_info, "sheets", "v4")
 
 
-def get_google_docs_service(account_info: Dict) -> Resource:
+def get_google_docs_service(account_info: Dict) -> "Resource":
     """Returns a Google Docs API Resource."""
     return get_google_service(account_info, "docs", "v1")
 
 
 def get_sheets_for_spreadsheet(
-    service: Resource, spreadsheet_id: str
+    service: "Resource", spreadsheet_id: str
 ) -> List[SheetInfo]:
     """Returns the titles of the sheets in a provided Google Sheet."""
     spreadsheet_info: Dict = service.spreadsheets().get(
@@ -65,14 +68,14 @@ def get_sheet_titles_from_sheets(sheets: List[SheetInfo]) -> SheetTitles:
 
 
 def get_sheet_titles_for_spreadsheet(
-    service: Resource, spreadsheet_id: str
+    service: "Resource", spreadsheet_id: str
 ) -> SheetTitles:
     sheets: List[SheetInfo] = get_sheets_for_spreadsheet(service, spreadsheet_id)
     return get_sheet_titles_from_sheets(sheets)
 
 
 def load_sheets_as_dataframes(
-    service: Resource,
+    service: "Resource",
     spreadsheet_id: str,
     range: str = "!A1:B1000",
     has_header_row: bool = True,
@@ -149,7 +152,7 @@ def load_doc_as_query(docs_service, document_id) -> str:
 
 
 def add_sheets(
-    sheets_service: Resource, sheet_titles: SheetTitles, spreadsheet_id: str
+    sheets_service: "Resource", sheet_titles: SheetTitles, spreadsheet_id: str
 ):
     """Adds sheets for the provided titles to a Google Sheet."""
     if not sheet_titles:
@@ -169,7 +172,7 @@ def add_sheets(
     )
 
 
-def batch_update(sheets_service: Resource, body: Dict, spreadsheet_id: str):
+def batch_update(sheets_service: "Resource", body: Dict, spreadsheet_id: str):
     """
     Peforms a Google Sheet batch update to apply one or more updates to a spreadsheet,
     like adding data validation or creating a new sheet.
@@ -182,7 +185,7 @@ def batch_update(sheets_service: Resource, body: Dict, spreadsheet_id: str):
     )
 
 
-def value_batch_update(sheets_service: Resource, body: Dict, spreadsheet_id: str):
+def value_batch_update(sheets_service: "Resource", body: Dict, spreadsheet_id: str):
     """
     Peforms a Google Sheet values batch update to set values in one or more
     ranges of a spreadsheet.
@@ -196,7 +199,7 @@ def value_batch_update(sheets_service: Resource, body: Dict, spreadsheet_id: str
     )
 
 
-def value_batch_clear(sheets_service: Resource, body: Dict, spreadsheet_id: str):
+def value_batch_clear(sheets_service: "Resource", body: Dict, spreadsheet_id: str):
     """
     Peforms a Google Sheet values batch clear to clear values in one or more
     ranges of a spreadsheet.
@@ -1,13 +1,24 @@
 import logging
 import etl.helpers.field_mapping as fm
 
-from airflow.utils.email import send_email
 from etl.helpers import common, data_processor
 from etl.helpers.dataset_filter import MISSING_INTAKE_RECORD_KEY
 
 HEADER = "This is an automated message from the GDI Pipeline.<br><br>"
 
 
+def send_email(*args, **kwargs):
+    """Sends an email with airflow.utils.email.send_email.
+
+    Airflow is imported here, so that importing this module (and the pipeline)
+    doesn't import it. Emails are only sent by Airflow tasks, which have already
+    imported Airflow, and configured its logging, by then.
+    """
+    from airflow.utils.email import send_email as airflow_send_email
+
+    return airflow_send_email(*args, **kwargs)
+
+
 def format_validation_failures(failures):
     message = "<ul>"
     for expectation_type, failed_info in sorted(failures.items()):
@@ -1,11 +1,15 @@
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 from tableschema import Schema, Field
-import fuzzywuzzy
-from fuzzywuzzy import process
 
+from etl.helpers.table_schema import SchemaIndex, get_schema_index
+from etl.helpers.field_mapping import matcher
+from etl.helpers.field_mapping.match_cache import CACHED_ENGINES, MatchCache
 from etl.helpers.field_mapping.common import FieldMapping, FieldMappings, NOT_APPROVED
 
+# Values are only mapped to their best option if its score is above this.
+MATCH_SCORE_THRESHOLD = 50
+
 
 def is_num(s: str) -> bool:
     try:
@@ -52,16 +56,29 @@ class FieldMappingGenerator:
                 input: (output, NOT_APPROVED) for input, output in self._map.items()
             }
 
-    def __init__(self, table_schema: Schema):
+    def __init__(
+        self,
+        table_schema: Schema,
+        matching_engine: Optional[str] = None,
+        match_cache: Optional[MatchCache] = None,
+    ):
         self.mapping_tables: Dict[
             str, FieldMapping
         ] = {}  # Maps str to FieldMappingTable.
         self.table_schema: Schema = table_schema
+        self.schema_index: SchemaIndex = get_schema_index(table_schema)
+        # One of matcher.ENGINES, or None for the default.
+        self.matching_engine: Optional[str] = matching_engine
+        # Matches of previous runs, if any (see match_cache.py). The cache isn't
+        # used for engines that score values faster than they are looked up.
+        if (matching_engine or matcher.get_default_engine()) not in CACHED_ENGINES:
+            match_cache = None
+        self.match_cache: Optional[MatchCache] = match_cache
 
     def _get_fields_by_type(self, type: str) -> [Field]:
         """Returns fields of a provided type.
         """
-        return list(filter(lambda field: field.type == type, self.table_schema.fields))
+        return self.schema_index.get_fields_by_type(type)
 
     def _get_enum_fields(self) -> [Field]:
         """Returns fields that have a provided constraint.
@@ -71,66 +88,89 @@ class FieldMappingGenerator:
         For enum fields that are converted to integers (Integer Enums), the field
         has "enum_mapping" in descriptor.
         """
-        return list(
-            filter(
-                lambda field: "enum" in field.constraints.keys()
-                or "enum_mapping" in field.descriptor.keys(),
-                self.table_schema.fields,
-            )
-        )
-
-    def _create_enum_mapping(self, field: Field, raw_text: str) -> None:
-        """Creates a fuzzy text mapping for text to a field's enum options and
-        stores it in the field's mapping table.
-        """
-
-        # Enum options are stored differently based on field type.
-        if field.type == "boolean":
-            enum_options = (
-                field.descriptor["trueValues"] + field.descriptor["falseValues"]
-            )
-        elif field.type == "integer":
-            enum_options = field.descriptor["enum_mapping"].keys()
-        elif field.type == "string":
-            enum_options = field.constraints["enum"]
+        return self.schema_index.enum_fields
 
+    def _needs_enum_mapping(self, field: Field, raw_text: str) -> bool:
+        """Returns whether text needs a fuzzy text mapping to a field's enum options."""
         # Don't map
         # - blank values
         # - numeric options
         # - values that match exactly to enum_options (this is case-insensitive)
         # - already mapped values
-        if (
+        return not (
             raw_text == ""
             or raw_text is None
             or is_num(raw_text)
-            or raw_text.lower() in [option.lower() for option in enum_options]
+            or raw_text.lower() in self.schema_index.lowercase_enum_options[field.name]
             or raw_text in self.mapping_tables[field.name]
-        ):
-            return
+        )
+
+    def _create_enum_mappings(self, field: Field, raw_texts: Iterable[str]) -> None:
+        """Creates fuzzy text mappings for texts to a field's enum options and
+        stores them in the field's mapping table.
+
+        The distinct texts that need a mapping, and aren't in the match cache,
+        are matched all at once.
+        """
+        unmatched_texts: List[str] = list(
+            dict.fromkeys(
+                raw_text
+                for raw_text in raw_texts
+                if self._needs_enum_mapping(field, raw_text)
+            )
+        )
+
+        enum_options = self.schema_index.enum_options[field.name]
+        matches: Dict[str, matcher.Match] = {}
+        if self.match_cache is not None and unmatched_texts:
+            matches = self.match_cache.get_matches(
+                field.name, enum_options, unmatched_texts, self.matching_engine
+            )
 
-        mapped_text, match_score = process.extractOne(
-            raw_text, enum_options, scorer=fuzzywuzzy.fuzz.token_sort_ratio
+        texts_to_match: List[str] = [
+            raw_text for raw_text in unmatched_texts if raw_text not in matches
+        ]
+        new_matches: Dict[str, matcher.Match] = dict(
+            zip(
+                texts_to_match,
+                matcher.extract_best(
+                    texts_to_match, enum_options, self.matching_engine
+                ),
+            )
         )
-        # If the best mapping does not have a match score > 50, ignore it
-        if match_score > 50:
-            self.mapping_tables[field.name].insert(raw_text, mapped_text)
-        else:
-            self.mapping_tables[field.name].insert(raw_text, None)
+        if self.match_cache is not None:
+            self.match_cache.put_matches(
+                field.name, enum_options, new_matches, self.matching_engine
+            )
+        matches.update(new_matches)
+
+        for raw_text in unmatched_texts:
+            mapped_text, match_score = matches[raw_text]
+            # If the best mapping does not have a match score > 50, ignore it
+            if match_score > MATCH_SCORE_THRESHOLD:
+                self.mapping_tables[field.name].insert(raw_text, mapped_text)
+            else:
+                self.mapping_tables[field.name].insert(raw_text, None)
 
     def _create_enum_mapping_multiple(
         self, field: Field, data_series: pd.Series
     ) -> None:
         """Creates enum mappings for an enum field that allows multiple values."""
-        for _, multiple_raw_values in data_series.iteritems():
-            if multiple_raw_values is None:
-                continue
-            for raw_text in multiple_raw_values:
-                self._create_enum_mapping(field, raw_text)
+        self._create_enum_mappings(
+            field,
+            (
+                raw_text
+                for _, multiple_raw_values in data_series.iteritems()
+                if multiple_raw_values is not None
+                for raw_text in multiple_raw_values
+            ),
+        )
 
     def _create_enum_mapping_single(self, field: Field, data_series: pd.Series) -> None:
         """Creates field mappings for an enum field that only allows a single value."""
-        for _, raw_text in data_series.iteritems():
-            self._create_enum_mapping(field, raw_text)
+        # Each distinct value only needs to be mapped once (for categorical
+        # columns, once per category).
+        self._create_enum_mappings(field, data_series.unique())
 
     def _create_enum_mapping_dataset(self, dataset: pd.DataFrame) -> None:
         """Creates field mappings for all fields that have the enum constraint."""
@@ -153,8 +193,7 @@ class FieldMappingGenerator:
 
     def _create_boolean_mapping(self, field: Field, data_series: pd.Series) -> None:
         """Creates field mappings for a boolean field."""
-        for _, raw_bool in data_series.iteritems():
-            self._create_enum_mapping(field, raw_bool)
+        self._create_enum_mappings(field, data_series.unique())
 
     def _create_boolean_mappings(self, dataset: pd.DataFrame) -> None:
         """Creates field mappings for all fields that have the boolean type."""
@@ -2,7 +2,6 @@ import os
 from typing import Dict
 from tableschema import Schema
 import pandas as pd
-from googleapiclient.discovery import Resource
 
 from etl.helpers.field_mapping import common
 from etl.helpers.field_mapping.common import FieldMapping, FieldMappings
@@ -32,7 +31,7 @@ class FieldMappingLoader:
         self, account_info, spreadsheet_id: str
     ) -> FieldMappings:
         """Loads field mappings from a Google Sheet into a FieldMappings object."""
-        service: Resource = drive.get_google_sheets_service(account_info)
+        service: drive.Resource = drive.get_google_sheets_service(account_info)
 
         results: Dict[str, pd.DataFrame] = drive.load_sheets_as_dataframes(
             service, spreadsheet_id, range="!A:C"
@@ -0,0 +1,183 @@
+"""Disk cache of the fuzzy matches of raw values to enum options.
+
+Members send the same spellings of enum values every day, so the best option of
+each raw value is cached across runs, in a sqlite database. Matches are keyed
+by the field's name and options, the matching engine and the raw value. A field
+whose options change in the schema (or are reordered, which can change how ties
+are broken) gets a new key, so its old matches are never used again, and are
+eventually evicted. The least recently used matches are evicted once the cache
+holds more than its maximum number of matches.
+
+The cache is only an optimization: if it can't be read or written, the failure
+is logged and the values are matched again. It is only used if its directory and
+database are private (see cache_dir.py), and cached matches to values that
+aren't options of the field are ignored.
+
+Looking matches up is only faster than scoring them with fuzzywuzzy: rapidfuzz
+scores all the values of a field in native code, in about the time it takes to
+look them up, so matches aren't cached for the rapidfuzz engine (see
+CACHED_ENGINES).
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import typing
+
+from etl.helpers.cache_dir import get_default_cache_dir, is_private, make_private_dir
+from etl.helpers.field_mapping import matcher
+
+# Default directory of the match cache, used by the Airflow tasks.
+MATCH_CACHE_DIR = get_default_cache_dir("fuzzy_matches")
+MATCH_CACHE_FILENAME = "fuzzy_matches.sqlite3"
+# Default maximum number of cached matches.
+MATCH_CACHE_SIZE = 100000
+# Version of the cached matches. Bump it when matches are scored differently, so
+# that the matches cached by older code aren't used.
+MATCH_CACHE_VERSION = 1
+# Matching engines whose matches are cached.
+CACHED_ENGINES = [matcher.FUZZYWUZZY_ENGINE]
+
+# Number of raw values looked up per query, below sqlite's limit on the number
+# of parameters of a query.
+_LOOKUP_BATCH_SIZE = 500
+# Seconds to wait for another process that is writing to the cache.
+_LOCK_TIMEOUT = 30
+
+
+class MatchCache:
+    """Cache of the best option of raw values, for each field."""
+
+    def __init__(self, cache_dir: str, max_size: int = MATCH_CACHE_SIZE):
+        self.cache_dir: str = cache_dir
+        self.filename: str = os.path.join(cache_dir, MATCH_CACHE_FILENAME)
+        self.max_size: int = max_size
+
+    @staticmethod
+    def get_options_key(options: typing.List[str], engine: str) -> str:
+        """Returns the key of the matches of values to the options of a field."""
+        return hashlib.sha256(
+            json.dumps([MATCH_CACHE_VERSION, engine, list(options)]).encode()
+        ).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not make_private_dir(self.cache_dir):
+            raise OSError(f"Cache directory {self.cache_dir} can't be used.")
+        # Create the database with private permissions, since sqlite would use
+        # the umask.
+        os.close(os.open(self.filename, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600))
+        if not is_private(self.filename):
+            raise OSError(f"{self.filename} can be written by other users.")
+        connection = sqlite3.connect(self.filename, timeout=_LOCK_TIMEOUT)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " options_key TEXT NOT NULL,"
+            " field_name TEXT NOT NULL,"
+            " raw_text TEXT NOT NULL,"
+            " mapped_text TEXT NOT NULL,"
+            " score INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (options_key, field_name, raw_text))"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used)"
+        )
+        return connection
+
+    def get_matches(
+        self,
+        field_name: str,
+        options: typing.List[str],
+        raw_texts: typing.List[str],
+        engine: typing.Optional[str] = None,
+    ) -> typing.Dict[str, matcher.Match]:
+        """Returns the cached matches of raw values to the options of a field, by
+        raw value. Values without a cached match are left out."""
+        if engine is None:
+            engine = matcher.get_default_engine()
+        options_key = self.get_options_key(options, engine)
+        option_set = set(options)
+
+        matches = {}
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    last_used = time.time()
+                    for start in range(0, len(raw_texts), _LOOKUP_BATCH_SIZE):
+                        batch = list(raw_texts[start : start + _LOOKUP_BATCH_SIZE])
+                        condition = (
+                            "options_key = ? AND field_name = ? AND raw_text IN"
+                            f" ({', '.join('?' * len(batch))})"
+                        )
+                        parameters = [options_key, field_name] + batch
+                        rows = connection.execute(
+                            "SELECT raw_text, mapped_text, score FROM matches"
+                            f" WHERE {condition}",
+                            parameters,
+                        )
+                        for raw_text, mapped_text, score in rows:
+                            if mapped_text in option_set:
+                                matches[raw_text] = (mapped_text, score)
+                        connection.execute(
+                            f"UPDATE matches SET last_used = ? WHERE {condition}",
+                            [last_used] + parameters,
+                        )
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error):
+            logging.debug("Could not read fuzzy matches from %s.", self.filename)
+            return {}
+
+        return matches
+
+    def put_matches(
+        self,
+        field_name: str,
+        options: typing.List[str],
+        matches: typing.Dict[str, matcher.Match],
+        engine: typing.Optional[str] = None,
+    ):
+        """Caches the matches of raw values to the options of a field, and evicts
+        the least recently used matches if the cache is full."""
+        if not matches:
+            return
+        if engine is None:
+            engine = matcher.get_default_engine()
+        options_key = self.get_options_key(options, engine)
+
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    last_used = time.time()
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (
+                                options_key,
+                                field_name,
+                                raw_text,
+                                mapped_text,
+                                score,
+                                last_used,
+                            )
+                            for raw_text, (mapped_text, score) in matches.items()
+                        ],
+                    )
+
+                    (size,) = connection.execute(
+                        "SELECT COUNT(*) FROM matches"
+                    ).fetchone()
+                    if size > self.max_size:
+                        connection.execute(
+                            "DELETE FROM matches WHERE rowid IN (SELECT rowid"
+                            " FROM matches ORDER BY last_used LIMIT ?)",
+                            (size - self.max_size,),
+                        )
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error):
+            logging.debug("Could not write fuzzy matches to %s.", self.filename)
@@ -0,0 +1,153 @@
+"""Fuzzy matching of raw values to the enum options of a field.
+
+Values are scored like fuzzywuzzy.process.extractOne(value, options,
+scorer=fuzzywuzzy.fuzz.token_sort_ratio): both are reduced to their lowercase
+alphanumeric tokens, which are sorted, and the resulting strings are compared
+with fuzzywuzzy.fuzz.ratio, rounded to an integer score between 0 and 100.
+
+All the values of a field are scored against all of its options at once. If
+rapidfuzz is installed, the scores are computed by rapidfuzz.process.cdist in
+native code, which gives the same scores as fuzzywuzzy with python-Levenshtein.
+Otherwise each score is computed by fuzzywuzzy.
+"""
+import logging
+import re
+import typing
+
+import numpy as np
+
+try:
+    import rapidfuzz.process
+    from rapidfuzz.distance import Indel
+except ImportError:  # Optional, see setup.py.
+    rapidfuzz = None
+
+RAPIDFUZZ_ENGINE = "rapidfuzz"
+FUZZYWUZZY_ENGINE = "fuzzywuzzy"
+ENGINES = [RAPIDFUZZ_ENGINE, FUZZYWUZZY_ENGINE]
+
+# Characters that fuzzywuzzy removes when forcing strings to ASCII.
+_NON_ASCII_TRANSLATION = {code: None for code in range(128, 256)}
+_NON_ALPHANUMERIC_REGEX = re.compile(r"(?ui)\W")
+
+Match = typing.Tuple[str, int]
+
+
+def get_default_engine() -> str:
+    return FUZZYWUZZY_ENGINE if rapidfuzz is None else RAPIDFUZZ_ENGINE
+
+
+def _full_process(text: str, force_ascii: bool = False) -> str:
+    """Like fuzzywuzzy.utils.full_process."""
+    if force_ascii:
+        text = text.translate(_NON_ASCII_TRANSLATION)
+    return _NON_ALPHANUMERIC_REGEX.sub(" ", text).lower().strip()
+
+
+def _sort_tokens(text: str) -> str:
+    return " ".join(sorted(text.split()))
+
+
+def process_value(value: str) -> str:
+    """Returns the string that a value is scored as. Values are processed twice,
+    like the queries of fuzzywuzzy.process.extractOne."""
+    return _sort_tokens(_full_process(_full_process(value), force_ascii=True))
+
+
+def process_option(option: str) -> str:
+    """Returns the string that an option is scored as."""
+    return _sort_tokens(_full_process(option, force_ascii=True))
+
+
+def _get_scores_rapidfuzz(
+    processed_values: typing.List[str], processed_options: typing.List[str]
+) -> np.ndarray:
+    distances = rapidfuzz.process.cdist(
+        processed_values, processed_options, scorer=Indel.distance, workers=1
+    ).astype(np.float64)
+    lengths = np.add.outer(
+        np.array([len(value) for value in processed_values], dtype=np.float64),
+        np.array([len(option) for option in processed_options], dtype=np.float64),
+    )
+
+    # The same operations as fuzzywuzzy, with the ratio of python-Levenshtein,
+    # so that scores are rounded the same way.
+    with np.errstate(invalid="ignore"):
+        ratios = (lengths - distances) / lengths
+    scores = np.round(100 * ratios)
+    # Empty strings only match each other.
+    scores[lengths == 0] = 100
+    return scores.astype(int)
+
+
+def _get_scores_fuzzywuzzy(
+    processed_values: typing.List[str], processed_options: typing.List[str]
+) -> np.ndarray:
+    import fuzzywuzzy.fuzz
+
+    scores = np.empty((len(processed_values), len(processed_options)), dtype=int)
+    for i, value in enumerate(processed_values):
+        for j, option in enumerate(processed_options):
+            scores[i, j] = fuzzywuzzy.fuzz.ratio(value, option)
+    return scores
+
+
+def get_scores(
+    values: typing.List[str],
+    options: typing.List[str],
+    engine: typing.Optional[str] = None,
+) -> np.ndarray:
+    """Returns the score of each value (rows) against each option (columns).
+
+    Parameters
+    ----------
+    values : typing.List[str]
+        Raw values to score.
+    options : typing.List[str]
+        Enum options to score them against.
+    engine : typing.Optional[str]
+        One of ENGINES. Defaults to rapidfuzz if it is installed.
+
+    """
+    if engine is None:
+        engine = get_default_engine()
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unknown matching engine {engine}. Expected one of {ENGINES}."
+        )
+    if engine == RAPIDFUZZ_ENGINE and rapidfuzz is None:
+        raise ValueError(f"The {RAPIDFUZZ_ENGINE} matching engine requires rapidfuzz.")
+
+    processed_values = [process_value(value) for value in values]
+    for value, processed_value in zip(values, processed_values):
+        if not processed_value:
+            # Logged like fuzzywuzzy.process.extractOne does.
+            logging.warning(
+                "Applied processor reduces input query to empty string, all "
+                f"comparisons will have score 0. [Query: '{value}']"
+            )
+    processed_options = [process_option(option) for option in options]
+    if engine == RAPIDFUZZ_ENGINE:
+        return _get_scores_rapidfuzz(processed_values, processed_options)
+    return _get_scores_fuzzywuzzy(processed_values, processed_options)
+
+
+def extract_best(
+    values: typing.List[str],
+    options: typing.List[str],
+    engine: typing.Optional[str] = None,
+) -> typing.List[Match]:
+    """Returns the best option of each value, and its score.
+
+    Ties go to the first of the best options, like with extractOne, so a value
+    is always matched to the same option. There must be at least one option.
+    """
+    if not values:
+        return []
+
+    scores = get_scores(values, options, engine)
+    best_options = scores.argmax(axis=1)
+    return [
+        (options[best_option], int(scores[i, best_option]))
+        for i, best_option in enumerate(best_options)
+    ]
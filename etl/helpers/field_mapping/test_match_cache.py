@@ -0,0 +1,160 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import ANY, patch
+import pandas as pd
+
+from etl.helpers.field_mapping import matcher
+from etl.helpers.field_mapping.generator import FieldMappingGenerator
+from etl.helpers.field_mapping.match_cache import MatchCache
+from etl.helpers.field_mapping.test_metadata import TEST_SCHEMA
+
+"""Unit tests for the fuzzy match cache.
+
+Run with `python -m etl.helpers.field_mapping.test_match_cache`.
+"""
+
+OPTIONS = ["Hispanic/Latino ethnic origin", "Not Hispanic/Latino"]
+MATCHES = {
+    "Hispanic/Latino origin": ("Hispanic/Latino ethnic origin", 88),
+    "Not Hispanic": ("Not Hispanic/Latino", 77),
+}
+
+
+class MatchCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.match_cache = MatchCache(self.cache_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_matches(self):
+        self.match_cache.put_matches("field1", OPTIONS, MATCHES)
+
+        self.assertEqual(
+            MATCHES,
+            self.match_cache.get_matches(
+                "field1", OPTIONS, ["Not Hispanic", "Hispanic/Latino origin", "other"]
+            ),
+        )
+        self.assertEqual(
+            MATCHES,
+            MatchCache(self.cache_dir).get_matches("field1", OPTIONS, list(MATCHES)),
+        )
+
+    def test_get_matches_empty_cache(self):
+        self.assertEqual(
+            {}, self.match_cache.get_matches("field1", OPTIONS, ["Not Hispanic"])
+        )
+
+    def test_get_matches_other_field_or_engine(self):
+        self.match_cache.put_matches(
+            "field1", OPTIONS, MATCHES, matcher.FUZZYWUZZY_ENGINE
+        )
+
+        self.assertEqual(
+            {},
+            self.match_cache.get_matches(
+                "field2", OPTIONS, list(MATCHES), matcher.FUZZYWUZZY_ENGINE
+            ),
+        )
+        self.assertEqual(
+            {},
+            self.match_cache.get_matches(
+                "field1", OPTIONS, list(MATCHES), matcher.RAPIDFUZZ_ENGINE
+            ),
+        )
+
+    def test_get_matches_changed_options(self):
+        self.match_cache.put_matches("field1", OPTIONS, MATCHES)
+
+        for options in [OPTIONS + ["Unknown"], OPTIONS[::-1], OPTIONS[:1]]:
+            with self.subTest(options=options):
+                self.assertEqual(
+                    {}, self.match_cache.get_matches("field1", options, list(MATCHES))
+                )
+
+    def test_evicts_least_recently_used(self):
+        match_cache = MatchCache(self.cache_dir, max_size=2)
+        match_cache.put_matches("field1", OPTIONS, {"a": ("Not Hispanic/Latino", 10)})
+        match_cache.put_matches("field1", OPTIONS, {"b": ("Not Hispanic/Latino", 20)})
+        match_cache.get_matches("field1", OPTIONS, ["a"])
+        match_cache.put_matches("field1", OPTIONS, {"c": ("Not Hispanic/Latino", 30)})
+
+        self.assertEqual(
+            ["a", "c"],
+            sorted(match_cache.get_matches("field1", OPTIONS, ["a", "b", "c"])),
+        )
+
+    def test_unusable_cache_dir(self):
+        cache_file = os.path.join(self.temp_dir.name, "file")
+        open(cache_file, "w").close()
+        match_cache = MatchCache(os.path.join(cache_file, "cache"))
+
+        match_cache.put_matches("field1", OPTIONS, MATCHES)
+        self.assertEqual({}, match_cache.get_matches("field1", OPTIONS, list(MATCHES)))
+
+    def test_get_matches_ignores_values_not_in_options(self):
+        self.match_cache.put_matches(
+            "field1", OPTIONS, dict(MATCHES, other=("Not an option", 100))
+        )
+
+        self.assertEqual(
+            MATCHES,
+            self.match_cache.get_matches("field1", OPTIONS, list(MATCHES) + ["other"]),
+        )
+
+    def test_writable_cache_not_used(self):
+        self.match_cache.put_matches("field1", OPTIONS, MATCHES)
+        for path, mode in [
+            (self.cache_dir, 0o777),
+            (self.match_cache.filename, 0o666),
+        ]:
+            with self.subTest(path=path):
+                os.chmod(path, mode)
+                self.assertEqual(
+                    {},
+                    self.match_cache.get_matches("field1", OPTIONS, list(MATCHES)),
+                )
+                os.chmod(path, 0o700)
+
+    def test_cache_is_private(self):
+        self.match_cache.put_matches("field1", OPTIONS, MATCHES)
+
+        self.assertEqual(0o700, os.stat(self.cache_dir).st_mode & 0o777)
+        self.assertEqual(0o600, os.stat(self.match_cache.filename).st_mode & 0o777)
+
+    def test_generator_uses_cached_matches(self):
+        dataset = pd.DataFrame(data={"field1": ["Hispanic/Latino origin", "other"]})
+        expected_field_mapping = FieldMappingGenerator(
+            TEST_SCHEMA, matcher.FUZZYWUZZY_ENGINE
+        ).generate_mappings_from_dataset(dataset)["field1"]
+
+        FieldMappingGenerator(
+            TEST_SCHEMA, matcher.FUZZYWUZZY_ENGINE, self.match_cache
+        ).generate_mappings_from_dataset(dataset)
+        with patch.object(
+            matcher, "extract_best", wraps=matcher.extract_best
+        ) as extract_best:
+            field_mappings = FieldMappingGenerator(
+                TEST_SCHEMA, matcher.FUZZYWUZZY_ENGINE, self.match_cache
+            ).generate_mappings_from_dataset(dataset)
+
+        extract_best.assert_called_once_with([], ANY, matcher.FUZZYWUZZY_ENGINE)
+        self.assertEqual(
+            expected_field_mapping.get_field_mapping_dict(),
+            field_mappings["field1"].get_field_mapping_dict(),
+        )
+
+    def test_generator_does_not_cache_rapidfuzz_matches(self):
+        generator = FieldMappingGenerator(
+            TEST_SCHEMA, matcher.RAPIDFUZZ_ENGINE, self.match_cache
+        )
+
+        self.assertIsNone(generator.match_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import fuzzywuzzy.fuzz
+import fuzzywuzzy.process
+
+from etl.helpers.field_mapping import matcher
+
+"""Unit tests for fuzzy matching of enum values.
+
+Run with `python -m etl.helpers.field_mapping.test_matcher`.
+"""
+
+OPTIONS = [
+    "Hispanic/Latino ethnic origin",
+    "Not of Hispanic/Latino ethnic origin",
+    "Unknown",
+    "Don't know",
+    "Refused",
+]
+VALUES = [
+    "hispanic latino",
+    "origin ethnic Latino/Hispanic",
+    "not hispanic",
+    "unkown",
+    "dont know",
+    "DON'T-KNOW",
+    "refused.",
+    "Réfused",
+    "Refused\xa0answer",
+    "x",
+    "-",
+    "",
+]
+
+
+def _indel_score(value: str, option: str) -> int:
+    """Scores two processed strings like fuzzywuzzy with python-Levenshtein:
+    from the length of their longest common subsequence."""
+    lcs = [0] * (len(option) + 1)
+    for char in value:
+        previous = 0
+        for j, option_char in enumerate(option):
+            current = lcs[j + 1]
+            if char == option_char:
+                lcs[j + 1] = previous + 1
+            else:
+                lcs[j + 1] = max(lcs[j + 1], lcs[j])
+            previous = current
+
+    length = len(value) + len(option)
+    if length == 0:
+        return 100
+    distance = length - 2 * lcs[-1]
+    return int(round(100 * ((length - distance) / length)))
+
+
+class MatcherTest(unittest.TestCase):
+    def test_extract_best_fuzzywuzzy(self):
+        matches = matcher.extract_best(VALUES, OPTIONS, matcher.FUZZYWUZZY_ENGINE)
+
+        self.assertEqual(
+            [
+                fuzzywuzzy.process.extractOne(
+                    value, OPTIONS, scorer=fuzzywuzzy.fuzz.token_sort_ratio
+                )
+                for value in VALUES
+            ],
+            matches,
+        )
+
+    @unittest.skipIf(matcher.rapidfuzz is None, "rapidfuzz is not installed")
+    def test_get_scores_rapidfuzz(self):
+        scores = matcher.get_scores(VALUES, OPTIONS, matcher.RAPIDFUZZ_ENGINE)
+
+        self.assertEqual(
+            [
+                [
+                    _indel_score(
+                        matcher.process_value(value), matcher.process_option(option)
+                    )
+                    for option in OPTIONS
+                ]
+                for value in VALUES
+            ],
+            scores.tolist(),
+        )
+
+    @unittest.skipIf(matcher.rapidfuzz is None, "rapidfuzz is not installed")
+    def test_get_scores_rapidfuzz_same_as_fuzzywuzzy(self):
+        if fuzzywuzzy.fuzz.SequenceMatcher.__module__ == "difflib":
+            self.skipTest("fuzzywuzzy doesn't use python-Levenshtein")
+
+        self.assertEqual(
+            matcher.get_scores(VALUES, OPTIONS, matcher.FUZZYWUZZY_ENGINE).tolist(),
+            matcher.get_scores(VALUES, OPTIONS, matcher.RAPIDFUZZ_ENGINE).tolist(),
+        )
+
+    def test_process_value(self):
+        self.assertEqual("hispanic latino", matcher.process_value(" Latino/Hispanic "))
+        self.assertEqual("don know t", matcher.process_value("DON'T-KNOW"))
+        self.assertEqual("rfused", matcher.process_value("Réfused"))
+        self.assertEqual("", matcher.process_value("-"))
+
+    def test_ties_go_to_first_option(self):
+        for engine in matcher.ENGINES:
+            if engine == matcher.RAPIDFUZZ_ENGINE and matcher.rapidfuzz is None:
+                continue
+            with self.subTest(engine=engine):
+                self.assertEqual(
+                    [("ab", 50), ("a b", 100)],
+                    matcher.extract_best(["ac", "b a"], ["ab", "a b", "b a"], engine),
+                )
+
+    def test_extract_best_no_values(self):
+        self.assertEqual([], matcher.extract_best([], OPTIONS))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            matcher.get_scores(VALUES, OPTIONS, engine="other_engine")
+
+
+if __name__ == "__main__":
+    unittest.main()
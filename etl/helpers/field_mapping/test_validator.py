@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pandas as pd
 
 from etl.helpers.common import (
@@ -15,6 +16,7 @@ from etl.helpers.field_mapping.common import FieldMapping
 from etl.helpers.field_mapping.validator import (
     FieldMappingValidator,
     FieldMappingApprovalValidator,
+    StackedFieldMappings,
 )
 
 """Unit tests for FieldMappingValidator and FieldMappingApprovalValidator.
@@ -177,5 +179,107 @@ class FieldMappingApprovalValidatorTest(unittest.TestCase):
         )
 
 
+def _get_test_field_mappings():
+    """Returns field mappings with and without failures of each kind."""
+
+    def field_mapping(inputs, outputs, approved):
+        return FieldMapping.from_dataframe(
+            pd.DataFrame(
+                data={
+                    common.INPUT_COLUMN_NAME: inputs,
+                    common.OUTPUT_COLUMN_NAME: outputs,
+                    common.APPROVED_COLUMN_NAME: approved,
+                }
+            )
+        )
+
+    return {
+        # Valid, with blank and missing values.
+        "HasSavings": field_mapping(
+            ["yes", "no", "?", None, np.nan],
+            ["yes", "no", "", None, np.nan],
+            ["Yes", "No", "None", np.nan, None],
+        ),
+        # Same inputs as HasSavings, and outputs that are only valid for
+        # HasSavings.
+        "MilestoneFlag": field_mapping(
+            ["yes", "intake", "exit"], ["Intake", "yes", "Exit"], ["Yes"] * 3
+        ),
+        # Duplicate inputs.
+        "Gender": field_mapping(
+            ["m", "f", "m", "male", "male"], ["Male"] * 2 + ["Female"] * 3, ["Yes"] * 5
+        ),
+        # Invalid approved values.
+        "CategoriesIdentifyWith": field_mapping(
+            ["dislocated", "veteran"],
+            ["Dislocated Worker", "Veteran"],
+            ["Yes", "Maybe"],
+        ),
+        # Numeric values.
+        "FinancialCapabilityScore4": field_mapping(
+            [1, 2.0, 1.0], [1, "2", None], [True, "Yes", 1]
+        ),
+        "Empty": FieldMapping.from_dataframe(pd.DataFrame(columns=common.COLUMN_NAMES)),
+        # Wrong columns.
+        "Clothing": FieldMapping.from_dataframe(
+            pd.DataFrame(data={common.INPUT_COLUMN_NAME: ["a"]})
+        ),
+    }
+
+
+class StackedFieldMappingsTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(
+            "etl/schemas/mission_impact_table_schema.json"
+        )
+
+    def test_stack(self):
+        stacked = StackedFieldMappings(_get_test_field_mappings())
+
+        self.assertEqual(["Clothing"], stacked.unstacked_field_names)
+        self.assertEqual(18, len(stacked.inputs))
+        # 1 and 1.0 are equal inputs.
+        self.assertEqual(
+            {"Gender", "FinancialCapabilityScore4"},
+            stacked.get_field_names(stacked.is_duplicated(stacked.inputs)),
+        )
+
+    def test_validate_multiple_same_as_each(self):
+        field_mappings = _get_test_field_mappings()
+        del field_mappings["Empty"]  # Not a field of the schema.
+        validator = FieldMappingValidator(self.schema)
+
+        validation_failures = validator.validate_multiple(field_mappings)
+
+        self.assertEqual(validator._validate_each(field_mappings), validation_failures)
+        self.assertEqual(
+            {
+                "MilestoneFlag",
+                "Gender",
+                "CategoriesIdentifyWith",
+                "FinancialCapabilityScore4",
+                "Clothing",
+            },
+            set(validation_failures),
+        )
+
+    def test_validate_approvals_same_as_each(self):
+        field_mappings = _get_test_field_mappings()
+        del field_mappings["Clothing"]  # No approved column.
+        validator = FieldMappingApprovalValidator()
+
+        validation_failures = validator.validate_multiple(field_mappings)
+
+        self.assertEqual(validator._validate_each(field_mappings), validation_failures)
+        self.assertEqual(
+            {"HasSavings", "CategoriesIdentifyWith", "FinancialCapabilityScore4"},
+            set(validation_failures),
+        )
+
+    def test_validate_no_field_mappings(self):
+        self.assertEqual({}, FieldMappingValidator(self.schema).validate_multiple({}))
+        self.assertEqual({}, FieldMappingApprovalValidator().validate_multiple({}))
+
+
 if __name__ == "__main__":
     unittest.main()
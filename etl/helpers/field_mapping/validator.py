@@ -1,12 +1,107 @@
+import numpy as np
+import pandas as pd
 from tableschema import Schema, Field
-import great_expectations as ge
-from typing import Dict, List
+from typing import Dict, List, Set
 
+from etl.helpers import validation
 from etl.helpers.common import ge_results_to_failure_map
 from etl.helpers.field_mapping import common
 from etl.helpers.field_mapping.common import FieldMapping, FieldMappings
 
 
+class StackedFieldMappings:
+    """The rows of many field mappings stacked into arrays, to check them all at
+    once instead of one field mapping at a time."""
+
+    def __init__(self, field_mappings: FieldMappings):
+        # Field mappings without exactly the columns common.COLUMN_NAMES aren't
+        # stacked.
+        self.unstacked_field_names: List[str] = []
+        self.field_names: List[str] = []
+        field_mapping_values = [np.empty((0, len(common.COLUMN_NAMES)), dtype=object)]
+        for field_name, field_mapping in field_mappings.items():
+            field_mapping_df = field_mapping.get_field_mapping_df()
+            if list(field_mapping_df.columns) == common.COLUMN_NAMES:
+                self.field_names.append(field_name)
+                field_mapping_values.append(field_mapping_df.to_numpy(dtype=object))
+            else:
+                self.unstacked_field_names.append(field_name)
+
+        # Position in field_names of the field of each row.
+        self.field_indices: np.ndarray = np.repeat(
+            np.arange(len(self.field_names)),
+            [len(values) for values in field_mapping_values[1:]],
+        )
+        values = np.concatenate(field_mapping_values)
+        self.inputs: np.ndarray = values[:, common.INPUT_COLUMN_INDEX]
+        self.outputs: np.ndarray = values[:, common.OUTPUT_COLUMN_INDEX]
+        self.approved: np.ndarray = values[:, common.APPROVED_COLUMN_INDEX]
+
+    def get_field_names(self, rows: np.ndarray) -> Set[str]:
+        """Returns the field names of the rows selected by a boolean array."""
+        return {
+            self.field_names[field_index]
+            for field_index in np.unique(self.field_indices[rows])
+        }
+
+    @staticmethod
+    def _get_keys(field_indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Returns a key for each field and value, equal for equal values of the
+        same field."""
+        codes = pd.factorize(values)[0] + 1  # Missing values are 0.
+        return field_indices * (codes.max(initial=0) + 1) + codes
+
+    def is_duplicated(self, values: np.ndarray) -> np.ndarray:
+        """Returns which rows have a value that isn't missing and that another row
+        of the same field has."""
+        keys = self._get_keys(self.field_indices, values)
+        return ~pd.isna(values) & pd.Series(keys).duplicated(keep=False).to_numpy()
+
+    def is_in(
+        self, values: np.ndarray, valid_values_by_field: Dict[str, List]
+    ) -> np.ndarray:
+        """Returns which rows have a value that is missing or one of the valid
+        values of its field."""
+        valid_values = [
+            valid_values_by_field[field_name] for field_name in self.field_names
+        ]
+        # The valid values are given keys along with the values.
+        keys = self._get_keys(
+            np.concatenate(
+                [
+                    self.field_indices,
+                    np.repeat(
+                        np.arange(len(valid_values)),
+                        [
+                            len(field_valid_values)
+                            for field_valid_values in valid_values
+                        ],
+                    ),
+                ]
+            ),
+            np.concatenate(
+                [
+                    values,
+                    np.array(
+                        [
+                            value
+                            for field_valid_values in valid_values
+                            for value in field_valid_values
+                        ],
+                        dtype=object,
+                    ),
+                ]
+            ),
+        )
+
+        return pd.isna(values) | np.isin(keys[: len(values)], keys[len(values) :])
+
+
+def _is_in_set(values: np.ndarray, value_set: List) -> np.ndarray:
+    """Returns which values are missing or in value_set."""
+    return pd.isna(values) | pd.Series(values, dtype=object).isin(value_set).to_numpy()
+
+
 class FieldMappingValidator:
     def __init__(self, table_schema: Schema):
         self.table_schema: Schema = table_schema
@@ -25,9 +120,8 @@ class FieldMappingValidator:
 
     def _get_expectations(
         self, field_mapping: FieldMapping, field_name: str
-    ) -> ge.dataset.Dataset:
-        field_mapping_ge = ge.from_pandas(field_mapping.get_field_mapping_df())
-        field_mapping_ge.set_default_expectation_argument("result_format", "COMPLETE")
+    ) -> validation.Dataset:
+        field_mapping_ge = validation.from_pandas(field_mapping.get_field_mapping_df())
 
         # Shape
         shape_expectation = field_mapping_ge.expect_table_columns_to_match_ordered_list(
@@ -55,8 +149,46 @@ class FieldMappingValidator:
 
         return field_mapping_ge
 
+    def _get_invalid_field_names(self, field_mappings: FieldMappings) -> Set[str]:
+        """Returns the names of the field mappings that have failures, found by
+        checking all of them at once."""
+        stacked = StackedFieldMappings(field_mappings)
+
+        # Inputs mapped more than once for the same field.
+        is_invalid = stacked.is_duplicated(stacked.inputs)
+
+        # Outputs that aren't options of their field (blank is also valid).
+        valid_outputs = {
+            field_name: self._get_valid_mappings_for_field(
+                self.table_schema.get_field(field_name)
+            )
+            + [""]
+            for field_name in stacked.field_names
+        }
+        is_invalid |= ~stacked.is_in(stacked.outputs, valid_outputs)
+
+        is_invalid |= ~_is_in_set(
+            stacked.approved, common.VALID_APPROVED_VALUES + ["None"]
+        )
+
+        return set(stacked.unstacked_field_names) | stacked.get_field_names(is_invalid)
+
     def validate_multiple(self, field_mappings: FieldMappings) -> Dict[str, Dict]:
-        """Returns map of field_name -> failures. If map is empty, the field mappings are valid."""
+        """Returns map of field_name -> failures. If map is empty, the field mappings are valid.
+
+        The field mappings are checked all at once, then the ones with failures
+        are validated one at a time to describe their failures.
+        """
+        invalid_field_names = self._get_invalid_field_names(field_mappings)
+        return self._validate_each(
+            {
+                field_name: field_mapping
+                for field_name, field_mapping in field_mappings.items()
+                if field_name in invalid_field_names
+            }
+        )
+
+    def _validate_each(self, field_mappings: FieldMappings) -> Dict[str, Dict]:
         return ge_results_to_failure_map(
             {
                 field_name: self._get_expectations(field_mapping, field_name).validate()
@@ -66,9 +198,8 @@ class FieldMappingValidator:
 
 
 class FieldMappingApprovalValidator:
-    def _get_expectations(self, field_mapping: FieldMapping) -> ge.dataset.Dataset:
-        field_mapping_ge = ge.from_pandas(field_mapping.get_field_mapping_df())
-        field_mapping_ge.set_default_expectation_argument("result_format", "COMPLETE")
+    def _get_expectations(self, field_mapping: FieldMapping) -> validation.Dataset:
+        field_mapping_ge = validation.from_pandas(field_mapping.get_field_mapping_df())
 
         # Check that the approved column values are all "Yes"
         field_mapping_ge.expect_column_values_to_be_in_set(
@@ -77,8 +208,30 @@ class FieldMappingApprovalValidator:
 
         return field_mapping_ge
 
+    def _get_invalid_field_names(self, field_mappings: FieldMappings) -> Set[str]:
+        """Returns the names of the field mappings that have failures (or may not
+        have an approved column), found by checking all of them at once."""
+        stacked = StackedFieldMappings(field_mappings)
+        is_invalid = ~_is_in_set(stacked.approved, [common.APPROVED])
+
+        return set(stacked.unstacked_field_names) | stacked.get_field_names(is_invalid)
+
     def validate_multiple(self, field_mappings: FieldMappings) -> Dict[str, Dict]:
-        """Returns map of field_name -> failures. If map is empty, the field mapping approvals are valid."""
+        """Returns map of field_name -> failures. If map is empty, the field mapping approvals are valid.
+
+        The field mappings are checked all at once, then the ones with failures
+        are validated one at a time to describe their failures.
+        """
+        invalid_field_names = self._get_invalid_field_names(field_mappings)
+        return self._validate_each(
+            {
+                field_name: field_mapping
+                for field_name, field_mapping in field_mappings.items()
+                if field_name in invalid_field_names
+            }
+        )
+
+    def _validate_each(self, field_mappings: FieldMappings) -> Dict[str, Dict]:
         return ge_results_to_failure_map(
             {
                 field_name: self._get_expectations(field_mapping).validate()
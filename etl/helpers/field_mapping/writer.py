@@ -1,8 +1,7 @@
 import os
 import csv
 import logging
-from tableschema import Schema, Field
-from googleapiclient.discovery import Resource
+from tableschema import Schema
 from typing import Dict, List
 
 from etl.helpers.field_mapping import common
@@ -12,18 +11,6 @@ from etl.helpers.drive import SheetInfo
 from etl.helpers import table_schema
 
 
-def get_enum_options(field: Field) -> List[str]:
-    enum_options = []
-    if field.type == "boolean":
-        enum_options = field.descriptor["trueValues"] + field.descriptor["falseValues"]
-    elif field.type == "integer":
-        enum_options = field.descriptor["enum_mapping"].keys()
-    elif field.type == "string":
-        enum_options = field.constraints["enum"]
-
-    return enum_options
-
-
 class FieldMappingWriter:
     """Helper class for writing field mappings to .csv files and Google Sheets."""
 
@@ -84,11 +71,12 @@ class FieldMappingWriter:
         - The valid approval states for APPROVED columns
         """
         requests: List[Dict] = []
+        enum_options = table_schema.get_schema_index(self.table_schema).enum_options
 
         for sheet in sheets:
             sheet_id = sheet["sheetId"]
             field_name = sheet["title"]
-            options = get_enum_options(self.table_schema.get_field(field_name))
+            options = enum_options.get(field_name, [])
 
             # Add Output column validation
             requests.append(
@@ -164,7 +152,7 @@ class FieldMappingWriter:
         Sets data validations on the columns and auto resizes column widths.
         """
 
-        service: Resource = drive.get_google_sheets_service(account_info)
+        service: drive.Resource = drive.get_google_sheets_service(account_info)
 
         # Get information on the existing sheets
         existing_sheets: List[SheetInfo] = drive.get_sheets_for_spreadsheet(
@@ -0,0 +1,95 @@
+"""Instrumentation of the time and memory used by each stage of the pipeline.
+
+Stages are wrapped with `stage`, which records how long the stage took and the
+peak resident set size (RSS) of the process while it ran, so that workers can be
+sized for the largest stage. On Linux the peak is reset at the start of each
+stage, so it is the peak of that stage alone. Elsewhere it is the peak of the
+process so far.
+"""
+import contextlib
+import logging
+import sys
+import time
+import typing
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+# Keys of the stats recorded for each stage.
+STAGE_KEY = "stage"
+SECONDS_KEY = "seconds"
+PEAK_RSS_KEY = "peak_rss_bytes"
+# Whether PEAK_RSS_KEY is the peak of the stage alone, or of the process so far.
+PEAK_RSS_IS_PER_STAGE_KEY = "peak_rss_is_per_stage"
+
+PROC_STATUS_FILE = "/proc/self/status"
+# Writing "5" to this file resets the peak RSS (VmHWM) of the process, on Linux.
+PROC_CLEAR_REFS_FILE = "/proc/self/clear_refs"
+
+
+def _read_proc_status(field_name: str) -> typing.Optional[int]:
+    """Returns a memory field of /proc/self/status (e.g. VmHWM), in bytes."""
+    try:
+        with open(PROC_STATUS_FILE) as f:
+            for line in f:
+                if line.startswith(field_name + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss() -> typing.Optional[int]:
+    """Returns the peak RSS of the process since it started or was last reset, in
+    bytes, or None if it isn't available."""
+    peak = _read_proc_status("VmHWM")
+    if peak is not None or resource is None:
+        return peak
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes, except on macOS, where it is in bytes.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Resets the peak RSS of the process to its current RSS, if the platform
+    allows it. Returns whether it was reset."""
+    try:
+        with open(PROC_CLEAR_REFS_FILE, "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def stage(name: str, stats: typing.Optional[typing.List[dict]] = None):
+    """Measures the duration and peak RSS of a stage of the pipeline.
+
+    The measurements are logged at DEBUG level, and appended to stats, if given.
+    """
+    is_per_stage = reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak = peak_rss()
+        logging.debug(
+            "Stage %s took %.2fs. Peak RSS%s: %s",
+            name,
+            seconds,
+            "" if is_per_stage else " of the process so far",
+            "unknown" if peak is None else f"{peak / 2 ** 20:.1f} MiB",
+        )
+        if stats is not None:
+            stats.append(
+                {
+                    STAGE_KEY: name,
+                    SECONDS_KEY: seconds,
+                    PEAK_RSS_KEY: peak,
+                    PEAK_RSS_IS_PER_STAGE_KEY: is_per_stage,
+                }
+            )
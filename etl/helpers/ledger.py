@@ -0,0 +1,275 @@
+"""Columnar records of the invalid values and dropped rows found while processing data.
+
+Only the invalid values and dropped rows are stored, in compact arrays, so memory
+scales with the number of errors rather than with the size of the dataset. The
+dicts used for reporting (see email.py) are only created when they're accessed.
+"""
+import collections.abc
+import numpy as np
+import pandas as pd
+import typing
+
+# Keys used for value identifiers and reporting invalid data.
+CASE_NUMBER_KEY = "case_number"
+FIELD_NAME_KEY = "field_name"
+MILESTONE_FLAG_KEY = "milestone_flag"
+ORIGINAL_VALUE_KEY = "original_value"
+INVALID_REASON_KEY = "invalid_reasons"
+
+MISSING_FIELDS_KEY = "missing_fields"
+DUPLICATE_ROWS_KEY = "duplicate_rows"
+ROW_KEY = "row"
+
+# Reason code of invalid values that were reported without a reason.
+NO_REASON = -1
+
+
+def object_array(values) -> np.ndarray:
+    """Returns a 1-dimensional object array of the values, even if they're lists."""
+    array = np.empty(len(values), dtype=object)
+    array[:] = list(values)
+    return array
+
+
+class InvalidValueLedger(collections.abc.Sequence):
+    """Sequence of the invalid values found while processing data.
+
+    Behaves like a list of value identifier dicts, with the case number, field name,
+    milestone flag, original value and invalid reason of each invalid value.
+    """
+
+    # Columns of the ledger and their dtypes.
+    COLUMNS = {
+        "rows": np.int64,
+        "field_ids": np.int32,
+        "reason_codes": np.int32,
+        "case_numbers": object,
+        "milestone_flags": object,
+        "original_values": object,
+    }
+
+    def __init__(self):
+        self.field_names: typing.List[str] = []  # Field name of each field id.
+        self.reasons: typing.List[str] = []  # Reason of each reason code.
+        self._field_ids: typing.Dict[str, int] = {}
+        self._reason_codes: typing.Dict[str, int] = {}
+        # Chunks of each column, concatenated when the ledger is read.
+        self._chunks: typing.Dict[str, typing.List[np.ndarray]] = {
+            column: [np.empty(0, dtype=dtype)] for column, dtype in self.COLUMNS.items()
+        }
+
+    def _field_id(self, field_name: str) -> int:
+        if field_name not in self._field_ids:
+            self._field_ids[field_name] = len(self.field_names)
+            self.field_names.append(field_name)
+        return self._field_ids[field_name]
+
+    def _reason_code(self, reason: typing.Optional[str]) -> int:
+        if reason is None:
+            return NO_REASON
+        if reason not in self._reason_codes:
+            self._reason_codes[reason] = len(self.reasons)
+            self.reasons.append(reason)
+        return self._reason_codes[reason]
+
+    def _column(self, column: str) -> np.ndarray:
+        chunks = self._chunks[column]
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def record(
+        self,
+        field_name: str,
+        rows: np.ndarray,
+        case_numbers: np.ndarray,
+        milestone_flags: np.ndarray,
+        original_values: np.ndarray,
+        reasons: typing.Sequence[typing.Optional[str]],
+    ):
+        """Records the invalid values of a field.
+
+        Rows are the positions of the invalid values in the processed dataset.
+        """
+        columns = {
+            "rows": np.asarray(rows, dtype=np.int64),
+            "field_ids": np.full(len(rows), self._field_id(field_name), np.int32),
+            "reason_codes": np.fromiter(
+                (self._reason_code(reason) for reason in reasons),
+                dtype=np.int32,
+                count=len(rows),
+            ),
+            "case_numbers": object_array(case_numbers),
+            "milestone_flags": object_array(milestone_flags),
+            "original_values": object_array(original_values),
+        }
+        for column, values in columns.items():
+            self._chunks[column].append(values)
+
+    def append(self, value_identifier: dict):
+        """Records an invalid value from its value identifier."""
+        self.record(
+            value_identifier[FIELD_NAME_KEY],
+            [-1],
+            [value_identifier[CASE_NUMBER_KEY]],
+            [value_identifier[MILESTONE_FLAG_KEY]],
+            [value_identifier[ORIGINAL_VALUE_KEY]],
+            [value_identifier.get(INVALID_REASON_KEY)],
+        )
+
+    def extend(self, value_identifiers: typing.Iterable[dict]):
+        if isinstance(value_identifiers, InvalidValueLedger):
+            self._extend_ledger(value_identifiers)
+            return
+
+        for value_identifier in value_identifiers:
+            self.append(value_identifier)
+
+    def _extend_ledger(self, other: "InvalidValueLedger"):
+        """Appends the invalid values of another ledger, without materializing them."""
+        field_ids = np.array(
+            [self._field_id(field_name) for field_name in other.field_names],
+            dtype=np.int32,
+        )
+        # The last code maps NO_REASON to itself.
+        reason_codes = np.array(
+            [self._reason_code(reason) for reason in other.reasons] + [NO_REASON],
+            dtype=np.int32,
+        )
+        for column in self.COLUMNS:
+            values = other._column(column)
+            if column == "field_ids":
+                values = field_ids[values]
+            elif column == "reason_codes":
+                values = reason_codes[values]
+            self._chunks[column].append(values)
+
+    def __iadd__(self, value_identifiers):
+        self.extend(value_identifiers)
+        return self
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._chunks["rows"])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        value_identifier = {
+            CASE_NUMBER_KEY: self._column("case_numbers")[i],
+            FIELD_NAME_KEY: self.field_names[self._column("field_ids")[i]],
+            MILESTONE_FLAG_KEY: self._column("milestone_flags")[i],
+            ORIGINAL_VALUE_KEY: self._column("original_values")[i],
+        }
+        reason_code = self._column("reason_codes")[i]
+        if reason_code != NO_REASON:
+            value_identifier[INVALID_REASON_KEY] = self.reasons[reason_code]
+        return value_identifier
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the invalid values as a DataFrame, with one row per value."""
+        reason_codes = self._column("reason_codes")
+        reasons = object_array(self.reasons + [None])
+        return pd.DataFrame(
+            {
+                CASE_NUMBER_KEY: self._column("case_numbers"),
+                FIELD_NAME_KEY: object_array(self.field_names)[
+                    self._column("field_ids")
+                ],
+                MILESTONE_FLAG_KEY: self._column("milestone_flags"),
+                ORIGINAL_VALUE_KEY: self._column("original_values"),
+                INVALID_REASON_KEY: reasons[reason_codes],
+            }
+        )
+
+
+class DroppedRowLedger(collections.abc.Sequence):
+    """Sequence of the rows dropped while processing data.
+
+    Behaves like a list of dicts, each with the dropped row and the reason it was
+    dropped: either the missing required fields or a flag such as DUPLICATE_ROWS_KEY.
+    """
+
+    def __init__(self):
+        # Batches of dropped rows. Each batch is either a list of row info dicts,
+        # or a tuple of the rows, the key of the reason they were dropped and, for
+        # MISSING_FIELDS_KEY, the field names and the array of missing fields.
+        self._batches: typing.List[tuple] = []
+        self._offsets: typing.List[int] = []  # Index of the first row of each batch.
+        self._length: int = 0
+
+    def _add_batch(self, batch, length: int):
+        self._batches.append(batch)
+        self._offsets.append(self._length)
+        self._length += length
+
+    def record(self, rows: pd.DataFrame, key: str):
+        """Records rows that were all dropped for the same reason, e.g. DUPLICATE_ROWS_KEY."""
+        if len(rows):
+            self._add_batch((rows, key, None), len(rows))
+
+    def record_missing_fields(
+        self, rows: pd.DataFrame, field_names: typing.List[str], missing: np.ndarray
+    ):
+        """Records rows that were dropped because required fields were missing.
+
+        missing is a boolean array with a row per dropped row and a column per field,
+        that is True where the row is missing the field.
+        """
+        if len(rows):
+            self._add_batch(
+                (rows, MISSING_FIELDS_KEY, (field_names, np.asarray(missing))),
+                len(rows),
+            )
+
+    def append(self, row_info: dict):
+        self._add_batch([row_info], 1)
+
+    def extend(self, row_infos: typing.Iterable[dict]):
+        for row_info in row_infos:
+            self.append(row_info)
+
+    def __iadd__(self, row_infos):
+        self.extend(row_infos)
+        return self
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("dropped row index out of range")
+
+        batch_index = np.searchsorted(self._offsets, i, side="right") - 1
+        batch = self._batches[batch_index]
+        position = i - self._offsets[batch_index]
+        if isinstance(batch, list):
+            return batch[position]
+
+        rows, key, missing = batch
+        row_info = {ROW_KEY: rows.iloc[position]}
+        if key == MISSING_FIELDS_KEY:
+            field_names, missing_mask = missing
+            row_info[key] = [
+                field_name
+                for field_name, is_missing in zip(field_names, missing_mask[position])
+                if is_missing
+            ]
+        else:
+            row_info[key] = True
+        return row_info
+
+    def __repr__(self):
+        return f"{type(self).__name__}(<{len(self)} rows>)"
@@ -0,0 +1,71 @@
+"""Memoized lookup of US state abbreviations.
+
+us.states.lookup computes the metaphone of every name it's given, and scans all
+states again for names that don't match, while a dataset only contains a few
+distinct spellings of states. Lookups are memoized per process, so the cache is
+shared by every DataProcessor (and member) that runs in the same process.
+
+us is imported on first lookup, since most tasks never look up a state.
+"""
+import collections
+import typing
+
+# Maximum number of looked up names that are cached, on top of the precomputed ones.
+STATE_CACHE_SIZE = 4096
+
+# Abbreviation of each name (or None, if it isn't a state) looked up so far, least
+# recently used first.
+_state_cache: "collections.OrderedDict[str, typing.Optional[str]]" = collections.OrderedDict()
+
+# Abbreviations of the common spellings of each state, computed on first use.
+_precomputed_states: typing.Dict[str, typing.Optional[str]] = {}
+
+
+def _lookup(name: str) -> typing.Optional[str]:
+    import us
+
+    state = us.states.lookup(name)
+    return state.abbr if state else None
+
+
+def _precompute_states():
+    """Looks up the abbreviation, name and FIPS code of every state and territory,
+    in the cases most commonly used."""
+    import us
+
+    for state in us.states.STATES_AND_TERRITORIES:
+        for name in (state.abbr, state.name, state.fips):
+            if name:
+                for key in (name, name.lower(), name.upper()):
+                    _precomputed_states[key] = _lookup(key)
+
+
+def lookup_abbr(name: str) -> typing.Optional[str]:
+    """Returns the abbreviation of a state, like us.states.lookup(name).abbr, or
+    None if the name isn't a state."""
+    if not _precomputed_states:
+        _precompute_states()
+    if name in _precomputed_states:
+        return _precomputed_states[name]
+
+    if name in _state_cache:
+        _state_cache.move_to_end(name)
+        return _state_cache[name]
+
+    abbr = _state_cache[name] = _lookup(name)
+    if len(_state_cache) > STATE_CACHE_SIZE:
+        _state_cache.popitem(last=False)
+    return abbr
+
+
+def lookup_abbrs(names: typing.Iterable[str]) -> typing.Dict[str, str]:
+    """Looks up the abbreviation of each distinct name.
+
+    Returns a dict with the abbreviation of every name that is a state.
+    """
+    abbrs = {}
+    for name in names:
+        abbr = lookup_abbr(name)
+        if abbr is not None:
+            abbrs[name] = abbr
+    return abbrs
@@ -1,8 +1,17 @@
+import collections
+import hashlib
+import json
 import logging
+import os
+import pickle
 import pkg_resources
-from tableschema import Schema
+import tableschema
+from tableschema import Field, Schema
+import tempfile
 import typing
 
+from etl.helpers.cache_dir import get_default_cache_dir, is_private, make_private_dir
+
 FieldNamesByMilestone = typing.Dict[str, typing.Dict[str, str]]
 FieldNamesAdmin = typing.List[str]
 
@@ -10,15 +19,181 @@ MISSION_IMPACT_SCHEMA_FILE = pkg_resources.resource_filename(
     "etl.schemas", "mission_impact_table_schema.json"
 )
 
+# Default directory of the compiled schema cache (see get_schema). Compiled schemas
+# are unpickled, so they are only read from a private directory (see cache_dir).
+SCHEMA_CACHE_DIR = get_default_cache_dir("schemas")
+# Version of the format of compiled schemas. Bump it when SchemaIndex or
+# validate_schema change, so that schemas compiled or validated by older code are
+# compiled and validated again.
+SCHEMA_CACHE_VERSION = 1
+
 
-def get_schema(schema_filename: str) -> Schema:
-    return Schema(schema_filename)
+def get_schema(schema_filename: str, cache_dir: typing.Optional[str] = None) -> Schema:
+    """Returns the schema stored in schema_filename.
+
+    If cache_dir is given, the schema is loaded from the compiled schema cache in
+    that directory, which is much faster than parsing it. The cache is compiled
+    again when the schema file changes, and isn't used if the directory isn't
+    private.
+    """
+    if cache_dir is None:
+        return Schema(schema_filename)
+    return _load_compiled_schema(schema_filename, cache_dir)
 
 
 def get_milestone_names(table_schema: Schema) -> typing.List[str]:
     return table_schema.descriptor["column_based_milestone_names"]
 
 
+def get_enum_options(field: Field) -> typing.List[str]:
+    """Returns the options of an enum or boolean field, as stored in the schema."""
+    if field.type == "boolean":
+        return field.descriptor.get(
+            "trueValues", ["true", "True", "TRUE", "1"]
+        ) + field.descriptor.get("falseValues", ["false", "False", "FALSE", "0"])
+    if field.type == "integer":
+        return list(field.descriptor.get("enum_mapping", {}).keys())
+    return field.constraints.get("enum", [])
+
+
+class SchemaIndex:
+    """Lookups derived from the fields of a table schema.
+
+    An index is built once per schema content (see get_schema_index), so the
+    fields and their descriptors aren't scanned again each time they are needed.
+    The index is shared, so its attributes must not be modified.
+    """
+
+    def __init__(self, table_schema: Schema):
+        self.field_names: typing.List[str] = list(table_schema.field_names)
+        self.fields: typing.Dict[str, Field] = {
+            field.name: field for field in table_schema.fields
+        }
+
+        self.fields_by_type: typing.Dict[str, typing.List[Field]] = {}
+        for field in table_schema.fields:
+            self.fields_by_type.setdefault(field.type, []).append(field)
+
+        # For string enums, the field has the "enum" constraint. For enums that
+        # are converted to integers, the field has "enum_mapping" in its descriptor.
+        self.enum_fields: typing.List[Field] = [
+            field
+            for field in table_schema.fields
+            if "enum" in field.constraints.keys()
+            or "enum_mapping" in field.descriptor.keys()
+        ]
+        # Options of each enum and boolean field, keyed by field name.
+        self.enum_options: typing.Dict[str, typing.List[str]] = {
+            field.name: get_enum_options(field)
+            for field in self.enum_fields + self.get_fields_by_type("boolean")
+        }
+        # Lowercase options of each enum and boolean field, for case-insensitive
+        # comparisons.
+        self.lowercase_enum_options: typing.Dict[str, typing.Set[str]] = {
+            field_name: {option.lower() for option in options}
+            for field_name, options in self.enum_options.items()
+        }
+
+        self.allows_multiple: typing.Set[str] = {
+            field.name
+            for field in table_schema.fields
+            if field.descriptor.get("allows_multiple")
+        }
+        self.required_field_names: typing.List[str] = [
+            field.name for field in table_schema.fields if field.required
+        ]
+        # Enums (including MilestoneFlag) and booleans that only allow a single
+        # value. Their values are stored as categoricals.
+        self.categorical_field_names: typing.List[str] = [
+            field.name
+            for field in table_schema.fields
+            if field.name in self.enum_options
+            and field.name not in self.allows_multiple
+        ]
+
+        # Built the first time they are needed (see get_column_format_fields),
+        # since they can't be built for schemas with invalid milestones.
+        self._table_schema: Schema = table_schema
+        self._column_format_fields: typing.Optional[
+            typing.Tuple[FieldNamesByMilestone, FieldNamesAdmin]
+        ] = None
+        self._column_format_field_names: typing.Optional[typing.List[str]] = None
+
+    def get_fields_by_type(self, type: str) -> typing.List[Field]:
+        return self.fields_by_type.get(type, [])
+
+    def get_column_format_fields(
+        self,
+    ) -> typing.Tuple[FieldNamesByMilestone, FieldNamesAdmin]:
+        if self._column_format_fields is None:
+            self._column_format_fields = _build_column_format_fields(self._table_schema)
+        return self._column_format_fields
+
+    def get_column_format_field_names(self) -> typing.List[str]:
+        """Returns the valid field names for column formatted data."""
+        if self._column_format_field_names is None:
+            (
+                field_names_by_milestone,
+                field_names_admin,
+            ) = self.get_column_format_fields()
+            field_names = list(field_names_admin)
+            for fields_for_milestone in field_names_by_milestone.values():
+                field_names += list(fields_for_milestone.keys())
+            self._column_format_field_names = field_names
+        return self._column_format_field_names
+
+
+# Number of schemas whose index is kept in memory.
+SCHEMA_INDEX_CACHE_SIZE = 8
+
+# Schema indexes, keyed by the hash of the descriptor they were built from.
+_schema_index_cache: "collections.OrderedDict[str, SchemaIndex]" = (
+    collections.OrderedDict()
+)
+
+# Hashes of recently used schemas, keyed by the id of the schema. The schema and
+# its fields are kept with the hash: the schema so that its id can't be reused,
+# and the fields because tableschema replaces them when a changed descriptor is
+# committed, which means that the hash has to be computed again.
+_schema_hash_cache = collections.OrderedDict()
+
+
+def get_schema_hash(table_schema: Schema) -> str:
+    """Returns a hash of the content of the schema's descriptor."""
+    key = id(table_schema)
+    if key in _schema_hash_cache:
+        _, fields, schema_hash = _schema_hash_cache[key]
+        if fields is table_schema.fields:
+            _schema_hash_cache.move_to_end(key)
+            return schema_hash
+
+    schema_hash = hashlib.sha256(
+        json.dumps(table_schema.descriptor, sort_keys=True).encode()
+    ).hexdigest()
+    _schema_hash_cache[key] = (table_schema, table_schema.fields, schema_hash)
+    _schema_hash_cache.move_to_end(key)
+    if len(_schema_hash_cache) > SCHEMA_INDEX_CACHE_SIZE:
+        _schema_hash_cache.popitem(last=False)
+    return schema_hash
+
+
+def get_schema_index(table_schema: Schema) -> SchemaIndex:
+    """Returns the SchemaIndex of a schema.
+
+    Indexes are cached by the content of the schema, so schemas loaded from the
+    same file share an index, and a schema that was changed gets a new one.
+    """
+    key = get_schema_hash(table_schema)
+    if key in _schema_index_cache:
+        _schema_index_cache.move_to_end(key)
+        return _schema_index_cache[key]
+
+    index = _schema_index_cache[key] = SchemaIndex(table_schema)
+    if len(_schema_index_cache) > SCHEMA_INDEX_CACHE_SIZE:
+        _schema_index_cache.popitem(last=False)
+    return index
+
+
 def get_column_format_fields(
     table_schema: Schema,
 ) -> typing.Tuple[FieldNamesByMilestone, FieldNamesAdmin]:
@@ -36,7 +211,16 @@ def get_column_format_fields(
            [
              admin_field1, admin_field2, ...
            ]
+
+    They are read from the schema's index, so they must not be modified.
     """
+    return get_schema_index(table_schema).get_column_format_fields()
+
+
+def _build_column_format_fields(
+    table_schema: Schema,
+) -> typing.Tuple[FieldNamesByMilestone, FieldNamesAdmin]:
+    """Builds the field names returned by get_column_format_fields."""
     # Retrieve the values described here:
     # https://github.com/GIIMSC/goodwilldatainitiative-etl/blob/master/etl/schemas/mission_impact_table_schema.json#L2250
     milestone_names: typing.List[str] = get_milestone_names(table_schema)
@@ -81,24 +265,42 @@ def get_column_format_fields(
 
 
 def get_valid_field_names(table_schema: Schema, row_format: bool) -> typing.List[str]:
+    index = get_schema_index(table_schema)
     if row_format:
-        return table_schema.field_names
+        return list(index.field_names)
+
+    return list(index.get_column_format_field_names())
+
 
-    field_names_by_milestone, field_names_admin = get_column_format_fields(table_schema)
-    valid_field_names: typing.List[str] = field_names_admin
-    for _, fields_for_milestone in field_names_by_milestone.items():
-        valid_field_names = valid_field_names + list(fields_for_milestone.keys())
+def get_categorical_field_names(table_schema: Schema) -> typing.List[str]:
+    """Returns the names of the fields whose values are stored as categoricals:
+    enums (including MilestoneFlag) and booleans that only allow a single value."""
+    return list(get_schema_index(table_schema).categorical_field_names)
 
-    return valid_field_names
 
+# Hashes of the schemas that were found to be valid, so that they aren't
+# validated again.
+_valid_schema_hashes: typing.Set[str] = set()
 
-def validate_schema(table_schema: Schema) -> bool:
+
+def validate_schema(
+    table_schema: Schema, cache_dir: typing.Optional[str] = None
+) -> bool:
     """Returns True if table_schema appears to be valid for pipeline processing.
 
     This will only fail if the schema itself or pipeline code are incorrect, so
     the local Goodwills need only make sure that the maintainers are aware of
-    the bug.
+    the bug. Schemas whose content was already found to be valid aren't checked
+    again. If cache_dir is given, schemas found valid by other processes (such as
+    the task that loaded the schema) aren't checked again either.
     """
+    schema_hash = get_schema_hash(table_schema)
+    if schema_hash in _valid_schema_hashes:
+        return True
+    if cache_dir is not None and _is_marked_valid(schema_hash, cache_dir):
+        _valid_schema_hashes.add(schema_hash)
+        return True
+
     is_valid = True
     milestone_count = len(get_milestone_names(table_schema))
     for field in table_schema.fields:
@@ -163,8 +365,136 @@ def validate_schema(table_schema: Schema) -> bool:
         is_valid = False
         logging.error("Schema must include column-based milestone names.")
 
+    if is_valid:
+        _valid_schema_hashes.add(schema_hash)
+        if cache_dir is not None:
+            _mark_valid(schema_hash, cache_dir)
     return is_valid
 
 
+def _get_valid_marker_filename(schema_hash: str, cache_dir: str) -> str:
+    """Returns the name of the file that marks a schema as valid. The version is
+    part of the name, so that a change to validate_schema invalidates it."""
+    return os.path.join(cache_dir, f"{schema_hash}.v{SCHEMA_CACHE_VERSION}.valid")
+
+
+def _is_marked_valid(schema_hash: str, cache_dir: str) -> bool:
+    return is_private(cache_dir) and is_private(
+        _get_valid_marker_filename(schema_hash, cache_dir)
+    )
+
+
+def _mark_valid(schema_hash: str, cache_dir: str):
+    """Marks a schema as valid in the compiled schema cache. Failures are only
+    logged, since the schema is then validated again."""
+    marker_filename = _get_valid_marker_filename(schema_hash, cache_dir)
+    if not make_private_dir(cache_dir):
+        return
+    try:
+        os.close(
+            os.open(marker_filename, os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        )
+    except OSError:
+        logging.debug("Could not mark schema as valid in %s.", marker_filename)
+
+
+def _load_compiled_schema(schema_filename: str, cache_dir: str) -> Schema:
+    """Loads a schema from the compiled schema cache, compiling it if needed.
+
+    A compiled schema holds the schema, its SchemaIndex and whether it is valid.
+    Valid schemas are also marked as valid in the cache (see validate_schema).
+    It is keyed by the path of the schema file, and is only used if the file's
+    modification time and content hash haven't changed since it was compiled.
+    """
+    path = os.path.abspath(schema_filename)
+    with open(path, "rb") as f:
+        content = f.read()
+    key = {
+        "version": SCHEMA_CACHE_VERSION,
+        "tableschema_version": tableschema.__version__,
+        "path": path,
+        "mtime_ns": os.stat(path).st_mtime_ns,
+        "file_hash": hashlib.sha256(content).hexdigest(),
+    }
+    cache_filename = os.path.join(
+        cache_dir, hashlib.sha256(path.encode()).hexdigest() + ".pickle"
+    )
+
+    use_cache = make_private_dir(cache_dir)
+    compiled = None
+    if use_cache and is_private(cache_filename):
+        compiled = _read_compiled_schema(cache_filename)
+    if not isinstance(compiled, dict) or compiled.get("key") != key:
+        compiled = _compile_schema(json.loads(content), key)
+        if use_cache:
+            _write_compiled_schema(compiled, cache_dir, cache_filename)
+
+    # Register the hash and index of the schema, so they aren't computed again.
+    schema, index, schema_hash = (
+        compiled["schema"],
+        compiled["index"],
+        compiled["schema_hash"],
+    )
+    _schema_hash_cache[id(schema)] = (schema, schema.fields, schema_hash)
+    _schema_index_cache[schema_hash] = index
+    for cache in (_schema_hash_cache, _schema_index_cache):
+        if len(cache) > SCHEMA_INDEX_CACHE_SIZE:
+            cache.popitem(last=False)
+    if compiled["is_valid"]:
+        _valid_schema_hashes.add(schema_hash)
+        # Let the tasks that get the schema from this one skip validating it.
+        if use_cache and not _is_marked_valid(schema_hash, cache_dir):
+            _mark_valid(schema_hash, cache_dir)
+    return schema
+
+
+def _read_compiled_schema(cache_filename: str):
+    """Returns the compiled schema unpickled from cache_filename, or None if it
+    can't be read."""
+    try:
+        with open(cache_filename, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    # Unpickling can raise almost any exception if the file is corrupted.
+    except Exception:
+        logging.debug("Could not read compiled schema %s.", cache_filename)
+    return None
+
+
+def _compile_schema(descriptor: dict, key: dict) -> dict:
+    """Returns a compiled schema of a schema descriptor."""
+    schema = Schema(descriptor)
+    is_valid = validate_schema(schema)
+    index = SchemaIndex(schema)
+    if is_valid:
+        # Build everything now, so nothing is built after loading.
+        index.get_column_format_field_names()
+    return {
+        "key": key,
+        "schema": schema,
+        "index": index,
+        "schema_hash": get_schema_hash(schema),
+        "is_valid": is_valid,
+    }
+
+
+def _write_compiled_schema(compiled: dict, cache_dir: str, cache_filename: str):
+    """Writes a compiled schema to the cache. Failures are only logged, since the
+    schema can still be used."""
+    temp_filename = None
+    try:
+        # Write to a temporary file first, so concurrent tasks never read a
+        # partially written compiled schema.
+        with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as f:
+            temp_filename = f.name
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, cache_filename)
+    except (OSError, pickle.PicklingError):
+        logging.debug("Could not write compiled schema %s.", cache_filename)
+        if temp_filename is not None and os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+
 def airflow_load_schema(**kwargs):
-    return get_schema(MISSION_IMPACT_SCHEMA_FILE)
+    return get_schema(MISSION_IMPACT_SCHEMA_FILE, cache_dir=SCHEMA_CACHE_DIR)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from etl.helpers import cache_dir
+
+"""Unit tests for the cache directories.
+
+Run with `python -m etl.helpers.test_cache_dir`.
+"""
+
+
+class CacheDirTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_default_cache_dir(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.temp_dir.name}):
+            self.assertEqual(
+                os.path.join(self.temp_dir.name, "goodwill_etl", "schemas"),
+                cache_dir.get_default_cache_dir("schemas"),
+            )
+
+    def test_make_private_dir(self):
+        self.assertTrue(cache_dir.make_private_dir(self.cache_dir))
+        self.assertEqual(0o700, os.stat(self.cache_dir).st_mode & 0o777)
+        self.assertTrue(cache_dir.make_private_dir(self.cache_dir))
+
+    def test_make_private_dir_writable_by_others(self):
+        os.makedirs(self.cache_dir)
+        for mode in [0o770, 0o707, 0o777]:
+            with self.subTest(mode=oct(mode)):
+                os.chmod(self.cache_dir, mode)
+                self.assertFalse(cache_dir.make_private_dir(self.cache_dir))
+
+    def test_make_private_dir_owned_by_other_user(self):
+        os.makedirs(self.cache_dir, mode=0o700)
+        with patch.object(os, "getuid", return_value=os.getuid() + 1):
+            self.assertFalse(cache_dir.make_private_dir(self.cache_dir))
+
+    def test_make_private_dir_symlink(self):
+        os.makedirs(self.cache_dir, mode=0o700)
+        link = os.path.join(self.temp_dir.name, "link")
+        os.symlink(self.cache_dir, link)
+        self.assertFalse(cache_dir.make_private_dir(link))
+
+    def test_make_private_dir_not_a_directory(self):
+        open(self.cache_dir, "w").close()
+        self.assertFalse(cache_dir.make_private_dir(os.path.join(self.cache_dir, "a")))
+
+    def test_is_private_missing_file(self):
+        self.assertFalse(cache_dir.is_private(self.cache_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import datetime
+import unittest
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from tableschema import exceptions, Schema
+
+from etl.helpers import casters, table_schema
+from etl.helpers.data_processor import FieldPlan, compile_field_plans
+
+"""Unit tests for the native casters.
+
+Run with `python -m etl.helpers.test_casters`.
+"""
+
+VALUES = [
+    "",
+    " ",
+    "1",
+    " 2 ",
+    "3.0",
+    "-1",
+    "1_000",
+    "20,000.00",
+    "1e3",
+    "nan",
+    "inf",
+    "abc",
+    "true",
+    " False ",
+    "TRUE",
+    "0",
+    "15-2030",
+    "15-20301",
+    "Yes",
+    "1/5/1956",
+    "2018-10-01",
+    "bad date",
+    "maximum",
+    0,
+    1,
+    5,
+    -3,
+    2.0,
+    2.5,
+    Decimal("3"),
+    Decimal("NaN"),
+    True,
+    False,
+    np.int64(4),
+    datetime.date(2019, 1, 2),
+    datetime.datetime(2019, 1, 2),
+    datetime.datetime(2019, 1, 2, 3, 4),
+    [1],
+]
+
+
+DATES = [
+    "2018-10-01",
+    " 2018-10-01",
+    "x2018-10-01",
+    "2018-10-01T00:00:00.000+0000",
+    "2018-10-01T23:59:59Z",
+    "2018-10-01 10:00",
+    "2018-10-01T24:00:00",
+    "10/1/2018",
+    "01/05/1956",
+    "13/1/2018",
+    "2/30/2018",
+    "2/29/2020",
+    "10-1-2018",
+    "2018/1/5",
+    "0999-01-01",
+    "9999-12-31",
+    "١/5/2018",
+    "bad date",
+]
+
+
+def cast_with_tableschema(field, value):
+    try:
+        return (field.cast_value(value, constraints=True), None)
+    except exceptions.CastError as e:
+        return (None, casters.cast_error_code(e))
+
+
+class CastersTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(
+            "etl/schemas/mission_impact_table_schema.json"
+        )
+        self.plans = compile_field_plans(self.schema, {})
+
+    def test_schema_fields_are_native(self):
+        self.assertTrue(all(plan.native_cast for plan in self.plans.values()))
+
+    def test_cast_value_matches_tableschema(self):
+        for plan in self.plans.values():
+            for value in VALUES:
+                with self.subTest(field=plan.name, value=value):
+                    # Compared as reprs, since Decimal("NaN") != Decimal("NaN").
+                    self.assertEqual(
+                        repr(cast_with_tableschema(plan.field, value)),
+                        repr(casters.cast_value(plan, value)),
+                    )
+
+    def test_cast_column_matches_cast_value(self):
+        values = pd.Series(VALUES * 2, dtype="object")
+        for plan in self.plans.values():
+            with self.subTest(field=plan.name):
+                result, reason_codes = casters.cast_column(plan, values)
+                expected = [casters.cast_value(plan, value) for value in values]
+                self.assertEqual(repr(expected), repr(list(zip(result, reason_codes))))
+
+    def test_parse_date_column_matches_cast_value(self):
+        plan = self.plans["DateOfBirth"]
+        dates = pd.Series(DATES, dtype="object")
+        for date_format in casters.DATE_FORMATS:
+            with self.subTest(date_format=date_format):
+                casters._date_format_cache[("member", plan.name)] = date_format
+                parsed = casters.parse_date_column(plan, dates, "member")
+                for value, date in zip(DATES, parsed):
+                    if date is not None:
+                        self.assertEqual((date, None), casters.cast_value(plan, value))
+                self.assertTrue(any(date is not None for date in parsed))
+        casters._date_format_cache.clear()
+
+    def test_caches_date_format_by_member(self):
+        plan = self.plans["DateOfBirth"]
+        casters.cast_column(
+            plan, pd.Series(["10/1/2018", "10/3/2018", "2018-10-01"]), "a"
+        )
+        casters.cast_column(plan, pd.Series(["2018-10-01", "bad date"]), "b")
+        self.assertEqual("us", casters._date_format_cache[("a", plan.name)])
+        self.assertEqual("iso", casters._date_format_cache[("b", plan.name)])
+
+        result, reason_codes = casters.cast_column(
+            plan, pd.Series(["2018-10-02", "10/2/2018", "bad date"]), "a"
+        )
+        self.assertEqual(
+            [datetime.date(2018, 10, 2), datetime.date(2018, 10, 2), None],
+            list(result),
+        )
+        self.assertEqual([None, None, "type"], list(reason_codes))
+        self.assertEqual(
+            "bad date is not a valid date",
+            casters.reason_message("type", "bad date", plan.field),
+        )
+        casters._date_format_cache.clear()
+
+    def test_reason_codes(self):
+        plans = self.plans
+        self.assertEqual((None, "type"), casters.cast_value(plans["Zipcode"], "abc"))
+        self.assertEqual((None, "minimum"), casters.cast_value(plans["Zipcode"], "-1"))
+        self.assertEqual(
+            (None, "maximum"), casters.cast_value(plans["Zipcode"], 100000)
+        )
+        self.assertEqual((None, "pattern"), casters.cast_value(plans["SOC"], "15"))
+        self.assertEqual(
+            (None, "enum"), casters.cast_value(plans["MilestoneFlag"], "Start")
+        )
+        self.assertEqual(
+            (None, "required"), casters.cast_value(plans["CaseNumber"], "")
+        )
+
+    def test_reason_message(self):
+        field = self.schema.get_field("Zipcode")
+        self.assertEqual(
+            "Zipcode must be within the range [0, 99999]",
+            casters.reason_message("minimum", -1, field),
+        )
+        self.assertEqual(
+            "maximum is not a valid integer",
+            casters.reason_message("type", "maximum", field),
+        )
+        self.assertEqual(
+            "SOC should be in the format ##-####",
+            casters.reason_message("pattern", "15", self.schema.get_field("SOC")),
+        )
+
+    def test_falls_back_to_tableschema(self):
+        schema = Schema(
+            {
+                "fields": [
+                    {"name": "Email", "type": "string", "format": "email"},
+                    {"name": "Code", "type": "string", "constraints": {"minLength": 2}},
+                    {"name": "Year", "type": "year"},
+                ]
+            }
+        )
+        for field in schema.fields:
+            plan = FieldPlan(field, None)
+            self.assertFalse(plan.native_cast)
+            for value in ["a@b.co", "a", "ab", "2019", "x"]:
+                with self.subTest(field=field.name, value=value):
+                    self.assertEqual(
+                        cast_with_tableschema(field, value),
+                        casters.cast_value(plan, value),
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from etl.helpers import categorical
+
+"""Unit tests for the categorical column helpers.
+
+Run with `python -m etl.helpers.test_categorical`.
+"""
+
+
+class CategoricalTest(unittest.TestCase):
+    def test_recode(self):
+        column = pd.Series(
+            pd.Categorical(["a", "b", None, "c", "a"]), index=[5, 6, 7, 8, 9]
+        )
+
+        recoded = categorical.recode(column, ["x", "x", None])
+
+        self.assertEqual("category", recoded.dtype)
+        self.assertEqual(["x"], list(recoded.cat.categories))
+        self.assertEqual([5, 6, 7, 8, 9], list(recoded.index))
+        self.assertEqual([0, 0, -1, -1, 0], list(recoded.cat.codes))
+
+    def test_map_categories(self):
+        column = pd.Series(pd.Categorical([" a", "a ", None, "b"]))
+
+        mapped = categorical.map_categories(column, str.strip, na_value="")
+
+        self.assertEqual(["a", "a", "", "b"], list(mapped))
+        self.assertEqual(["a", "b", ""], list(mapped.cat.categories))
+
+    def test_strings_to_categorical(self):
+        for values, expected in [
+            (["a", None, "b"], ["a", "", "b"]),
+            ([1.0, np.nan, 2.5], ["1.0", "", "2.5"]),
+            ([1, True, "1"], ["1", "True", "1"]),
+            ([True, False, True], ["True", "False", "True"]),
+        ]:
+            with self.subTest(values=values):
+                column = pd.Series(values)
+                strings = categorical.strings_to_categorical(column)
+                self.assertEqual("category", strings.dtype)
+                self.assertEqual(expected, list(strings))
+                self.assertEqual(list(column.fillna("").astype(str)), list(strings))
+
+    def test_to_objects(self):
+        column = pd.Series(pd.Categorical.from_codes([1, -1, 0], [3, 4]))
+
+        objects = categorical.to_objects(column)
+
+        self.assertEqual([4, None, 3], list(objects))
+        self.assertIs(type(objects[0]), int)
+
+    def test_concat(self):
+        datasets = [
+            pd.DataFrame({"a": pd.Categorical(["x", "y"]), "b": ["1", "2"]}),
+            pd.DataFrame({"b": ["3"], "c": pd.Categorical(["z"])}),
+            pd.DataFrame({"a": pd.Categorical(["w"]), "c": ["v"]}),
+        ]
+
+        combined = categorical.concat(datasets)
+
+        self.assertEqual(["a", "b", "c"], list(combined.columns))
+        self.assertEqual("category", combined["a"].dtype)
+        self.assertEqual(["", "x", "y", "w"], list(combined["a"].cat.categories))
+        self.assertEqual("object", combined["c"].dtype)
+        pd.util.testing.assert_frame_equal(
+            pd.concat(datasets, ignore_index=True, sort=True).fillna("").astype(str),
+            combined.fillna("").astype(str),
+        )
+        # The datasets are not modified.
+        self.assertEqual(["x", "y"], list(datasets[0]["a"].cat.categories))
+
+
+if __name__ == "__main__":
+    unittest.main()
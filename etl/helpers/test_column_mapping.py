@@ -4,7 +4,7 @@ import pandas as pd
 from tableschema import Schema
 
 from etl.helpers import common
-from etl.helpers.column_mapping import ColumnMappingValidator
+from etl.helpers.column_mapping import ColumnMappingLoader, ColumnMappingValidator
 
 TEST_SCHEMA: Schema = Schema(
     {
@@ -229,5 +229,40 @@ class ColumnMappingValidatorTest(unittest.TestCase):
         )
 
 
+class ColumnMappingLoaderTest(unittest.TestCase):
+    def test_get_dropped_column_names_from_dataframe(self):
+        column_mapping_df = pd.DataFrame(
+            data={
+                INTERNAL_COLUMN_NAME_COLUMN_NAME: [
+                    "internal_column_name1",
+                    "internal_column_name2",
+                ],
+                GII_FIELD_NAME_COLUMN_NAME: ["external_column_name1", None],
+            }
+        )
+
+        self.assertEqual(
+            ["internal_column_name2"],
+            ColumnMappingLoader.get_dropped_column_names_from_dataframe(
+                column_mapping_df
+            ),
+        )
+
+    def test_get_dropped_column_names_from_invalid_dataframe(self):
+        column_mapping_df = pd.DataFrame(
+            data={INTERNAL_COLUMN_NAME_COLUMN_NAME: ["internal_column_name1"]}
+        )
+
+        self.assertEqual(
+            [],
+            ColumnMappingLoader.get_dropped_column_names_from_dataframe(
+                column_mapping_df
+            ),
+        )
+        self.assertEqual(
+            [], ColumnMappingLoader.get_dropped_column_names_from_dataframe(None)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from etl.helpers import csv_ingestion
+
+"""Unit tests for reading extracted data files.
+
+Run with `python -m etl.helpers.test_csv_ingestion`.
+"""
+
+TEST_CSV = (
+    "id,zip,count,,notes,notes,dropped\n"
+    "1,02134, 1 ,x,  a b  ,NA,1\n"
+    "2,,2.0,y,,null,2\n"
+    "3, , , ,N/A,c,3\n"
+)
+
+
+class CsvIngestionTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as csv_file:
+            csv_file.write(TEST_CSV)
+        self.filename = csv_file.name
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def _assert_read(self, engine):
+        dataset = csv_ingestion.read_csv(self.filename, ["dropped"], engine=engine)
+
+        expected_dataset = pd.DataFrame(
+            data={
+                "id": ["1", "2", "3"],
+                "zip": ["02134", None, ""],
+                "count": ["1", "2.0", ""],
+                "Unnamed: 3": ["x", "y", ""],
+                "notes": ["a b", None, None],
+                "notes.1": [None, None, "c"],
+            }
+        )
+        # Missing values are NaN or None, depending on the engine.
+        pd.util.testing.assert_frame_equal(
+            expected_dataset.fillna("<missing>"), dataset.fillna("<missing>")
+        )
+
+    def test_read_csv_pandas(self):
+        self._assert_read(csv_ingestion.PANDAS_ENGINE)
+
+    @unittest.skipIf(csv_ingestion.pyarrow is None, "pyarrow is not installed")
+    def test_read_csv_pyarrow(self):
+        self._assert_read(csv_ingestion.PYARROW_ENGINE)
+
+    def test_read_csv_all_columns(self):
+        dataset = csv_ingestion.read_csv(
+            self.filename, engine=csv_ingestion.PANDAS_ENGINE
+        )
+
+        self.assertEqual(
+            ["id", "zip", "count", "Unnamed: 3", "notes", "notes.1", "dropped"],
+            list(dataset.columns),
+        )
+
+    def test_read_csv_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            csv_ingestion.read_csv(self.filename, engine="python")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import concurrent.futures
 import datetime
 from decimal import Decimal
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 import pandas as pd
 
 from etl.helpers.field_mapping.common import FieldMapping
@@ -28,6 +32,30 @@ FAKE_DATA = pd.DataFrame(
     }
 )
 
+# Rows with a mix of invalid values and values that are hard to transform or cast.
+FAKE_INVALID_DATA = pd.DataFrame(
+    {
+        "MilestoneFlag": ["two years", "Exit", "3.0", "intake", "Midpoint"],
+        "CaseNumber": ["CN-6", "CN-7", "CN-8", "CN-9", "CN-10"],
+        "MemberOrganization": ["aaa-111"] * 5,
+        "HourlyWage": ["8,8", " 12.12 ", "1e3", "-1", "abc"],
+        "HouseholdIncome": ["20 000", "$30,000", "1_000", "NaN", 7],
+        "StackableCredentials": ["1.5", "6.0", "1e1", "-0", 3],
+        "SOC": [4, "15-2030.", ".", "1511-2030.00", " 15-2030 "],
+        "State": ["North Carolina", "RANDOM STATE", 7, "ky", " wa "],
+        "DateOfBirth": ["2018-10-01", "SOME DAY", "10/1/2018", 5, "1/5/56"],
+        "CategoriesIdentifyWith": [
+            ["5", "g"],
+            "1",
+            ["", None, "LGBT"],
+            ["not_a_match", "3"],
+            [],
+        ],
+        "ConvictedInLastYear": ["aa", "t", 1, "2.0", " no "],
+        "SelfEfficacyScore1": [1, 10, "wrong", "0", "agree"],
+    }
+)
+
 EXPECTED_OUTPUT = pd.DataFrame(
     {
         "MilestoneFlag": ["Intake", "TwoYears", "Exit", "Intake", "Midpoint"],
@@ -383,6 +411,25 @@ class TestDataProcessor(unittest.TestCase):
 
         pd.util.testing.assert_frame_equal(self.expected_df, output_df)
 
+    @patch.object(data_processor, "DROPPED_ROWS_LOG_SAMPLE_SIZE", 1)
+    def test_handleRequired_logsSummaryAndSample(self):
+        self.input_df["CaseNumber"] = ["CN-1", "CN-2", "CN-3", "", "CN-5"]
+        self.input_df["MilestoneFlag"] = ["Intake", "TwoYears", "Exit", None, None]
+
+        with self.assertLogs(level="ERROR") as logs:
+            self.processor.process(self.input_df)
+
+        self.assertEqual(
+            [
+                "Dropping 2 rows due to invalid/missing values for critical fields:\n\t"
+                "{'MilestoneFlag': 2, 'CaseNumber': 1}",
+                "Dropping row 3 due to invalid/missing value for critical field(s):\n\t"
+                "{'MilestoneFlag': None, 'CaseNumber': ''}",
+                "1 more rows were dropped due to invalid/missing values for critical fields",
+            ],
+            [record.getMessage() for record in logs.records],
+        )
+
     def test_handleRequired_unmappabbleMilestoneFlag(self):
         self.input_df["MilestoneFlag"] = ["placeholder_string", "", 3, "3.0", "333"]
         output_df, invalid_values, dropped_rows = self.processor.process(self.input_df)
@@ -559,12 +606,412 @@ class TestDataProcessor(unittest.TestCase):
             }
         )
 
-        dataset_deduped, dropped_records = self.processor._drop_duplicates(
-            input_dataframe
-        )
+        deduped = self.processor._drop_duplicates(input_dataframe)
+        dataset_deduped, dropped_records, duplicate_group_sizes = deduped
 
         pd.util.testing.assert_frame_equal(expected_deduped_dataframe, dataset_deduped)
         pd.util.testing.assert_frame_equal(expected_dropped_records, dropped_records)
+        self.assertEqual(
+            {("CASEID-xyzxyz", "Intake", "abc"): 3}, duplicate_group_sizes.to_dict()
+        )
+
+
+class TestDataProcessorCellEngine(TestDataProcessor):
+    """Runs every DataProcessor test against the reference cell engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, engine=data_processor.CELL_ENGINE
+        )
+
+
+class TestDataProcessorFactorizedEngine(TestDataProcessor):
+    """Runs every DataProcessor test against the factorized engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, engine=data_processor.FACTORIZED_ENGINE
+        )
+
+    def test_countsInvalidValues(self):
+        self.input_df["State"] = ["NC", "RANDOM STATE", "RANDOM STATE", 7, None]
+        self.input_df["CategoriesIdentifyWith"] = [["g", "5"], ["g"], "1", None, []]
+        self.processor.process(self.input_df)
+
+        self.assertEqual(
+            {"RANDOM STATE": 2, 7: 1}, self.processor.invalid_value_counts["State"]
+        )
+        self.assertEqual(
+            {"g": 2}, self.processor.invalid_value_counts["CategoriesIdentifyWith"]
+        )
+        self.assertEqual({}, self.processor.invalid_value_counts["SOC"])
+
+
+class TestDataProcessorParallel(TestDataProcessor):
+    """Runs every DataProcessor test with the non-required columns processed in parallel."""
+
+    def setUp(self):
+        super().setUp()
+        self.processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, num_workers=2
+        )
+
+    def test_countsInvalidValues(self):
+        self.processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS,
+            self.schema,
+            engine=data_processor.FACTORIZED_ENGINE,
+            num_workers=2,
+        )
+        self.input_df["State"] = ["NC", "RANDOM STATE", "RANDOM STATE", 7, None]
+        self.input_df["SOC"] = ["15-2030", 4, 4, None, None]
+        self.processor.process(self.input_df)
+
+        self.assertEqual(
+            {"RANDOM STATE": 2, 7: 1}, self.processor.invalid_value_counts["State"]
+        )
+        self.assertEqual({4: 2}, self.processor.invalid_value_counts["SOC"])
+
+
+class TestDataProcessorAggregatedLogging(TestDataProcessor):
+    """Runs every DataProcessor test with a summary of the invalid values of each
+    column logged, instead of every invalid value."""
+
+    def setUp(self):
+        super().setUp()
+        self.processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS,
+            self.schema,
+            invalid_value_logging=data_processor.AGGREGATED_LOGGING,
+        )
+
+    def test_logsSummaryPerColumn(self):
+        self.input_df["State"] = ["NC", "RANDOM STATE", "RANDOM STATE", 7, None]
+
+        with self.assertLogs(level="ERROR") as logs:
+            output_df, invalid_values, dropped_rows = self.processor.process(
+                self.input_df
+            )
+
+        self.assertEqual(3, len(invalid_values))
+        self.assertEqual(
+            [
+                "3 invalid values for State:\n"
+                "\t2 x RANDOM STATE is not a valid state (Case Numbers: CN-2, CN-3)\n"
+                "\t1 x 7 is not a valid state (Case Numbers: CN-4)"
+            ],
+            [record.getMessage() for record in logs.records],
+        )
+
+
+class TestDataProcessorInChunks(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(
+            "etl/schemas/mission_impact_table_schema.json"
+        )
+        # Duplicates of CN-1 and CN-7 are in different chunks.
+        self.input_df = pd.concat(
+            [FAKE_DATA, FAKE_INVALID_DATA, FAKE_DATA.iloc[[0]], FAKE_INVALID_DATA],
+            ignore_index=True,
+        )
+        self.input_df.loc[11:, "CaseNumber"] = ["CN-11", "CN-7", "", "CN-13", None]
+
+    def _process_in_chunks(self, chunk_size):
+        processor = data_processor.DataProcessor(FAKE_FIELD_MAPPINGS, self.schema)
+        output_df = pd.concat(
+            processor.process_in_chunks(self.input_df, chunk_size=chunk_size)
+        )
+        return output_df, processor.invalid_values, processor.dropped_rows
+
+    def test_sameOutputAsProcess(self):
+        processor = data_processor.DataProcessor(FAKE_FIELD_MAPPINGS, self.schema)
+        expected_df, expected_invalid_values, expected_dropped_rows = processor.process(
+            self.input_df
+        )
+
+        for chunk_size in [1, 4, 7, 100]:
+            output_df, invalid_values, dropped_rows = self._process_in_chunks(
+                chunk_size
+            )
+
+            pd.util.testing.assert_frame_equal(expected_df, output_df)
+            self.assertCountEqual(
+                map(repr, expected_invalid_values), map(repr, invalid_values)
+            )
+            self.assertEqual(len(expected_dropped_rows), len(dropped_rows))
+            for expected, actual in zip(expected_dropped_rows, dropped_rows):
+                self.assertTrue(
+                    expected[data_processor.ROW_KEY].equals(
+                        actual[data_processor.ROW_KEY]
+                    )
+                )
+                self.assertEqual(
+                    {
+                        key: value
+                        for key, value in expected.items()
+                        if key != data_processor.ROW_KEY
+                    },
+                    {
+                        key: value
+                        for key, value in actual.items()
+                        if key != data_processor.ROW_KEY
+                    },
+                )
+
+    def test_dropsDuplicatesAcrossChunks(self):
+        output_df, _, dropped_rows = self._process_in_chunks(chunk_size=5)
+
+        self.assertNotIn("CN-1", output_df["CaseNumber"].tolist())
+        self.assertNotIn("CN-7", output_df["CaseNumber"].tolist())
+        self.assertEqual(
+            ["CN-1", "CN-7", "CN-1", "CN-7"],
+            [
+                row_info[data_processor.ROW_KEY]["CaseNumber"]
+                for row_info in dropped_rows
+                if row_info.get(data_processor.DUPLICATE_ROWS_KEY)
+            ],
+        )
+
+    def test_chunksReadByFunction(self):
+        expected_df, _, expected_dropped_rows = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema
+        ).process(self.input_df)
+        processor = data_processor.DataProcessor(FAKE_FIELD_MAPPINGS, self.schema)
+
+        output_df = pd.concat(
+            processor.process_in_chunks(
+                lambda: (
+                    self.input_df.iloc[start : start + 3]
+                    for start in range(0, len(self.input_df), 3)
+                )
+            )
+        )
+
+        pd.util.testing.assert_frame_equal(expected_df, output_df)
+        self.assertEqual(len(expected_dropped_rows), len(processor.dropped_rows))
+
+    def test_chunksReadFromCsv(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "data.csv")
+            self.input_df.to_csv(filename, index=False)
+            expected_df, _, _ = data_processor.DataProcessor(
+                FAKE_FIELD_MAPPINGS, self.schema
+            ).process(pd.read_csv(filename, dtype=str))
+
+            output_df = pd.concat(
+                data_processor.DataProcessor(
+                    FAKE_FIELD_MAPPINGS, self.schema
+                ).process_in_chunks(
+                    lambda: pd.read_csv(filename, dtype=str, chunksize=4)
+                )
+            )
+
+        pd.util.testing.assert_frame_equal(expected_df, output_df)
+
+    def test_chunksChangedBetweenPasses(self):
+        chunks = [self.input_df.iloc[start : start + 5] for start in [0, 5, 10]]
+        for second_pass_chunks in [chunks[:2], chunks + chunks[:1]]:
+            with self.subTest(num_chunks=len(second_pass_chunks)):
+                passes = iter([chunks, second_pass_chunks])
+                processor = data_processor.DataProcessor(
+                    FAKE_FIELD_MAPPINGS, self.schema
+                )
+
+                with self.assertRaises(ValueError):
+                    list(processor.process_in_chunks(lambda: next(passes)))
+
+    def test_parallelWorkersStartedOncePerDataset(self):
+        processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, num_workers=2
+        )
+        expected_df, _, _ = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema
+        ).process(self.input_df)
+
+        with patch.object(
+            concurrent.futures,
+            "ProcessPoolExecutor",
+            wraps=concurrent.futures.ProcessPoolExecutor,
+        ) as pool:
+            output_df = pd.concat(
+                processor.process_in_chunks(self.input_df, chunk_size=4)
+            )
+
+        pool.assert_called_once()
+        pd.util.testing.assert_frame_equal(expected_df, output_df)
+
+
+class TestEngineParity(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(
+            "etl/schemas/mission_impact_table_schema.json"
+        )
+
+    def _process(self, engine, dataset):
+        return data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, engine=engine
+        ).process(dataset)
+
+    def test_engines_produce_same_output(self):
+        dataset = pd.concat([FAKE_DATA, FAKE_INVALID_DATA], ignore_index=True)
+
+        cell_df, cell_invalid_values, cell_dropped_rows = self._process(
+            data_processor.CELL_ENGINE, dataset
+        )
+        for engine in [
+            data_processor.VECTORIZED_ENGINE,
+            data_processor.FACTORIZED_ENGINE,
+        ]:
+            df, invalid_values, dropped_rows = self._process(engine, dataset)
+
+            pd.util.testing.assert_frame_equal(cell_df, df)
+            self.assertEqual(cell_invalid_values, invalid_values)
+            self.assertEqual(len(cell_dropped_rows), len(dropped_rows))
+
+    def test_categorical_columns_produce_same_output(self):
+        dataset = pd.concat([FAKE_DATA, FAKE_INVALID_DATA], ignore_index=True)
+        categorical_columns = table_schema.get_categorical_field_names(self.schema)
+        categorical_dataset = dataset.copy()
+        for column_name in set(categorical_columns) & set(dataset.columns):
+            categorical_dataset[column_name] = dataset[column_name].astype("category")
+
+        cell_df, cell_invalid_values, cell_dropped_rows = self._process(
+            data_processor.CELL_ENGINE, dataset
+        )
+        for engine in [
+            data_processor.CELL_ENGINE,
+            data_processor.VECTORIZED_ENGINE,
+            data_processor.FACTORIZED_ENGINE,
+        ]:
+            df, invalid_values, dropped_rows = self._process(
+                engine, categorical_dataset
+            )
+
+            self.assertEqual("category", df["MilestoneFlag"].dtype)
+            self.assertEqual("category", df["ConvictedInLastYear"].dtype)
+            pd.util.testing.assert_frame_equal(cell_df, df.astype(object))
+            self.assertEqual(cell_invalid_values, invalid_values)
+            self.assertEqual(len(cell_dropped_rows), len(dropped_rows))
+
+    def test_categorical_columns_count_invalid_values_per_row(self):
+        dataset = FAKE_INVALID_DATA.copy()
+        dataset["ConvictedInLastYear"] = ["aa", "aa", "t", "aa", "bb"]
+        dataset["ConvictedInLastYear"] = dataset["ConvictedInLastYear"].astype(
+            "category"
+        )
+        processor = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, engine=data_processor.FACTORIZED_ENGINE
+        )
+        processor.process(dataset)
+
+        self.assertEqual(
+            {"aa": 3, "bb": 1}, processor.invalid_value_counts["ConvictedInLastYear"]
+        )
+
+    def test_low_copy_produces_same_output(self):
+        for dataset in [
+            FAKE_DATA,
+            pd.concat([FAKE_DATA, FAKE_INVALID_DATA, FAKE_DATA], ignore_index=True),
+        ]:
+            expected_df, expected_invalid_values, expected_dropped_rows = self._process(
+                data_processor.VECTORIZED_ENGINE, dataset
+            )
+            df, invalid_values, dropped_rows = data_processor.DataProcessor(
+                FAKE_FIELD_MAPPINGS, self.schema, low_copy=True
+            ).process(dataset.copy())
+
+            pd.util.testing.assert_frame_equal(expected_df, df)
+            self.assertEqual(expected_invalid_values, invalid_values)
+            self.assertEqual(len(expected_dropped_rows), len(dropped_rows))
+
+    def test_low_copy_processes_in_place(self):
+        dataset = FAKE_DATA.copy()
+        df, _, _ = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, low_copy=True
+        ).process(dataset)
+
+        self.assertIs(dataset, df)
+
+    def test_parallel_produces_same_output(self):
+        serial_df, serial_invalid_values, _ = self._process(
+            data_processor.VECTORIZED_ENGINE, FAKE_INVALID_DATA
+        )
+        df, invalid_values, _ = data_processor.DataProcessor(
+            FAKE_FIELD_MAPPINGS, self.schema, num_workers=3
+        ).process(FAKE_INVALID_DATA)
+
+        pd.util.testing.assert_frame_equal(serial_df, df)
+        self.assertEqual(list(serial_invalid_values), list(invalid_values))
+
+
+class TestFieldPlans(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(
+            "etl/schemas/mission_impact_table_schema.json"
+        )
+        self.field_plans = data_processor.compile_field_plans(
+            self.schema, FAKE_FIELD_MAPPINGS
+        )
+
+    def test_plansAreCompiledForChangedFieldMappings(self):
+        field_mappings = dict(FAKE_FIELD_MAPPINGS)
+        data_processor.DataProcessor(field_mappings, self.schema)
+        field_mappings["MilestoneFlag"] = FieldMapping.from_dict(
+            {"almost_Intake": ("Exit", "Yes")}
+        )
+
+        processor = data_processor.DataProcessor(field_mappings, self.schema)
+
+        self.assertEqual(
+            {"almost_Intake": "Exit"},
+            processor.field_plans["MilestoneFlag"].mapped_values,
+        )
+
+    def test_transformFunctions(self):
+        self.assertIs(
+            data_processor.DataProcessor._transform_enum,
+            self.field_plans["MilestoneFlag"].transform,
+        )
+        self.assertIs(
+            data_processor.DataProcessor._transform_enum,
+            self.field_plans["ConvictedInLastYear"].transform,
+        )
+        self.assertIs(
+            data_processor.DataProcessor._transform_soc,
+            self.field_plans["SOC"].transform,
+        )
+        self.assertIs(
+            data_processor.DataProcessor._transform_state,
+            self.field_plans["State"].transform,
+        )
+        self.assertIs(
+            data_processor.DataProcessor._transform_int,
+            self.field_plans["StackableCredentials"].transform,
+        )
+        self.assertIsNone(self.field_plans["HourlyWage"].transform)
+
+    def test_stringEnumLookupTables(self):
+        plan = self.field_plans["MilestoneFlag"]
+
+        self.assertEqual(
+            {"almost_Intake": "Intake", "two years": "TwoYears", "not_a_match": None},
+            plan.mapped_values,
+        )
+        self.assertEqual("Intake", plan.case_insensitive_enum_options["intake"])
+        self.assertEqual("TwoYears", plan.case_insensitive_enum_options["twoyears"])
+
+    def test_integerEnumLookupTables(self):
+        plan = self.field_plans["CategoriesIdentifyWith"]
+        enum_mapping = plan.field.descriptor["enum_mapping"]
+
+        self.assertTrue(plan.allows_multiple)
+        self.assertEqual(enum_mapping["LGBTQ"], plan.mapped_values["LGBT"])
+        self.assertIsNone(plan.mapped_values["not_a_match"])
+        self.assertEqual(
+            enum_mapping["LGBTQ"], plan.case_insensitive_enum_options["lgbtq"]
+        )
 
 
 if __name__ == "__main__":
@@ -41,6 +41,34 @@ TEST_SCHEMA_COL: tableschema.Schema = tableschema.Schema(
 )
 
 
+def _reference_column_format_to_row_format(table_schema, dataset):
+    """Straightforward version of the column to row format transformation,
+    which moves the data of one milestone at a time."""
+    (
+        field_names_by_milestone,
+        field_names_admin,
+    ) = dataset_shape.table_schema.get_column_format_fields(table_schema)
+    admin_columns = dataset[[c for c in field_names_admin if c in dataset.columns]]
+    datasets = []
+    for milestone_name, fields_for_milestone in field_names_by_milestone.items():
+        milestone_dataset = dataset[
+            [c for c in fields_for_milestone if c in dataset.columns]
+        ].dropna(how="all")
+        if milestone_dataset.empty:
+            continue
+        milestone_dataset = pd.concat(
+            [
+                admin_columns,
+                milestone_dataset.rename(mapper=fields_for_milestone, axis="columns"),
+            ],
+            axis=1,
+            sort=False,
+        )
+        milestone_dataset["MilestoneFlag"] = milestone_name
+        datasets.append(milestone_dataset)
+    return pd.concat(datasets, ignore_index=True, sort=True)
+
+
 class DatasetShapeValidatorTest(unittest.TestCase):
     def test_validate_dataset_shape_row_format_all_columns_mapped(self):
         dataset_shape_validator = dataset_shape.DatasetShapeValidator(
@@ -328,6 +356,72 @@ class DatasetShapeTest(unittest.TestCase):
             expected_shaped_dataset, actual_shaped_dataset
         )
 
+    def test_transform_dataset_shape_col_format_wide(self):
+        # 13 milestones and 300 fields, with thousands of columns of all dtypes.
+        rng = np.random.RandomState(0)
+        milestone_names = ["Milestone%d" % i for i in range(13)]
+        fields = [{"name": "admin%d" % i} for i in range(5)]
+        fields.append({"name": "MilestoneFlag"})
+        for i in range(300):
+            milestones = sorted(
+                rng.choice(13, size=rng.randint(1, 14), replace=False).tolist()
+            )
+            field = {"name": "field%d" % i, "milestones": milestones}
+            if i % 10 == 0:
+                field["custom_milestone_field_names"] = {
+                    str(milestones[0]): "custom_field%d" % i
+                }
+            fields.append(field)
+        schema = tableschema.Schema(
+            {"fields": fields, "column_based_milestone_names": milestone_names}
+        )
+
+        num_rows = 40
+        columns = {"MilestoneFlag": ["x"] * num_rows, "unknown": range(num_rows)}
+        valid_field_names = dataset_shape.table_schema.get_valid_field_names(
+            schema, row_format=False
+        )
+        for i, column_name in enumerate(valid_field_names):
+            if column_name == "MilestoneFlag" or column_name.startswith("Milestone12"):
+                # Leave out a milestone.
+                continue
+            values = rng.randint(0, 5, num_rows)
+            kind = i % 5
+            if kind == 0:
+                columns[column_name] = values
+            elif kind == 1:
+                columns[column_name] = np.where(values == 0, np.nan, values)
+            elif kind == 2:
+                columns[column_name] = np.where(
+                    values == 0, None, values.astype(str)
+                ).astype(object)
+            elif kind == 3:
+                columns[column_name] = values > 2
+            else:
+                columns[column_name] = np.full(num_rows, np.nan)
+        dataset = pd.DataFrame(columns)
+        # Rows without values for the first milestone.
+        for column_name in valid_field_names:
+            if column_name.startswith("Milestone0") and column_name in dataset:
+                dataset[column_name] = dataset[column_name].astype(object)
+                dataset.loc[:9, column_name] = None
+        self.assertGreater(dataset.shape[1], 1500)
+
+        dataset_shape_transformer = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID, schema, {}, row_format=False
+        )
+        actual_shaped_dataset = dataset_shape_transformer._transform_column_format_to_row_format(
+            dataset
+        )
+
+        expected_shaped_dataset = _reference_column_format_to_row_format(
+            schema, dataset
+        )
+        self.assertLess(len(actual_shaped_dataset), 13 * num_rows)
+        pd.util.testing.assert_frame_equal(
+            expected_shaped_dataset, actual_shaped_dataset
+        )
+
     def test_transform_dataset_shape_multiple_values(self):
         dataset_shape_transformer = dataset_shape.DatasetShapeTransformer(
             MEMBER_ORGANIZATION_ID,
@@ -422,6 +516,101 @@ class DatasetShapeTest(unittest.TestCase):
             expected_shaped_dataset, actual_shaped_dataset
         )
 
+    def test_transform_dataset_shape_without_stripping_whitespace(self):
+        dataset_shape_transformer = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID,
+            TEST_SCHEMA,
+            TEST_COLUMN_MAPPING,
+            row_format=True,
+            multiple_val_delimiter=",",
+            strip_whitespace=False,
+        )
+        dataset = pd.DataFrame(data={"field1": ["  1", "2"]})
+
+        actual_shaped_dataset = dataset_shape_transformer.transform_dataset_shape(
+            dataset
+        )
+
+        self.assertEqual(["  1", "2"], actual_shaped_dataset["field1"].tolist())
+
+    def test_transform_dataset_shape_categorical_fields(self):
+        schema = tableschema.Schema(
+            {
+                "fields": [
+                    {"name": "field1"},
+                    {"name": "field2", "type": "boolean"},
+                    {"name": "field3", "constraints": {"enum": ["a", "b"]}},
+                ]
+            }
+        )
+        dataset_shape_transformer = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID, schema, {}, row_format=True
+        )
+        dataset = pd.DataFrame(
+            data={
+                "field1": ["1", None, "3"],
+                "field2": [True, np.nan, False],
+                "field3": [" a", "a ", None],
+            }
+        )
+
+        actual_shaped_dataset = dataset_shape_transformer.transform_dataset_shape(
+            dataset
+        )
+
+        self.assertEqual("object", actual_shaped_dataset["field1"].dtype)
+        self.assertEqual("category", actual_shaped_dataset["field2"].dtype)
+        self.assertEqual("category", actual_shaped_dataset["field3"].dtype)
+        self.assertEqual(
+            ["a", ""], list(actual_shaped_dataset["field3"].cat.categories)
+        )
+        expected_shaped_dataset = pd.DataFrame(
+            data={
+                "field1": ["1", "", "3"],
+                "field2": ["True", "", "False"],
+                "field3": ["a", "a", ""],
+                "MemberOrganization": ["sample_id", "sample_id", "sample_id"],
+                "ForceOverWrite": ["1", "1", "1"],
+            }
+        )
+        pd.util.testing.assert_frame_equal(
+            expected_shaped_dataset, actual_shaped_dataset.astype(object)
+        )
+
+    def test_transform_dataset_shape_low_copy(self):
+        schema = tableschema.Schema(
+            {
+                "fields": [
+                    {"name": "field1"},
+                    {"name": "field2", "constraints": {"enum": ["a", "b"]}},
+                    {"name": "field3", "allows_multiple": True},
+                ]
+            }
+        )
+        column_mapping = dict(TEST_COLUMN_MAPPING, internal_column_name4=None)
+        dataset = pd.DataFrame(
+            data={
+                "internal_column_name1": [" 1", None, 3],
+                "internal_column_name2": ["a ", "b", None],
+                "internal_column_name3": ["3, 5", "4", ""],
+                "internal_column_name4": ["x", "y", "z"],
+            }
+        )
+
+        expected_shaped_dataset = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID, schema, column_mapping, True, ","
+        ).transform_dataset_shape(dataset.copy())
+        actual_shaped_dataset = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID, schema, column_mapping, True, ",", low_copy=True
+        ).transform_dataset_shape(dataset)
+
+        # The dataset is shaped in place.
+        self.assertIs(dataset, actual_shaped_dataset)
+        self.assertEqual("category", actual_shaped_dataset["field2"].dtype)
+        pd.util.testing.assert_frame_equal(
+            expected_shaped_dataset, actual_shaped_dataset
+        )
+
 
 class GatewayDatasetShapeTransformerTest(unittest.TestCase):
     def test_transform_dataset_shape(self):
@@ -456,6 +645,96 @@ class GatewayDatasetShapeTransformerTest(unittest.TestCase):
             expected_shaped_dataset, actual_shaped_dataset
         )
 
+    def test_transform_dataset_shape_categorical_columns(self):
+        dataset = pd.DataFrame(
+            data={
+                "CaseNumber": [1, 2, 3],
+                "MilestoneFlag": pd.Categorical(["Intake", "Exit", None]),
+                "field2": pd.Categorical([True, None, False]),
+            }
+        )
+
+        actual_shaped_dataset = dataset_shape.GatewayDatasetShapeTransformer(
+            TEST_SCHEMA
+        ).transform_dataset_shape(dataset)
+
+        expected_shaped_dataset = pd.DataFrame(
+            data={
+                "CaseNumber": [1, 2, 3],
+                "MilestoneFlag": ["Intake", "Exit", None],
+                "field2": [True, None, False],
+            }
+        )
+        pd.util.testing.assert_frame_equal(
+            expected_shaped_dataset, actual_shaped_dataset
+        )
+        self.assertIs(actual_shaped_dataset["field2"][0], True)
+
+
+class ValidateAndTransformDatasetsTest(unittest.TestCase):
+    def setUp(self):
+        self.validator = dataset_shape.DatasetShapeValidator(
+            TEST_SCHEMA, TEST_COLUMN_MAPPING, row_format=True
+        )
+        self.transformer = dataset_shape.DatasetShapeTransformer(
+            MEMBER_ORGANIZATION_ID,
+            TEST_SCHEMA,
+            TEST_COLUMN_MAPPING,
+            row_format=True,
+            multiple_val_delimiter=",",
+        )
+        self.datasets = {
+            "file1.csv": pd.DataFrame(
+                data={
+                    "internal_column_name1": ["1", "2"],
+                    "internal_column_name3": ["3,5", None],
+                }
+            ),
+            "file2.csv": pd.DataFrame(data={"field2": [" 3", "4"]}),
+            "file3.csv": pd.DataFrame(data={"internal_column_name2": [5, 6]}),
+        }
+
+    def test_parallel_produces_same_output(self):
+        (
+            serial_failures,
+            serial_shaped_datasets,
+        ) = dataset_shape.validate_and_transform_datasets(
+            self.validator,
+            self.transformer,
+            {name: dataset.copy() for name, dataset in self.datasets.items()},
+        )
+        failures, shaped_datasets = dataset_shape.validate_and_transform_datasets(
+            self.validator, self.transformer, self.datasets, num_workers=2
+        )
+
+        self.assertEqual({}, serial_failures)
+        self.assertEqual({}, failures)
+        self.assertEqual(list(self.datasets), list(shaped_datasets))
+        for name, shaped_dataset in shaped_datasets.items():
+            pd.util.testing.assert_frame_equal(
+                serial_shaped_datasets[name], shaped_dataset
+            )
+        # The datasets are shaped by the workers, so they aren't modified.
+        self.assertEqual(
+            ["internal_column_name1", "internal_column_name3"],
+            list(self.datasets["file1.csv"].columns),
+        )
+
+    def test_parallel_failures_keyed_by_dataset_name(self):
+        self.datasets["bad_file.csv"] = pd.DataFrame(
+            data={"random_column_name": [1, 2]}
+        )
+
+        failures, shaped_datasets = dataset_shape.validate_and_transform_datasets(
+            self.validator, self.transformer, self.datasets, num_workers=2
+        )
+
+        self.assertEqual(
+            self.validator.validate_multiple_dataset_shape(self.datasets), failures
+        )
+        self.assertEqual(["bad_file.csv"], list(failures))
+        self.assertEqual({}, shaped_datasets)
+
 
 if __name__ == "__main__":
     unittest.main()
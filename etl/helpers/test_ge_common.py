@@ -4,7 +4,7 @@ import pandas as pd
 import unittest
 
 from etl.helpers import common
-from etl.helpers.dataset_shape import ShapePandasDataset
+from etl.helpers.dataset_shape_ge import ShapePandasDataset
 
 """Unit tests for Great Expectations common helpers.
 
@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+import typing
+import unittest
+
+import etl
+
+"""Import time regression tests.
+
+Each module is imported in a new interpreter with `python -X importtime`, which
+reports the time spent importing every module. Importing a module must not
+import the slow dependencies that are only needed by some tasks, which are
+imported on first use instead.
+
+Import times depend on the machine and on its load, so the budgets are only
+checked if the ETL_IMPORT_TIME_BUDGETS environment variable is set.
+
+Run with `python -m etl.helpers.test_import_time`, or with
+`ETL_IMPORT_TIME_BUDGETS=1 python -m etl.helpers.test_import_time` to check
+the budgets.
+"""
+
+# Budget of the cumulative import time of each module, in milliseconds. Most of
+# it is spent importing pandas and tableschema, which every module needs. The
+# budgets leave room for slower machines, but not for importing any of
+# LAZY_DEPENDENCIES (great_expectations alone takes about 2 seconds).
+IMPORT_TIME_BUDGETS_MS = {
+    "etl.pipeline.simple_pipeline": 1500,
+    "etl.helpers.column_mapping": 1200,
+    "etl.helpers.data_processor": 1200,
+    "etl.helpers.dataset_shape": 1200,
+    "etl.helpers.email": 1200,
+    "etl.helpers.field_mapping.generator": 1200,
+    "etl.helpers.drive": 1000,
+    "etl.helpers.validation": 1000,
+    "etl.helpers.states": 50,
+}
+
+# Dependencies that are imported on first use.
+LAZY_DEPENDENCIES = [
+    "airflow",
+    "fuzzywuzzy",
+    "google.oauth2",
+    "googleapiclient",
+    "great_expectations",
+    "sqlalchemy",
+    "us",
+]
+
+# Imports are retried once if they are over budget, in case the machine was busy.
+NUM_ATTEMPTS = 2
+
+
+def _get_import_times(module: str) -> typing.Dict[str, int]:
+    """Imports a module in a new interpreter and returns the cumulative import
+    time of each module it imported, in microseconds."""
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(etl.__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [repo_dir] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+        check=True,
+    )
+
+    # Lines look like "import time: <self> | <cumulative> | <indented module>".
+    import_times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, imported_module = line.split("|")
+        if cumulative.strip().isdigit():
+            import_times[imported_module.strip()] = int(cumulative)
+    return import_times
+
+
+def _is_lazy_dependency(imported_module: str) -> bool:
+    return any(
+        imported_module == dependency or imported_module.startswith(dependency + ".")
+        for dependency in LAZY_DEPENDENCIES
+    )
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime requires Python 3.7")
+class ImportTimeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.import_times = {
+            module: _get_import_times(module) for module in IMPORT_TIME_BUDGETS_MS
+        }
+
+    @unittest.skipUnless(
+        os.environ.get("ETL_IMPORT_TIME_BUDGETS"),
+        "set ETL_IMPORT_TIME_BUDGETS to check import time budgets",
+    )
+    def test_import_time(self):
+        for module, budget_ms in IMPORT_TIME_BUDGETS_MS.items():
+            with self.subTest(module=module):
+                import_times = self.import_times[module]
+                for _ in range(NUM_ATTEMPTS - 1):
+                    if import_times[module] / 1000 <= budget_ms:
+                        break
+                    import_times = _get_import_times(module)
+
+                self.assertLessEqual(import_times[module] / 1000, budget_ms)
+
+    def test_lazy_dependencies_not_imported(self):
+        for module, import_times in self.import_times.items():
+            with self.subTest(module=module):
+                self.assertEqual(
+                    [],
+                    [
+                        imported_module
+                        for imported_module in import_times
+                        if _is_lazy_dependency(imported_module)
+                    ],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
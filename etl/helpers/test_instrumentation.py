@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+
+from etl.helpers import instrumentation
+
+"""Unit tests for the pipeline instrumentation.
+
+Run with `python -m etl.helpers.test_instrumentation`.
+"""
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_stage_records_stats(self):
+        stats = []
+        with instrumentation.stage("allocate", stats):
+            block = np.ones(2 ** 24)  # 128 MiB.
+            block[:] = 2
+
+        self.assertEqual(1, len(stats))
+        self.assertEqual("allocate", stats[0][instrumentation.STAGE_KEY])
+        self.assertGreaterEqual(stats[0][instrumentation.SECONDS_KEY], 0)
+        self.assertGreater(stats[0][instrumentation.PEAK_RSS_KEY], 128 * 2 ** 20)
+
+    def test_stage_records_stats_on_error(self):
+        stats = []
+        with self.assertRaises(ValueError):
+            with instrumentation.stage("fail", stats):
+                raise ValueError()
+
+        self.assertEqual("fail", stats[0][instrumentation.STAGE_KEY])
+
+    def test_peak_rss_without_proc(self):
+        with patch.object(instrumentation, "PROC_STATUS_FILE", "/nonexistent/file"):
+            with patch.object(
+                instrumentation, "PROC_CLEAR_REFS_FILE", "/nonexistent/file"
+            ):
+                stats = []
+                with instrumentation.stage("no proc", stats):
+                    pass
+
+        self.assertFalse(stats[0][instrumentation.PEAK_RSS_IS_PER_STAGE_KEY])
+        if instrumentation.resource is not None:
+            self.assertGreater(stats[0][instrumentation.PEAK_RSS_KEY], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
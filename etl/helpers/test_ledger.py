@@ -0,0 +1,145 @@
+import pickle
+import unittest
+import numpy as np
+import pandas as pd
+
+from etl.helpers import ledger
+
+"""Unit tests for InvalidValueLedger and DroppedRowLedger.
+
+Run with `python -m etl.helpers.test_ledger`.
+"""
+
+
+class InvalidValueLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.ledger = ledger.InvalidValueLedger()
+        self.ledger.record(
+            "State",
+            np.array([0, 3]),
+            ["CN-1", "CN-4"],
+            ["Intake", "Exit"],
+            ["RANDOM STATE", 7],
+            ["RANDOM STATE is not a valid state", "7 is not a valid state"],
+        )
+        self.ledger.record(
+            "CategoriesIdentifyWith", np.array([1]), ["CN-2"], ["Intake"], [[1]], [None]
+        )
+
+    def test_materializes_value_identifiers(self):
+        self.assertEqual(3, len(self.ledger))
+        self.assertEqual(
+            [
+                {
+                    ledger.CASE_NUMBER_KEY: "CN-1",
+                    ledger.FIELD_NAME_KEY: "State",
+                    ledger.MILESTONE_FLAG_KEY: "Intake",
+                    ledger.ORIGINAL_VALUE_KEY: "RANDOM STATE",
+                    ledger.INVALID_REASON_KEY: "RANDOM STATE is not a valid state",
+                },
+                {
+                    ledger.CASE_NUMBER_KEY: "CN-4",
+                    ledger.FIELD_NAME_KEY: "State",
+                    ledger.MILESTONE_FLAG_KEY: "Exit",
+                    ledger.ORIGINAL_VALUE_KEY: 7,
+                    ledger.INVALID_REASON_KEY: "7 is not a valid state",
+                },
+                {
+                    ledger.CASE_NUMBER_KEY: "CN-2",
+                    ledger.FIELD_NAME_KEY: "CategoriesIdentifyWith",
+                    ledger.MILESTONE_FLAG_KEY: "Intake",
+                    ledger.ORIGINAL_VALUE_KEY: [1],
+                },
+            ],
+            self.ledger,
+        )
+        self.assertEqual("CN-2", self.ledger[-1][ledger.CASE_NUMBER_KEY])
+
+    def test_append_value_identifiers(self):
+        value_identifier = {
+            ledger.CASE_NUMBER_KEY: "CN-5",
+            ledger.FIELD_NAME_KEY: "SOC",
+            ledger.MILESTONE_FLAG_KEY: "Exit",
+            ledger.ORIGINAL_VALUE_KEY: 4,
+            ledger.INVALID_REASON_KEY: "4 is not a string",
+        }
+        self.ledger += [value_identifier]
+
+        self.assertEqual(4, len(self.ledger))
+        self.assertEqual(value_identifier, self.ledger[3])
+
+    def test_extend_with_ledger(self):
+        other = ledger.InvalidValueLedger()
+        other.record(
+            "SOC", np.array([2]), ["CN-3"], ["Exit"], [4], ["4 is not a string"]
+        )
+        other.record(
+            "State", np.array([4]), ["CN-5"], ["Exit"], [7], ["7 is not a valid state"]
+        )
+        expected = list(self.ledger) + list(other)
+
+        self.ledger += other
+
+        self.assertEqual(expected, self.ledger)
+        self.assertEqual(
+            ["State", "CategoriesIdentifyWith", "SOC"], self.ledger.field_names
+        )
+        self.assertEqual(3, len(self.ledger.reasons))
+
+    def test_to_dataframe(self):
+        df = self.ledger.to_dataframe()
+
+        self.assertEqual(
+            ["State", "State", "CategoriesIdentifyWith"],
+            df[ledger.FIELD_NAME_KEY].tolist(),
+        )
+        self.assertEqual(
+            ["RANDOM STATE is not a valid state", "7 is not a valid state", None],
+            df[ledger.INVALID_REASON_KEY].tolist(),
+        )
+
+    def test_pickle(self):
+        self.assertEqual(self.ledger, pickle.loads(pickle.dumps(self.ledger)))
+
+
+class DroppedRowLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = pd.DataFrame(
+            {"CaseNumber": ["CN-1", "", "CN-3"], "MilestoneFlag": ["", "", "Intake"]},
+            index=[2, 5, 6],
+        )
+        self.ledger = ledger.DroppedRowLedger()
+        self.ledger.record_missing_fields(
+            self.rows.iloc[:2],
+            ["CaseNumber", "MilestoneFlag"],
+            np.array([[False, True], [True, True]]),
+        )
+        self.ledger.record(self.rows.iloc[2:], ledger.DUPLICATE_ROWS_KEY)
+
+    def test_materializes_row_info(self):
+        self.assertEqual(3, len(self.ledger))
+        self.assertTrue(self.ledger[0][ledger.ROW_KEY].equals(self.rows.loc[2]))
+        self.assertEqual(["MilestoneFlag"], self.ledger[0][ledger.MISSING_FIELDS_KEY])
+        self.assertEqual(
+            ["CaseNumber", "MilestoneFlag"], self.ledger[1][ledger.MISSING_FIELDS_KEY]
+        )
+        self.assertTrue(self.ledger[2][ledger.ROW_KEY].equals(self.rows.loc[6]))
+        self.assertTrue(self.ledger[2][ledger.DUPLICATE_ROWS_KEY])
+        with self.assertRaises(IndexError):
+            self.ledger[3]
+
+    def test_append_row_info(self):
+        row_info = {ledger.ROW_KEY: self.rows.loc[6], "missing_intake_record": True}
+        self.ledger += [row_info]
+
+        self.assertEqual(4, len(self.ledger))
+        self.assertIs(row_info, self.ledger[3])
+        self.assertEqual(
+            [ledger.MISSING_FIELDS_KEY] * 2
+            + [ledger.DUPLICATE_ROWS_KEY, "missing_intake_record"],
+            [list(row_info)[1] for row_info in self.ledger],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import us
+
+from etl.helpers import states
+
+"""Unit tests for the memoized state lookup.
+
+Run with `python -m etl.helpers.test_states`.
+"""
+
+NAMES = [
+    "NC",
+    "nc",
+    "Nc",
+    "North Carolina",
+    "north carolina",
+    "NORTH CAROLINA",
+    "Kentuky",
+    "Washingtn",
+    "DC",
+    "District of Columbia",
+    "PR",
+    "37",
+    "7",
+    "1",
+    "nowhere",
+    "RANDOM STATE",
+    "",
+]
+
+
+class StatesTest(unittest.TestCase):
+    def tearDown(self):
+        states._state_cache.clear()
+
+    def test_lookup_abbr_matches_us(self):
+        for name in NAMES:
+            with self.subTest(name=name):
+                state = us.states.lookup(name)
+                expected = state.abbr if state else None
+                self.assertEqual(expected, states.lookup_abbr(name))
+                # Cached lookups return the same abbreviation.
+                self.assertEqual(expected, states.lookup_abbr(name))
+
+    def test_lookup_abbrs(self):
+        self.assertEqual(
+            {"nc": "NC", "Kentuky": "KY"},
+            states.lookup_abbrs(["nc", "Kentuky", "nowhere"]),
+        )
+
+    def test_cache_is_bounded(self):
+        cache_size = states.STATE_CACHE_SIZE
+        states.STATE_CACHE_SIZE = 2
+        try:
+            for name in ["Kentuky", "Washingtn", "nowhere"]:
+                states.lookup_abbr(name)
+        finally:
+            states.STATE_CACHE_SIZE = cache_size
+
+        self.assertEqual(["Washingtn", "nowhere"], list(states._state_cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
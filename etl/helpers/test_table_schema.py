@@ -1,6 +1,14 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
 import unittest
+from unittest.mock import patch
 import tableschema
 
+import etl
 from etl.helpers import table_schema
 
 TEST_SCHEMA1: tableschema.Schema = tableschema.Schema(
@@ -84,9 +92,89 @@ class TableSchemaTest(unittest.TestCase):
             actual_field_names_by_milestone["NinetyDays"],
         )
 
+    def test_get_categorical_field_names(self):
+        schema = tableschema.Schema(
+            {
+                "fields": [
+                    {"name": "field1"},
+                    {"name": "field2", "type": "boolean"},
+                    {"name": "field3", "constraints": {"enum": ["a", "b"]}},
+                    {
+                        "name": "field4",
+                        "constraints": {"enum": ["a", "b"]},
+                        "allows_multiple": True,
+                    },
+                ]
+            }
+        )
+        self.assertEqual(
+            ["field2", "field3"], table_schema.get_categorical_field_names(schema)
+        )
+        self.assertEqual(
+            ["field5"], table_schema.get_categorical_field_names(TEST_SCHEMA2)
+        )
+
+    def test_get_schema_index(self):
+        index = table_schema.get_schema_index(TEST_SCHEMA2)
+
+        self.assertEqual(
+            ["field1", "field2", "field3", "field4", "field5"], index.field_names
+        )
+        self.assertIs(TEST_SCHEMA2.get_field("field5"), index.fields["field5"])
+        self.assertEqual(
+            ["field5"], [field.name for field in index.get_fields_by_type("integer")]
+        )
+        self.assertEqual([], index.get_fields_by_type("boolean"))
+        self.assertEqual(
+            {"field5": ["first_value", "second_value"]}, index.enum_options
+        )
+        self.assertEqual(
+            [
+                "field1",
+                "field5",
+                "Intakefield2",
+                "Intakefield3",
+                "Exitfield3",
+                "actual_field4",
+            ],
+            index.get_column_format_field_names(),
+        )
+
+    def test_get_schema_index_cached_by_content(self):
+        same_schema = tableschema.Schema(TEST_SCHEMA2.descriptor)
+        self.assertIs(
+            table_schema.get_schema_index(TEST_SCHEMA2),
+            table_schema.get_schema_index(same_schema),
+        )
+
+        changed_schema = tableschema.Schema(TEST_SCHEMA2.descriptor)
+        changed_schema.descriptor["fields"][0]["allows_multiple"] = True
+        changed_schema.commit()
+        changed_index = table_schema.get_schema_index(changed_schema)
+        self.assertIsNot(table_schema.get_schema_index(TEST_SCHEMA2), changed_index)
+        self.assertEqual({"field1"}, changed_index.allows_multiple)
+
+    def test_get_schema_index_invalid_milestone(self):
+        bad_schema = tableschema.Schema(TEST_SCHEMA2.descriptor)
+        bad_schema.descriptor["fields"][4]["milestones"] = [10]
+        bad_schema.commit()
+
+        index = table_schema.get_schema_index(bad_schema)
+        self.assertEqual(["field5"], index.categorical_field_names)
+        with self.assertRaises(IndexError):
+            index.get_column_format_fields()
+
     def test_validate_valid_schema(self):
         self.assertTrue(table_schema.validate_schema(TEST_SCHEMA2))
 
+    def test_validate_valid_schema_once(self):
+        self.assertTrue(table_schema.validate_schema(TEST_SCHEMA2))
+        same_schema = tableschema.Schema(TEST_SCHEMA2.descriptor)
+        with patch.object(
+            table_schema, "get_milestone_names", side_effect=AssertionError
+        ):
+            self.assertTrue(table_schema.validate_schema(same_schema))
+
     def test_validate_invalid_milestone(self):
         bad_schema = tableschema.Schema(TEST_SCHEMA2.descriptor)
         bad_schema.descriptor["fields"][4]["milestones"] = [10]
@@ -114,5 +202,154 @@ class TableSchemaTest(unittest.TestCase):
         self.assertFalse(table_schema.validate_schema(bad_schema))
 
 
+# Validates a pickled schema in a new process, like the pipeline task validates
+# the schema it gets from the load schema task, and prints whether it is valid
+# and whether it was checked.
+VALIDATE_IN_NEW_PROCESS = """
+import pickle
+import sys
+from unittest.mock import patch
+from etl.helpers import table_schema
+
+with open(sys.argv[1], "rb") as f:
+    schema = pickle.load(f)
+with patch.object(
+    table_schema, "get_milestone_names", wraps=table_schema.get_milestone_names
+) as get_milestone_names:
+    is_valid = table_schema.validate_schema(schema, sys.argv[2])
+print(is_valid, get_milestone_names.called)
+"""
+
+
+class CompiledSchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.schema_filename = os.path.join(self.temp_dir.name, "schema.json")
+        self._write_schema(TEST_SCHEMA2.descriptor)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _get_cache_filenames(self, extension):
+        return [
+            os.path.join(self.cache_dir, filename)
+            for filename in os.listdir(self.cache_dir)
+            if filename.endswith(extension)
+        ]
+
+    def _write_schema(self, descriptor):
+        with open(self.schema_filename, "w") as f:
+            json.dump(descriptor, f)
+
+    def test_get_schema_compiles_schema(self):
+        schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+
+        self.assertEqual(TEST_SCHEMA2.descriptor, schema.descriptor)
+        self.assertEqual(1, len(self._get_cache_filenames(".pickle")))
+        self.assertEqual(1, len(self._get_cache_filenames(".valid")))
+
+    def test_get_schema_loads_compiled_schema(self):
+        table_schema.get_schema(self.schema_filename, self.cache_dir)
+        with patch.object(
+            table_schema, "_compile_schema", side_effect=AssertionError
+        ), patch.object(table_schema, "validate_schema", side_effect=AssertionError):
+            schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+
+        self.assertEqual(TEST_SCHEMA2.descriptor, schema.descriptor)
+        self.assertEqual(["field5"], table_schema.get_categorical_field_names(schema))
+        self.assertIs(
+            schema.get_field("field5"),
+            table_schema.get_schema_index(schema).fields["field5"],
+        )
+        self.assertTrue(table_schema.validate_schema(schema))
+
+    def test_get_schema_compiles_changed_schema(self):
+        table_schema.get_schema(self.schema_filename, self.cache_dir)
+        descriptor = TEST_SCHEMA2.descriptor.copy()
+        descriptor["fields"] = descriptor["fields"] + [{"name": "field6"}]
+        self._write_schema(descriptor)
+
+        schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+
+        self.assertEqual("field6", schema.fields[-1].name)
+
+    def test_get_schema_unreadable_cache(self):
+        os.makedirs(self.cache_dir)
+        table_schema.get_schema(self.schema_filename, self.cache_dir)
+        for cache_filename in self._get_cache_filenames(".pickle"):
+            with open(cache_filename, "wb") as f:
+                f.write(b"not a pickle")
+
+        schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+
+        self.assertEqual(TEST_SCHEMA2.descriptor, schema.descriptor)
+
+    def test_get_schema_unexpected_cache_content(self):
+        os.makedirs(self.cache_dir)
+        table_schema.get_schema(self.schema_filename, self.cache_dir)
+        for content in [["not", "a", "dict"], {"other": "key"}]:
+            with self.subTest(content=content):
+                for cache_filename in self._get_cache_filenames(".pickle"):
+                    with open(cache_filename, "wb") as f:
+                        pickle.dump(content, f)
+
+                schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+
+                self.assertEqual(TEST_SCHEMA2.descriptor, schema.descriptor)
+
+    def test_get_schema_ignores_writable_cache(self):
+        table_schema.get_schema(self.schema_filename, self.cache_dir)
+        (cache_filename,) = self._get_cache_filenames(".pickle")
+        for path, mode in [(self.cache_dir, 0o777), (cache_filename, 0o666)]:
+            with self.subTest(path=path):
+                os.chmod(path, mode)
+                with patch.object(
+                    table_schema, "_read_compiled_schema", side_effect=AssertionError
+                ):
+                    schema = table_schema.get_schema(
+                        self.schema_filename, self.cache_dir
+                    )
+
+                self.assertEqual(TEST_SCHEMA2.descriptor, schema.descriptor)
+                os.chmod(path, 0o700)
+
+    def _validate_in_new_process(self, schema, cache_dir):
+        schema_pickle = os.path.join(self.temp_dir.name, "schema.pickle")
+        with open(schema_pickle, "wb") as f:
+            pickle.dump(schema, f)
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(etl.__file__)))
+        process = subprocess.run(
+            [sys.executable, "-c", VALIDATE_IN_NEW_PROCESS, schema_pickle, cache_dir],
+            stdout=subprocess.PIPE,
+            cwd=repo_dir,
+            universal_newlines=True,
+            check=True,
+        )
+        return process.stdout.split()
+
+    def test_validate_schema_in_other_process(self):
+        schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+        other_cache_dir = os.path.join(self.temp_dir.name, "other_cache")
+
+        self.assertEqual(
+            ["True", "False"], self._validate_in_new_process(schema, self.cache_dir)
+        )
+        self.assertEqual(
+            ["True", "True"], self._validate_in_new_process(schema, other_cache_dir)
+        )
+        self.assertEqual(
+            ["True", "False"], self._validate_in_new_process(schema, other_cache_dir)
+        )
+
+    def test_validate_schema_ignores_writable_marker(self):
+        schema = table_schema.get_schema(self.schema_filename, self.cache_dir)
+        os.chmod(self.cache_dir, 0o777)
+
+        self.assertEqual(
+            ["True", "True"], self._validate_in_new_process(schema, self.cache_dir)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,228 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pkg_resources
+
+from etl.helpers import column_mapping, common, table_schema, validation
+from etl.helpers.dataset_shape import DatasetShapeValidator, SHAPE_DATASET_CLASS
+from etl.helpers.field_mapping import common as field_mapping_common
+from etl.helpers.field_mapping.common import FieldMapping
+from etl.helpers.field_mapping.loader import FieldMappingLoader
+from etl.helpers.field_mapping.validator import (
+    FieldMappingValidator,
+    FieldMappingApprovalValidator,
+)
+
+"""Unit tests for the validation backends.
+
+Each test checks that the native backend finds the same failures as the
+great_expectations backend.
+
+Run with `python -m etl.helpers.test_validation`.
+"""
+
+MI_SCHEMA = pkg_resources.resource_filename(
+    "etl.schemas", "mission_impact_table_schema.json"
+)
+MI_MAPPINGS_DIR = pkg_resources.resource_filename(
+    "testfiles", "mission_impact/initial_mappings/"
+)
+
+TEST_DATA = pd.DataFrame(
+    data={
+        "column_one": ["value1", "value1", None, "value2", "value2", np.nan],
+        "column_two": ["a", "b", "c", np.nan, "b", "d"],
+        "column_three": [1, 2, 2, 3, 4, 5],
+        "Unnamed: 3": [None] * 6,
+        "Unnamed: 4": [None] * 6,
+    }
+)
+
+
+def _get_failures(backend, expect, dataset=TEST_DATA):
+    dataset_validation = validation.from_pandas(
+        dataset, dataset_class=SHAPE_DATASET_CLASS, backend=backend
+    )
+    expect(dataset_validation)
+    return common.ge_results_to_failure_map({"dataset": dataset_validation.validate()})
+
+
+class ValidationBackendParityTest(unittest.TestCase):
+    def assert_same_failures(self, expect, dataset=TEST_DATA):
+        expected_failures = _get_failures(
+            validation.GREAT_EXPECTATIONS_BACKEND, expect, dataset
+        )
+        actual_failures = _get_failures(validation.NATIVE_BACKEND, expect, dataset)
+        self.assertEqual(expected_failures, actual_failures)
+        return actual_failures
+
+    def test_columns_match_ordered_list(self):
+        for column_list in [
+            list(TEST_DATA.columns),
+            ["column_one", "column_three"],
+            ["column_one", "column_two", "column_three", "a", "b", "c", "d"],
+            [],
+        ]:
+            with self.subTest(column_list=column_list):
+                self.assert_same_failures(
+                    lambda d: d.expect_table_columns_to_match_ordered_list(column_list)
+                )
+
+    def test_columns_in_set(self):
+        for column_list in [
+            ["column_one", "column_two", "column_three"],
+            set(["column_one", "other_column"]),
+            [],
+        ]:
+            with self.subTest(column_list=column_list):
+                self.assert_same_failures(
+                    lambda d: d.expect_table_columns_to_be_in_set(column_list)
+                )
+
+    def test_named_cols(self):
+        failures = self.assert_same_failures(lambda d: d.expect_named_cols())
+        self.assertEqual(
+            ["3", "4"],
+            sorted(
+                failures["dataset"][common.EXPECT_NAMED_COLS][common.FAILED_VALUES_KEY]
+            ),
+        )
+        self.assert_same_failures(
+            lambda d: d.expect_named_cols(), TEST_DATA[["column_one"]]
+        )
+
+    def test_values_unique(self):
+        for column in ["column_one", "column_two", "column_three"]:
+            with self.subTest(column=column):
+                self.assert_same_failures(
+                    lambda d: d.expect_column_values_to_be_unique(column)
+                )
+
+    def test_values_in_set(self):
+        for column, value_set in [
+            ("column_one", ["value1"]),
+            ("column_one", set(["value1", "value2"])),
+            ("column_two", ["a", None]),
+            ("column_three", [1, 2.0, "3"]),
+        ]:
+            with self.subTest(column=column, value_set=value_set):
+                self.assert_same_failures(
+                    lambda d: d.expect_column_values_to_be_in_set(column, value_set)
+                )
+
+    def test_last_result_of_expectation_is_kept(self):
+        def expect(dataset_validation):
+            dataset_validation.expect_column_values_to_be_in_set("column_one", [])
+            dataset_validation.expect_column_values_to_be_in_set("column_two", [])
+            dataset_validation.expect_column_values_to_be_in_set(
+                "column_one", ["value1"]
+            )
+
+        self.assert_same_failures(expect)
+
+    def test_missing_column(self):
+        for backend in validation.BACKENDS:
+            with self.subTest(backend=backend):
+                with self.assertRaises(KeyError):
+                    _get_failures(
+                        backend,
+                        lambda d: d.expect_column_values_to_be_unique("other_column"),
+                    )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            validation.from_pandas(TEST_DATA, backend="other_backend")
+
+
+class ValidatorParityTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = table_schema.get_schema(MI_SCHEMA)
+
+    def assert_same_failures(self, validate):
+        with patch.object(
+            validation, "DEFAULT_BACKEND", validation.GREAT_EXPECTATIONS_BACKEND
+        ):
+            expected_failures = validate()
+        with patch.object(validation, "DEFAULT_BACKEND", validation.NATIVE_BACKEND):
+            actual_failures = validate()
+        self.assertEqual(expected_failures, actual_failures)
+        return actual_failures
+
+    def test_column_mapping_validator(self):
+        validator = column_mapping.ColumnMappingValidator(self.schema)
+        for mapping in [
+            pd.DataFrame(
+                {
+                    column_mapping.INTERNAL_COLUMN_NAME_COLUMN_NAME: ["a", "b", "b"],
+                    column_mapping.MI_FIELD_NAME_COLUMN_NAME: [
+                        "CaseNumber",
+                        "bad_field",
+                        None,
+                    ],
+                }
+            ),
+            pd.DataFrame({column_mapping.INTERNAL_COLUMN_NAME_COLUMN_NAME: ["a"]}),
+        ]:
+            with self.subTest(mapping=mapping):
+                failures = self.assert_same_failures(
+                    lambda: validator.validate(mapping)
+                )
+                self.assertTrue(failures)
+
+    def test_field_mapping_validators(self):
+        field_mappings = FieldMappingLoader(self.schema).load_field_mappings_local(
+            MI_MAPPINGS_DIR
+        )
+        field_mappings["Gender"] = FieldMapping.from_dataframe(
+            pd.DataFrame(
+                {
+                    field_mapping_common.INPUT_COLUMN_NAME: [
+                        "male",
+                        "Female",
+                        "male",
+                        "other",
+                    ],
+                    field_mapping_common.OUTPUT_COLUMN_NAME: [
+                        "Male",
+                        "not_a_gender",
+                        "Female",
+                        None,
+                    ],
+                    field_mapping_common.APPROVED_COLUMN_NAME: [
+                        "Yes",
+                        "Yes",
+                        "Maybe",
+                        None,
+                    ],
+                }
+            )
+        )
+
+        for validator in [
+            FieldMappingValidator(self.schema),
+            FieldMappingApprovalValidator(),
+        ]:
+            with self.subTest(validator=validator):
+                failures = self.assert_same_failures(
+                    lambda: validator.validate_multiple(field_mappings)
+                )
+                self.assertIn("Gender", failures)
+
+    def test_dataset_shape_validator(self):
+        validator = DatasetShapeValidator(self.schema, {"a": "CaseNumber"}, True)
+        datasets = {
+            "valid": pd.DataFrame({"a": ["1"], "CaseNumber": ["2"]}),
+            "invalid": pd.DataFrame(
+                {"a": ["1"], "other": ["2"], "Unnamed: 2": ["3"], "Unnamed: 3": ["4"]}
+            ),
+        }
+
+        failures = self.assert_same_failures(
+            lambda: validator.validate_multiple_dataset_shape(datasets)
+        )
+        self.assertEqual(["invalid"], list(failures))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+"""Backends that validate pd.DataFrames against expectations.
+
+Validators call the expectations on the dataset returned by from_pandas, then
+read the result of its validate method with
+common.extract_failures_from_ge_result. Two backends are available:
+
+- NATIVE_BACKEND (the default) implements the expectations that the validators
+  use directly on the pd.DataFrame. Its results only have the keys of the
+  great_expectations results that common.extract_failures_from_ge_result reads.
+- GREAT_EXPECTATIONS_BACKEND wraps the pd.DataFrame in a great_expectations
+  dataset, which is much slower to import, runs every expectation again on
+  validate and builds complete results. It is kept to check that both backends
+  find the same failures, and is only imported when it is used.
+"""
+import datetime
+import importlib
+import itertools
+import typing
+
+import numpy as np
+import pandas as pd
+
+from etl.helpers import common
+
+NATIVE_BACKEND = "native"
+GREAT_EXPECTATIONS_BACKEND = "great_expectations"
+BACKENDS = [NATIVE_BACKEND, GREAT_EXPECTATIONS_BACKEND]
+
+# Backend used by from_pandas if none is given.
+DEFAULT_BACKEND = NATIVE_BACKEND
+
+Dataset = typing.Union["NativeDataset", "great_expectations.dataset.Dataset"]
+
+
+def _to_serializable(value):
+    """Converts a value like great_expectations converts the values in its results
+    (numpy scalars to Python scalars, dates to strings)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return str(value)
+    return value
+
+
+class NativeDataset:
+    """Runs the expectations used by the validators on a pd.DataFrame.
+
+    As with great_expectations, each expectation returns its result and adds it
+    to the results returned by validate, replacing the result of a previous
+    expectation of the same type (on the same column, for column expectations).
+    Missing values are ignored by column expectations.
+    """
+
+    def __init__(self, dataset: pd.DataFrame):
+        self.dataset: pd.DataFrame = dataset
+        self._results: typing.List[typing.Dict] = []
+
+    def _add_result(
+        self, expectation_type: str, kwargs: typing.Dict, result: typing.Dict
+    ) -> typing.Dict:
+        column = kwargs.get("column")
+        self._results = [
+            previous
+            for previous in self._results
+            if previous["expectation_config"]["expectation_type"] != expectation_type
+            or previous["expectation_config"]["kwargs"].get("column") != column
+        ]
+        result["expectation_config"] = {
+            "expectation_type": expectation_type,
+            "kwargs": kwargs,
+        }
+        self._results.append(result)
+        return result
+
+    def _add_column_map_result(
+        self, expectation_type: str, kwargs: typing.Dict, unexpected_list: typing.List
+    ) -> typing.Dict:
+        return self._add_result(
+            expectation_type,
+            kwargs,
+            {
+                "success": not unexpected_list,
+                "result": {
+                    "unexpected_list": [
+                        _to_serializable(value) for value in unexpected_list
+                    ]
+                },
+            },
+        )
+
+    def _get_non_missing_values(self, column: str) -> np.ndarray:
+        values = self.dataset[column].to_numpy(dtype=object)
+        return values[~pd.isna(values)]
+
+    def expect_table_columns_to_match_ordered_list(
+        self, column_list: typing.List[str]
+    ) -> typing.Dict:
+        column_list = list(column_list)
+        columns = list(self.dataset.columns)
+        if columns == column_list:
+            result = {"success": True}
+        else:
+            mismatched = [
+                {"Expected Column Position": i, "Expected": expected, "Found": found}
+                for i, expected, found in itertools.zip_longest(
+                    range(max(len(column_list), len(columns))), column_list, columns
+                )
+                if expected != found
+            ]
+            result = {"success": False, "details": {"mismatched": mismatched}}
+
+        return self._add_result(
+            common.EXPECT_COLUMNS_MATCH_KEY, {"column_list": column_list}, result
+        )
+
+    def expect_table_columns_to_be_in_set(
+        self, column_list: typing.Collection[str]
+    ) -> typing.Dict:
+        """Columns without headers (named "Unnamed: N" by pandas) are ignored."""
+        column_list = list(column_list)
+        named_columns = [col for col in self.dataset.columns if "Unnamed:" not in col]
+
+        invalid_cols = sorted(set(named_columns) - set(column_list))
+        if invalid_cols:
+            result = {"success": False, "invalid_columns": invalid_cols}
+        else:
+            result = {"success": True}
+
+        return self._add_result(
+            common.EXPECT_COLUMNS_IN_SET_KEY, {"column_list": column_list}, result
+        )
+
+    def expect_named_cols(self) -> typing.Dict:
+        """Expects every column to have a header."""
+        # In the same order as the great_expectations implementation.
+        columns_without_headers = [
+            col[9:] for col in list(set(self.dataset.columns)) if "Unnamed" in col
+        ]
+        if columns_without_headers:
+            result = {
+                "success": False,
+                "columns_without_headers": columns_without_headers,
+            }
+        else:
+            result = {"success": True}
+
+        return self._add_result(common.EXPECT_NAMED_COLS, {}, result)
+
+    def expect_column_values_to_be_unique(self, column: str) -> typing.Dict:
+        values = pd.Series(self._get_non_missing_values(column), dtype=object)
+        unexpected_list = values[values.duplicated(keep=False)].tolist()
+
+        return self._add_column_map_result(
+            common.EXPECT_VALUES_UNIQUE_KEY, {"column": column}, unexpected_list
+        )
+
+    def expect_column_values_to_be_in_set(
+        self, column: str, value_set: typing.Collection
+    ) -> typing.Dict:
+        value_set = list(value_set)
+        values = self._get_non_missing_values(column)
+        try:
+            value_lookup = set(value_set)
+            unexpected_list = [value for value in values if value not in value_lookup]
+        except TypeError:  # Unhashable values.
+            unexpected_list = [value for value in values if value not in value_set]
+
+        return self._add_column_map_result(
+            common.EXPECT_VALUES_IN_SET_KEY,
+            {"column": column, "value_set": value_set},
+            unexpected_list,
+        )
+
+    def validate(self) -> typing.Dict:
+        return {
+            "results": list(self._results),
+            "success": all(result["success"] for result in self._results),
+        }
+
+
+def _import_class(class_name: str) -> type:
+    """Imports a class given as "module.ClassName"."""
+    module_name, _, class_name = class_name.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def from_pandas(
+    dataset: pd.DataFrame,
+    dataset_class: typing.Union[type, str, None] = None,
+    backend: typing.Optional[str] = None,
+) -> Dataset:
+    """Returns a dataset to call expectations on, which returns complete results.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Dataset to validate.
+    dataset_class : typing.Union[type, str, None]
+        The great_expectations dataset class, if the expectations aren't all
+        built in, or its name as "module.ClassName" so that it is only imported
+        by the great_expectations backend (e.g.
+        dataset_shape.SHAPE_DATASET_CLASS). The native backend implements all of
+        the expectations the validators use.
+    backend : typing.Optional[str]
+        One of BACKENDS. Defaults to DEFAULT_BACKEND.
+
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+
+    if backend == NATIVE_BACKEND:
+        return NativeDataset(dataset)
+    if backend == GREAT_EXPECTATIONS_BACKEND:
+        import great_expectations as ge
+
+        if dataset_class is None:
+            dataset_class = ge.dataset.PandasDataset
+        elif isinstance(dataset_class, str):
+            dataset_class = _import_class(dataset_class)
+        dataset_ge = ge.from_pandas(dataset, dataset_class=dataset_class)
+        dataset_ge.set_default_expectation_argument("result_format", "COMPLETE")
+        return dataset_ge
+
+    raise ValueError(
+        f"Unknown validation backend {backend}. Expected one of {BACKENDS}."
+    )
@@ -1,13 +1,22 @@
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 from tableschema import Schema
 import logging
 from functools import partial
 import tempfile
 
-from etl.helpers import drive, email, column_mapping, table_schema
+from etl.helpers import (
+    categorical,
+    drive,
+    email,
+    column_mapping,
+    csv_ingestion,
+    instrumentation,
+    table_schema,
+)
 from etl.helpers.data_processor import (
     DataProcessor,
+    AGGREGATED_LOGGING,
     NUM_ROWS_TO_UPLOAD_KEY,
     DROPPED_ROWS_KEY,
     DROPPED_VALUES_KEY,
@@ -20,6 +29,7 @@ from etl.helpers.field_mapping.validator import (
     FieldMappingApprovalValidator,
 )
 from etl.helpers.field_mapping.generator import FieldMappingGenerator
+from etl.helpers.field_mapping.match_cache import MatchCache, MATCH_CACHE_DIR
 from etl.helpers.field_mapping.resolver import FieldMappingResolver
 from etl.helpers.field_mapping.loader import FieldMappingLoader
 from etl.helpers.field_mapping.writer import FieldMappingWriter
@@ -27,6 +37,7 @@ from etl.helpers.dataset_shape import (
     DatasetShapeValidator,
     DatasetShapeTransformer,
     GatewayDatasetShapeTransformer,
+    validate_and_transform_datasets,
 )
 
 # Keys for return_vals map in simple_pipeline.
@@ -34,6 +45,7 @@ DATASET_RETURN_KEY = "dataset"
 FIELD_MAPPINGS_RETURN_KEY = "field_mappings"
 FAILURE_EMAIL_TASK_ID_KEY = "failure_email_task_id"
 EMAIL_METADATA_KEY = "email_metadata"
+STAGE_STATS_RETURN_KEY = "stage_stats"
 
 # Task IDs used for branching.
 SEND_COLUMN_MAPPING_INVALID_EMAIL_TASK_ID = "send_column_mapping_invalid_email"
@@ -58,6 +70,11 @@ def simple_pipeline(
     schema: Schema,
     column_mapping: pd.DataFrame,
     source_field_mappings: FieldMappings,
+    low_copy: bool = False,
+    num_workers: int = 1,
+    strip_whitespace: bool = True,
+    match_cache_dir: Optional[str] = None,
+    schema_cache_dir: Optional[str] = None,
 ):
     """Simple pipeline to transform Mission Impact data to prepare it for upload
      to the Gateway system.
@@ -84,18 +101,40 @@ def simple_pipeline(
         Column Mapping.
     source_field_mappings : FieldMappings
         Field Mappings.
+    low_copy : bool
+        Whether to shape and process the data in place, instead of copying it at
+        each step. The datasets in data are modified, and the columns of the
+        transformed dataset are not sorted.
+    num_workers : int
+        Number of processes used to validate and shape the datasets, one dataset
+        at a time. If 1, they are validated and shaped serially.
+    strip_whitespace : bool
+        Whether to strip whitespace from the values of the datasets. Datasets
+        read with csv_ingestion.read_csv are already stripped.
+    match_cache_dir : Optional[str]
+        Directory of the cache of the fuzzy matches of enum values, which are
+        reused across runs when matching with fuzzywuzzy (see match_cache.py).
+        If None, nothing is cached.
+    schema_cache_dir : Optional[str]
+        Directory of the compiled schema cache. If given, the schema isn't
+        validated again if the task that loaded it found it valid (see
+        table_schema.validate_schema).
 
     Returns
     -------
     type
-        Returns the transformed dataset and any resolved field mappings.
+        Returns the transformed dataset and any resolved field mappings. The time
+        and peak RSS of the shape validation and shaping, concatenation, field
+        mapping, processing and Gateway shaping stages are returned under
+        STAGE_STATS_RETURN_KEY.
 
     """
 
     return_val = {}
+    stage_stats = return_val[STAGE_STATS_RETURN_KEY] = []
 
     # Validate Table Schema
-    table_schema.validate_schema(schema)
+    table_schema.validate_schema(schema, schema_cache_dir)
 
     # Validate Column Mappings
     validation_failures = ColumnMappingValidator(schema, row_format).validate(
@@ -131,10 +170,24 @@ def simple_pipeline(
         return_val[FAILURE_EMAIL_TASK_ID_KEY] = SEND_FIELD_MAPPING_INVALID_EMAIL_TASK_ID
         return return_val
 
-    # Validate Data Shape
-    validation_failures = DatasetShapeValidator(
+    # Validate and Shape Data
+    shape_validator: DatasetShapeValidator = DatasetShapeValidator(
         schema, column_mapping, row_format
-    ).validate_multiple_dataset_shape(data)
+    )
+    shape_transformer: DatasetShapeTransformer = DatasetShapeTransformer(
+        member_id,
+        schema,
+        column_mapping,
+        row_format,
+        multiple_val_delimiter,
+        low_copy=low_copy,
+        strip_whitespace=strip_whitespace,
+    )
+
+    with instrumentation.stage("shape", stage_stats):
+        validation_failures, shaped_datasets = validate_and_transform_datasets(
+            shape_validator, shape_transformer, data, num_workers=num_workers
+        )
 
     if validation_failures:
         logging.error("Dataset shape is not valid!")
@@ -144,25 +197,30 @@ def simple_pipeline(
         return_val[FAILURE_EMAIL_TASK_ID_KEY] = SEND_DATA_SHAPE_INVALID_EMAIL_TASK_ID
         return return_val
 
-    # Shape Data
-    shape_transformer: DatasetShapeTransformer = DatasetShapeTransformer(
-        member_id, schema, column_mapping, row_format, multiple_val_delimiter
-    )
-
-    # TODO: Move concatentation of multiple datasets into DatasetShapeTransformer
-    # Combine all of the datasets into one
-    combined_shaped_dataset: pd.DataFrame = pd.concat(
-        [shape_transformer.transform_dataset_shape(df) for df in data.values()],
-        ignore_index=True,
-        sort=True,
-    )
-
-    combined_shaped_dataset = combined_shaped_dataset.fillna("")
+    with instrumentation.stage("concat", stage_stats):
+        shaped_datasets = list(shaped_datasets.values())
+
+        # TODO: Move concatentation of multiple datasets into DatasetShapeTransformer
+        # Combine all of the datasets into one
+        if low_copy and len(shaped_datasets) == 1:
+            # Shaped datasets don't have missing values, so a single dataset
+            # doesn't need to be copied.
+            combined_shaped_dataset: pd.DataFrame = shaped_datasets[0]
+        else:
+            combined_shaped_dataset: pd.DataFrame = categorical.concat(
+                shaped_datasets, sort=not low_copy
+            )
+            combined_shaped_dataset.fillna("", inplace=True)
+        del shaped_datasets
 
     # Generate Field mappings
-    generated_field_mappings: FieldMappings = FieldMappingGenerator(
-        schema
-    ).generate_mappings_from_dataset(combined_shaped_dataset)
+    with instrumentation.stage("generate_field_mappings", stage_stats):
+        match_cache: Optional[MatchCache] = (
+            MatchCache(match_cache_dir) if match_cache_dir is not None else None
+        )
+        generated_field_mappings: FieldMappings = FieldMappingGenerator(
+            schema, match_cache=match_cache
+        ).generate_mappings_from_dataset(combined_shaped_dataset)
 
     # Resolve Field Mappings
     resolved_field_mappings: FieldMappings = FieldMappingResolver.resolve_mappings(
@@ -192,13 +250,20 @@ def simple_pipeline(
         return return_val
 
     # Process Data
-    transformed_dataset, invalid_values, dropped_rows = DataProcessor(
-        resolved_field_mappings, schema
-    ).process(combined_shaped_dataset)
-
-    final_shaped_dataset = GatewayDatasetShapeTransformer(
-        schema
-    ).transform_dataset_shape(transformed_dataset)
+    with instrumentation.stage("process", stage_stats):
+        transformed_dataset, invalid_values, dropped_rows = DataProcessor(
+            resolved_field_mappings,
+            schema,
+            member_id=member_id,
+            invalid_value_logging=AGGREGATED_LOGGING,
+            low_copy=low_copy,
+        ).process(combined_shaped_dataset)
+        del combined_shaped_dataset
+
+    with instrumentation.stage("gateway_shape", stage_stats):
+        final_shaped_dataset = GatewayDatasetShapeTransformer(
+            schema
+        ).transform_dataset_shape(transformed_dataset)
 
     # Store number of rows in processed data, plus dropped data info.
     logging.warning(
@@ -226,10 +291,15 @@ def from_local(
     column_mapping_filename: str,
     field_mappings_filename: str,
     extracted_data_filenames: List[str],
+    low_copy: bool = False,
+    num_workers: int = 1,
 ):
     """Runs the simple pipeline using column and field mappings stored in the
     local filesystem.
 
+    The extracted data files are read with csv_ingestion.read_csv, so their
+    values are strings, and the columns the column mapping drops aren't read.
+
     Parameters
     ----------
     schema_filename : str:
@@ -238,6 +308,12 @@ def from_local(
         Local filename for the dataset's column mapping.
     field_mappings_filename : str
         Local filename for the datset's field mappings.
+    low_copy : bool
+        Whether to shape and process the data in place (see simple_pipeline).
+        The data is read from the local files, so nothing else is modified.
+    num_workers : int
+        Number of processes used to validate and shape the files (see
+        simple_pipeline).
 
     Returns
     -------
@@ -254,16 +330,19 @@ def from_local(
     if isinstance(extracted_data_filenames, str):
         extracted_data_filenames = [extracted_data_filenames]
 
-    all_data: Dict[str, pd.DataFrame] = {}
-    for filename in extracted_data_filenames:
-        all_data[filename] = pd.read_csv(filename)
-
     schema: Schema = table_schema.get_schema(schema_filename)
 
     column_mapping = ColumnMappingLoader().load_column_mappings_local(
         column_mapping_filename
     )
 
+    dropped_column_names = ColumnMappingLoader.get_dropped_column_names_from_dataframe(
+        column_mapping
+    )
+    all_data: Dict[str, pd.DataFrame] = {}
+    for filename in extracted_data_filenames:
+        all_data[filename] = csv_ingestion.read_csv(filename, dropped_column_names)
+
     source_field_mappings = FieldMappingLoader(schema).load_field_mappings_local(
         field_mappings_filename
     )
@@ -276,6 +355,9 @@ def from_local(
         schema,
         column_mapping,
         source_field_mappings,
+        low_copy=low_copy,
+        num_workers=num_workers,
+        strip_whitespace=False,
     )
 
 
@@ -340,9 +422,12 @@ def airflow_from_drive(
     if isinstance(extracted_data_filenames, str):
         extracted_data_filenames = [extracted_data_filenames]
 
+    dropped_column_names = ColumnMappingLoader.get_dropped_column_names_from_dataframe(
+        column_mapping
+    )
     all_data: Dict[str, pd.DataFrame] = {}
     for filename in extracted_data_filenames:
-        all_data[filename] = pd.read_csv(filename)
+        all_data[filename] = csv_ingestion.read_csv(filename, dropped_column_names)
 
     if all([df.empty for df in all_data.values()]):
         logging.info("Data file(s) are empty. Ending task.")
@@ -357,6 +442,9 @@ def airflow_from_drive(
         schema,
         column_mapping,
         source_field_mappings,
+        strip_whitespace=False,
+        match_cache_dir=MATCH_CACHE_DIR,
+        schema_cache_dir=table_schema.SCHEMA_CACHE_DIR,
     )
 
     # Push email metadata
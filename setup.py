@@ -47,6 +47,13 @@ setuptools.setup(
         "Programming Language :: Python :: 3.6",
     ],
     install_requires=REQUIRED_PACKAGES,
+    extras_require={
+        # Faster reading of extracted data files (see etl/helpers/csv_ingestion.py).
+        "pyarrow": ["pyarrow>=3.0.0"],
+        # Faster fuzzy matching of enum values (see
+        # etl/helpers/field_mapping/matcher.py).
+        "rapidfuzz": ["rapidfuzz>=2.0.0"],
+    },
     packages=setuptools.find_packages(),
     # setup_requires=["pytest-runner==5.1"],
     tests_require=["pytest"],